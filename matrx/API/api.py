@@ -4,6 +4,7 @@ import copy
 import logging
 
 from flask import Flask, jsonify, abort, request
+from flask import json as flask_json
 from flask_cors import CORS
 
 from matrx.utils.message import Message
@@ -34,6 +35,7 @@ add_message_to_agent = None
 received_messages = {} # messages received via the API, intended for the Gridworld
 gw_message_manager = None # the message manager of the gridworld, containing all messages of various types
 teams = None # dict with team names (keys) and IDs of agents who are in that team (values)
+tick_profiler = None # the TickProfiler of the gridworld, None if its ticks are not profiled
 # currently only one world at a time is supported
 current_world_ID = False
 
@@ -41,12 +43,23 @@ current_world_ID = False
 # agents have been updated
 temp_state = {}
 
+# the ids of the agents whose states were requested through the API, and whether the states of all agents were. Busy
+# agents only perceive their state each tick when it was requested, otherwise their last state is published again
+requested_state_ids = set()
+all_states_requested = False
+
+# the JSON serializable copies of the (shared) properties of agents in the states of the current tick, by their id
+__serializable_cache = {}
+
 # variables to be read (only!) by MATRX and set (only!) through API calls
 userinput = {}
 matrx_paused = False
 matrx_done = False
 tick_duration = 0.5
 
+# set whenever MATRX is paused, started, stopped or its tick duration changed, to wake up the GridWorld at once
+matrx_control_event = threading.Event()
+
 #########################################################################
 # API connection methods
 #########################################################################
@@ -90,7 +103,8 @@ def get_latest_state_and_messages(agent_id):
     messages = gw_message_manager.fetch_messages(current_tick, current_tick, clean_input_ids(agent_id)[0])
     chatrooms = gw_message_manager.fetch_chatrooms(clean_input_ids(agent_id)[0])
 
-    return jsonify({"matrx_paused": matrx_paused, "states": states, "messages": messages, "chatrooms": chatrooms})
+    return __jsonify_messages({"matrx_paused": matrx_paused, "states": states, "messages": messages,
+                               "chatrooms": chatrooms})
 
 #########################################################################
 # MATRX fetch state API calls
@@ -196,7 +210,7 @@ def get_messages(tick):
     chatrooms = gw_message_manager.fetch_chatrooms()
 
 
-    return jsonify({"messages": messages, "chatrooms": chatrooms})
+    return __jsonify_messages({"messages": messages, "chatrooms": chatrooms})
 
 
 
@@ -233,7 +247,7 @@ def get_messages_specific_agent(tick, agent_id):
     messages = gw_message_manager.fetch_messages(int(tick), current_tick, clean_input_ids(agent_id)[0])
     chatrooms = gw_message_manager.fetch_chatrooms(clean_input_ids(agent_id)[0])
 
-    return jsonify({"messages": messages, "chatrooms": chatrooms})
+    return __jsonify_messages({"messages": messages, "chatrooms": chatrooms})
 
 @app.route('/get_latest_messages', methods=['GET', 'POST'])
 def get_latest_messages():
@@ -264,7 +278,7 @@ def get_latest_messages():
     messages = gw_message_manager.fetch_messages(current_tick, current_tick)
     chatrooms = gw_message_manager.fetch_chatrooms()
 
-    return jsonify({"messages": messages, "chatrooms": chatrooms})
+    return __jsonify_messages({"messages": messages, "chatrooms": chatrooms})
 
 
 @app.route('/get_latest_messages/<agent_id>', methods=['GET', 'POST'])
@@ -297,7 +311,97 @@ def get_latest_messages_specific_agent(agent_id):
     messages = gw_message_manager.fetch_messages(current_tick, current_tick, clean_input_ids(agent_id)[0])
     chatrooms = gw_message_manager.fetch_chatrooms(clean_input_ids(agent_id)[0])
 
-    return jsonify({"messages": messages, "chatrooms": chatrooms})
+    return __jsonify_messages({"messages": messages, "chatrooms": chatrooms})
+
+
+@app.route('/get_messages_since/<message_nr>', methods=['GET', 'POST'])
+def get_messages_since(message_nr):
+    """ Provides the messages of all agents stored after message number `message_nr`. Also returns the chatrooms at
+    the latest tick.
+
+    Meant for polling; pass 0 the first time, and the returned `last_message_nr` the next time to only receive the
+    messages that were sent since.
+
+    Parameters
+    ----------
+    message_nr
+        integer indicating the number of the last message the client already has.
+    Returns
+        Returns a dictionary containing `messages`, `chatrooms` and `last_message_nr`. The messages subdictionary
+        contains all messages after message number `message_nr`, subdivided under `global`, `team`, and `private`.
+        Also see the documentation of the
+        :func:`~matrx.utils.message_manager.MessageManager.MyClass.fetch_messages_since` and
+        :func:`~matrx.utils.message_manager.MessageManager.MyClass.fetch_chatrooms` functions.
+    -------
+    """
+    # check for validity and return an error if not valid
+    API_call_valid, error = check_messages_API_request(message_nr=message_nr)
+    if not API_call_valid:
+        print("API request not valid:", error)
+        return abort(error['error_code'], description=error['error_message'])
+
+    messages, last_message_nr = gw_message_manager.fetch_messages_since(int(message_nr))
+    chatrooms = gw_message_manager.fetch_chatrooms()
+
+    return __jsonify_messages({"messages": messages, "chatrooms": chatrooms, "last_message_nr": last_message_nr})
+
+
+@app.route('/get_messages_since/<message_nr>/<agent_id>', methods=['GET', 'POST'])
+def get_messages_since_specific_agent(message_nr, agent_id):
+    """ Provides the messages either sent by or addressed to `agent_id`, stored after message number `message_nr`.
+
+    Parameters
+    ----------
+    message_nr
+        integer indicating the number of the last message the client already has.
+    agent_id
+        The `agent_id` of the agent of whom the messages should be fetched.
+        All fetched messages are either sent to or by the agent with agent ID `agent_id`.
+
+    Returns
+        Returns a dictionary containing `messages`, `chatrooms` and `last_message_nr`. The chatrooms subdictionary
+        contains all accessible chatrooms at the latest tick. The messages subdictionary contains the messages after
+        message number `message_nr` sent or received by `agent_id`, subdivided under `global`, `team`, and
+        `private`. Pass `last_message_nr` as `message_nr` in the next call to only receive new messages.
+        Also see the documentation of the
+        :func:`~matrx.utils.message_manager.MessageManager.MyClass.fetch_messages_since` and
+        :func:`~matrx.utils.message_manager.MessageManager.MyClass.fetch_chatrooms` functions.
+    -------
+
+    """
+    # check for validity and return an error if not valid
+    API_call_valid, error = check_messages_API_request(message_nr=message_nr, id=agent_id)
+    if not API_call_valid:
+        print("API request not valid:", error)
+        return abort(error['error_code'], description=error['error_message'])
+
+    messages, last_message_nr = gw_message_manager.fetch_messages_since(int(message_nr),
+                                                                        clean_input_ids(agent_id)[0])
+    chatrooms = gw_message_manager.fetch_chatrooms(clean_input_ids(agent_id)[0])
+
+    return __jsonify_messages({"messages": messages, "chatrooms": chatrooms, "last_message_nr": last_message_nr})
+
+
+#########################################################################
+# MATRX profiling API calls
+#########################################################################
+
+@app.route('/get_tick_profile', methods=['GET', 'POST'])
+def get_tick_profile():
+    """ Provides the time spent in each phase of a tick (goals, loggers, perception, brains, messages, api, actions,
+    objects and sleep), as rolling percentiles over the most recent ticks. Requires the GridWorld to profile its ticks
+    (profile_ticks=True in the WorldBuilder).
+
+    Returns
+        A dictionary with the number of profiled ticks, the times of the last tick and the 50th, 90th and 99th
+        percentile of the time in seconds spent in each phase. See TickProfiler.summary.
+    -------
+    """
+    if tick_profiler is None:
+        return abort(400, description="The ticks of this MATRX world are not profiled, set profile_ticks=True in the "
+                                      "WorldBuilder to do so.")
+
+    return jsonify(tick_profiler.summary())
 
 
 #########################################################################
@@ -399,6 +503,7 @@ def pause_MATRX():
     global matrx_paused
     if not matrx_paused:
         matrx_paused = True
+        matrx_control_event.set()
         return jsonify(True)
     else:
         return jsonify(False)
@@ -415,6 +520,7 @@ def start_MATRX():
     global matrx_paused
     if matrx_paused:
         matrx_paused = False
+        matrx_control_event.set()
         return jsonify(True)
     else:
         return jsonify(False)
@@ -429,6 +535,7 @@ def stop_MATRX():
     """
     global matrx_done
     matrx_done = True
+    matrx_control_event.set()
     return jsonify(True)
 
 @app.route('/change_tick_duration/<tick_dur>', methods=['GET', 'POST'])
@@ -453,6 +560,7 @@ def change_MATRX_speed(tick_dur):
     # save the new tick duration
     global tick_duration
     tick_duration = float(tick_dur)
+    matrx_control_event.set()
     return jsonify(True)
 
 
@@ -515,13 +623,14 @@ def clean_input_ids(ids):
         return [ids]
 
 
-def check_messages_API_request(tick=None, id=None):
+def check_messages_API_request(tick=None, id=None, message_nr=None):
     """ Checks if the variables of the API request are valid, and if the requested information exists
 
     Parameters
     ----------
     tick
     id
+    message_nr
 
     Returns
     -------
@@ -537,6 +646,18 @@ def check_messages_API_request(tick=None, id=None):
     if not check_passed:
         return False, error_message
 
+    # check if the message number is a valid format
+    if message_nr is not None:
+        try:
+            message_nr = int(message_nr)
+        except:
+            return False, {'error_code': 400,
+                           'error_message': f'Message number has to be an integer, but is of type {type(message_nr)}'}
+
+        if message_nr < 0:
+            return False, {'error_code': 400,
+                           'error_message': f'Message number has to be 0 or larger, but is {message_nr}'}
+
     return True, None
 
 
@@ -620,6 +741,41 @@ def check_input(tick=None, ids=None):
 
 
 
+def __jsonify_messages(response):
+    """ Returns the JSON response of a dictionary with messages as returned by the message manager under the
+    "messages" key. Each message is embedded as the JSON text it caches (see Message.toJSON), so it is not serialized
+    again for every request. The other values are serialized as jsonify does.
+
+    Parameters
+    ----------
+    response
+        The dictionary to respond with.
+    Returns
+        The Flask response.
+    -------
+    """
+    fields = []
+    for key, value in response.items():
+        value_json = __messages_json(value) if key == "messages" else flask_json.dumps(value)
+        fields.append(f"{flask_json.dumps(key)}:{value_json}")
+    return app.response_class("{" + ",".join(fields) + "}\n", mimetype="application/json")
+
+
+def __messages_json(messages):
+    """ Returns the JSON text of the messages as returned by MessageManager.fetch_messages, which already consist of
+    the JSON text of each message. """
+    global_json = ",".join(f'"{tick}":{__message_list_json(mssgs)}' for tick, mssgs in messages['global'].items())
+    team_json = ",".join(f'"{tick}":{{' + ",".join(f"{flask_json.dumps(team)}:{__message_list_json(mssgs)}"
+                                                   for team, mssgs in team_messages.items()) + "}"
+                         for tick, team_messages in messages['team'].items())
+    private_json = ",".join(f'"{tick}":{__message_list_json(mssgs)}' for tick, mssgs in messages['private'].items())
+    return f'{{"global":{{{global_json}}},"team":{{{team_json}}},"private":{{{private_json}}}}}'
+
+
+def __message_list_json(mssgs):
+    return "[" + ",".join(mssgs) + "]"
+
+
 def __fetch_states(tick, ids=None):
     """ This private function fetches, filters and orders the states as specified by the tick and agent ids.
 
@@ -635,10 +791,12 @@ def __fetch_states(tick, ids=None):
         specified in `agent_ids`, indexed by their agent ID.
     -------
     """
+    global all_states_requested
     tick = int(tick)
 
     # return all states
     if ids is None:
+        all_states_requested = True
         return states[tick:]
 
     # convert ints to lists so we can use 1 uniform approach
@@ -646,6 +804,7 @@ def __fetch_states(tick, ids=None):
         ids = eval(ids)
     except:
         ids = [ids]
+    requested_state_ids.update([ids] if isinstance(ids, str) else ids)
 
     # create a list containing the states from tick to current_tick containing the states of all desired agents/god
     filtered_states = []
@@ -680,19 +839,38 @@ def __reorder_state(state):
         The world state, JSON serializable
     -------
     """
-    new_state = copy.copy(state)
+    new_state = dict(state)
 
     # loop through all objects in the state
     for objID, obj in state.items():
 
         if not objID is "World":
-            # make the sense capability JSON serializable
+            # make the sense capability JSON serializable, in a copy as the properties are shared with the agents
             if "sense_capability" in obj:
-                new_state[objID]["sense_capability"] = str(obj["sense_capability"])
+                new_state[objID] = __serializable_properties(obj)
 
     return new_state
 
 
+def __serializable_properties(obj):
+    """ This private function returns a copy of the properties of an agent with its sense capability as a string. The
+    copy is made once per tick, as the same (read-only) properties are part of the states of many agents.
+
+    Parameters
+    ----------
+    obj
+        The properties of an agent
+    Returns
+        The JSON serializable properties
+    -------
+    """
+    cached = __serializable_cache.get(id(obj))
+    if cached is None or cached[0] is not obj:
+        cached = (obj, {**obj, "sense_capability": str(obj["sense_capability"])})
+        __serializable_cache[id(obj)] = cached
+    return cached[1]
+
+
 def add_state(agent_id, state, agent_inheritence_chain, world_settings):
     """ Saves the state of an agent for use via the API
 
@@ -715,9 +893,10 @@ def add_state(agent_id, state, agent_inheritence_chain, world_settings):
     if next_tick_info == {}:
         next_tick_info = world_settings
 
-    # Make sure the world settings are in the state, as these are used by the visualization
+    # Make sure the world settings are in the state, as these are used by the visualization. The state itself is not
+    # altered, it can be shared with the agent.
     if 'World' not in state:
-        state['World'] = world_settings
+        state = {**state, 'World': world_settings}
 
     # state['World']['matrx_paused'] = matrx_paused
 
@@ -739,6 +918,25 @@ def next_tick():
     # publicize the states of the previous tick
     states.append(copy.copy(temp_state))
 
+    # the serializable properties are only reused within a tick
+    __serializable_cache.clear()
+    matrx_control_event.clear()
+
+
+def is_state_requested(agent_id):
+    """ Whether the state of an agent was requested through the API, by its ID or by requesting the states of all agents
+
+    Parameters
+    ----------
+    agent_id
+        ID of the agent
+
+    Returns
+        True if an API consumer requested the state of this agent at some point, False otherwise
+    -------
+    """
+    return all_states_requested or agent_id in requested_state_ids
+
 
 def pop_userinput(agent_id):
     """ Pop the user input for an agent from the userinput dictionary and return it
@@ -759,7 +957,7 @@ def pop_userinput(agent_id):
 def reset_api():
     """ Reset the MATRX API variables """
     global temp_state, userinput, matrx_paused, matrx_done, states, current_tick, tick_duration, grid_size
-    global MATRX_info, next_tick_info, received_messages, current_world_ID
+    global MATRX_info, next_tick_info, received_messages, current_world_ID, all_states_requested
     temp_state = {}
     userinput = {}
     matrx_paused = False
@@ -772,6 +970,9 @@ def reset_api():
     next_tick_info = {}
     received_messages = {}
     current_world_ID = False
+    requested_state_ids.clear()
+    all_states_requested = False
+    __serializable_cache.clear()
 
 
 
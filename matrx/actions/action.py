@@ -1,3 +1,6 @@
+import inspect
+
+
 
 
 class Action:
@@ -33,6 +36,11 @@ class Action:
         # number of ticks the action takes to complete
         self.duration_in_ticks = duration_in_ticks
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Register every Action as soon as it is defined, so it can be found by its name
+        action_registry._register(cls)
+
     def mutate(self, grid_world, agent_id, **kwargs):
         """ Method that mutates GridWorld.
 
@@ -175,3 +183,129 @@ class ActionResult:
 
         self.result = result
         self.succeeded = succeeded
+
+
+class ActionRegistry:
+
+    def __init__(self):
+        """ The registry of all Actions, in which the GridWorld and agents look up an Action by its class name.
+
+        Every class that inherits from Action registers itself here when it is defined. The registry creates a single
+        instance of each Action when it is first needed and reuses that instance for every agent and GridWorld, since
+        Actions keep no state of their own other than what is set in their constructor. It also caches the default
+        duration of each Action, and which keyword arguments were already validated against an Action's signature.
+
+        When two Actions share the same class name, the one defined last is used.
+
+        """
+        self.__classes = {}  # action name -> action class, in order of definition
+        self.__instances = {}  # action name -> the reused instance of that action
+        self.__valid_call_shapes = set()  # (action name, keyword argument names) that were validated before
+
+    def _register(self, action_class):
+        name = action_class.__name__
+        self.__classes[name] = action_class
+
+        # A redefined action replaces the previous one, including its instance and validated calls
+        self.__instances.pop(name, None)
+        self.__valid_call_shapes = {shape for shape in self.__valid_call_shapes if shape[0] != name}
+
+    def names(self):
+        """ Returns the names of all registered Actions, in order of definition.
+
+        Returns
+        -------
+        list
+            The class names of all Actions.
+        """
+        return list(self.__classes.keys())
+
+    def get_class(self, action_name):
+        """ Returns the class of an Action.
+
+        Parameters
+        ----------
+        action_name : str
+            The class name of the Action.
+
+        Returns
+        -------
+        type
+            The Action class.
+        """
+        return self.__classes[action_name]
+
+    def get_instance(self, action_name):
+        """ Returns the reused instance of an Action, it is created when first requested.
+
+        Parameters
+        ----------
+        action_name : str
+            The class name of the Action.
+
+        Returns
+        -------
+        Action
+            The instance of the Action, created without any arguments.
+        """
+        action = self.__instances.get(action_name)
+        if action is None:
+            action = self.__classes[action_name]()
+            self.__instances[action_name] = action
+        return action
+
+    def get_duration(self, action_name):
+        """ Returns the default duration of an Action in ticks.
+
+        Parameters
+        ----------
+        action_name : str
+            The class name of the Action.
+
+        Returns
+        -------
+        int
+            The duration_in_ticks of the Action's instance.
+        """
+        return self.get_instance(action_name).duration_in_ticks
+
+    def validate_kwargs(self, action_name, action_kwargs):
+        """ Checks whether the keyword arguments can be passed to the is_possible and mutate methods of an Action.
+
+        The signatures of these methods are only checked once for every combination of keyword argument names.
+
+        Parameters
+        ----------
+        action_name : str
+            The class name of the Action.
+        action_kwargs : dict
+            The keyword arguments an agent gave for the Action.
+
+        Raises
+        ------
+        TypeError
+            When is_possible or mutate does not accept these keyword arguments.
+        """
+        call_shape = (action_name, frozenset(action_kwargs.keys()))
+        if call_shape in self.__valid_call_shapes:
+            return
+
+        action = self.get_instance(action_name)
+        for method in (action.is_possible, action.mutate):
+            try:
+                inspect.signature(method).bind(None, None, **action_kwargs)
+            except TypeError as e:
+                raise TypeError(f"The keyword arguments {list(action_kwargs.keys())} cannot be given to "
+                                f"{action_name}.{method.__name__}: {e}")
+
+        self.__valid_call_shapes.add(call_shape)
+
+    def __contains__(self, action_name):
+        return action_name in self.__classes
+
+    def __len__(self):
+        return len(self.__classes)
+
+
+# The registry in which all Actions register themselves when they are defined
+action_registry = ActionRegistry()
@@ -2,6 +2,7 @@ import numpy as np
 
 from matrx.actions.action import Action, ActionResult
 from matrx.objects.simple_objects import Door
+from matrx.utils.world_events import DoorOpened, DoorClosed
 
 
 class OpenDoorAction(Action):
@@ -62,6 +63,8 @@ class OpenDoorAction(Action):
 
         # call the open door action in the object
         obj.open_door()
+        if grid_world.event_bus.has_subscribers(DoorOpened):
+            grid_world.event_bus.emit(DoorOpened(grid_world.current_nr_ticks, agent_id, object_id))
 
         result = OpenDoorActionResult(OpenDoorActionResult.RESULT_SUCCESS, True)
         return result
@@ -159,6 +162,8 @@ class CloseDoorAction(Action):
 
         # call the close door action in the object
         obj.close_door()
+        if grid_world.event_bus.has_subscribers(DoorClosed):
+            grid_world.event_bus.emit(DoorClosed(grid_world.current_nr_ticks, agent_id, object_id))
 
         result = CloseDoorActionResult(CloseDoorActionResult.RESULT_SUCCESS, True)
         return result
@@ -6,6 +6,7 @@ from matrx.actions.action import Action, ActionResult
 from matrx.utils.utils import get_distance
 from matrx.objects.agent_body import AgentBody
 from matrx.objects.simple_objects import AreaTile
+from matrx.utils.world_events import ObjectGrabbed, ObjectDropped
 
 
 class RemoveObject(Action):
@@ -285,6 +286,9 @@ class GrabObject(Action):
         # Updating Location (done after removing from grid, or the grid will search the object on the wrong location)
         env_obj.location = reg_ag.location
 
+        if grid_world.event_bus.has_subscribers(ObjectGrabbed):
+            grid_world.event_bus.emit(ObjectGrabbed(grid_world.current_nr_ticks, agent_id, env_obj.obj_id))
+
         return GrabObjectResult(GrabObjectResult.RESULT_SUCCESS, True)
 
     def _is_possible_grab(self, grid_world, agent_id, object_id, grab_range, max_objects):
@@ -585,6 +589,10 @@ class DropObject(Action):
         env_obj.location = drop_loc
         grid_world._register_env_object(env_obj)
 
+        if grid_world.event_bus.has_subscribers(ObjectDropped):
+            grid_world.event_bus.emit(ObjectDropped(grid_world.current_nr_ticks, agent.obj_id, env_obj.obj_id,
+                                                    env_obj.location))
+
         return DropObjectResult(DropObjectResult.RESULT_SUCCESS, True)
 
     def _find_drop_loc(self, grid_world, agent, env_obj, drop_range, start_loc):
@@ -4,7 +4,7 @@ import random
 
 from matrx.actions.door_actions import *
 from matrx.actions.object_actions import *
-from matrx.utils.message import Message
+from matrx.utils.message import Message, MessageDelivery
 
 class AgentBrain:
 
@@ -39,7 +39,8 @@ class AgentBrain:
         # A list of messages that may be filled by this agent, which is retrieved by the GridWorld and send towards the
         # appropriate agents.
         self.messages_to_send = []
-        self.received_messages = []
+        self.__received_messages = []
+        self.__pending_messages = []  # the lists of messages set by the GridWorld, not yet read by this agent
 
         # Filled by the WorldFactory during self.factory_initialise()
         self.agent_id = None
@@ -77,6 +78,8 @@ class AgentBrain:
         state: dict
             A state description containing all properties of EnvObject and sub classes that are within a certain range
             as defined by self.sense_capability. The object id is the key, and the value is a dictionary of properties.
+            The state and the properties in it are read-only, as they are shared with other agents and the API; to
+            filter the state, build a new dictionary (e.g. with a dict comprehension or dict(state)).
 
         Returns
         -------
@@ -286,8 +289,24 @@ class AgentBrain:
 
         return action_result.succeeded, action_result
 
+    def fork_world(self):
+        """ Returns a fork of the GridWorld this agent is in, to simulate the consequences of actions.
+
+        The fork is a copy of the current state of the world that can be stepped with hypothetical actions for all
+        agents, without affecting the world itself. For example to look several ticks ahead, or to run many
+        simulations for a Monte Carlo tree search. Note that the fork contains the entire world, not only what this
+        agent perceives.
+
+        Returns
+        -------
+        GridWorld
+            The fork, see GridWorld.fork and GridWorld.step.
+
+        """
+        return self.__callback_fork_world()
+
     def _factory_initialise(self, agent_name, agent_id, action_set, sense_capability, agent_properties,
-                            customizable_properties, rnd_seed, callback_is_action_possible):
+                            customizable_properties, rnd_seed, callback_is_action_possible, callback_fork_world=None):
         """ Initialization of the brain by the WorldBuilder.
 
         Called by the WorldFactory to initialise this agent with all required properties in addition with any custom
@@ -321,6 +340,8 @@ class AgentBrain:
             The random seed used to set the random number generator self.rng
         callback_is_action_possible : callable
             A callback to a GridWorld method that can check if an action is possible.
+        callback_fork_world : callable, optional
+            A callback to a GridWorld method that returns a fork of it.
 
         """
 
@@ -353,6 +374,9 @@ class AgentBrain:
         # if not why not (in the form of an ActionResult).
         self.__callback_is_action_possible = callback_is_action_possible
 
+        # A callback to the GridWorld instance that returns a fork of it, to simulate the consequences of actions
+        self.__callback_fork_world = callback_fork_world
+
     def _get_action(self, state, agent_properties, agent_id):
         """
         The function the environment calls. The environment receives this function object and calls it when it is time
@@ -492,6 +516,27 @@ class AgentBrain:
 
         return send_messages
 
+    @property
+    def received_messages(self):
+        """
+        The contents of all messages this agent received, in the order they were received.
+
+        The messages the GridWorld sets are only added to this list when it is read, so an agent that never reads its
+        messages never pays for them.
+        """
+        if len(self.__pending_messages) > 0:
+            pending_messages = self.__pending_messages
+            self.__pending_messages = []
+            for messages in pending_messages:
+                self.__receive(messages)
+        return self.__received_messages
+
+    @received_messages.setter
+    def received_messages(self, received_messages):
+        # Messages that were set but not yet read are part of the list that is replaced
+        self.__pending_messages = []
+        self.__received_messages = received_messages
+
     def _set_messages(self, messages=None):
         """
         This method is called by the GridWorld.
@@ -499,16 +544,23 @@ class AgentBrain:
 
         Note; This method should NOT be overridden!
 
-        :param messages: A list of dictionaries that contain a 'from_id', 'to_id' and 'content.
-        If messages is set to None (or no messages are used as input), only the previous messages are removed
+        :param messages: A list of Messages, or of MessageDeliveries that are shared by all agents of which only those
+        for this agent are read. They are added to received_messages when that is read next.
+        If messages is set to None (or no messages are used as input), nothing is added
         """
+        if messages:
+            self.__pending_messages.append(messages)
 
-        # We empty all received messages as this is from the previous tick
-        # self.received_messages = []
-
-        # Loop through all messages and create a Message object out of the dictionaries.
+    def __receive(self, messages):
+        # Loop through all messages and add those for this agent to its received messages
         for mssg in messages:
 
+            # Deliveries are shared by all agents, so skip those that are not for this agent
+            if isinstance(mssg, MessageDelivery):
+                if not mssg.is_for(self.agent_id):
+                    continue
+                mssg = mssg.message
+
             # Check if the message is of type Message (its content contains the actual message)
             AgentBrain.__check_message(mssg, self.agent_id)
 
@@ -517,7 +569,7 @@ class AgentBrain:
             received_message = mssg.content
 
             # Add the message object to the received messages
-            self.received_messages.append(received_message)
+            self.__received_messages.append(received_message)
 
     @staticmethod
     def __check_message(mssg, this_agent_id):
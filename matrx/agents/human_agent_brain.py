@@ -231,7 +231,8 @@ class HumanAgentBrain(AgentBrain):
         This filtering is what you do here.
 
         :param state: A state description containing all properties of EnvObject that are within a certain range as
-        defined by self.sense_capability. It is a list of properties in a dictionary
+        defined by self.sense_capability. It is a list of properties in a dictionary. The state and the properties in it
+        are read-only, as they are shared with other agents and the API; to filter it, build a new dictionary.
         :return: A filtered state.
         """
         return state
@@ -1,29 +1,48 @@
-import datetime
+import heapq
+import itertools
+import operator
 import os.path
+import threading
 import warnings
 from collections import OrderedDict
 import time
 import copy
+from concurrent.futures import ThreadPoolExecutor
 
 import requests
 
-import gevent
 
+from matrx.actions.action import action_registry
 from matrx.actions.object_actions import *
+from matrx.utils.action_log import ActionLog
 from matrx.logger.logger import GridWorldLogger
 from matrx.objects.env_object import EnvObject
 from matrx.objects.simple_objects import AreaTile
-from matrx.utils.utils import get_all_classes
 from matrx.utils.message_manager import  MessageManager
+from matrx.utils.forked_objects import ForkedObjects
+from matrx.utils.spatial_index import SpatialIndex
+from matrx.utils.object_store import ObjectStore
+from matrx.utils.read_only import freeze, ReadOnlyDict
+from matrx.utils.tick_clock import TickClock
+from matrx.utils.tick_profiler import TickProfiler
+from matrx.utils.world_snapshot import WorldSnapshot
+from matrx.utils.world_events import EventBus, ObjectAdded, ObjectRemoved, ObjectMoved, PropertyChanged, MessageSent, \
+    ActionFailed
 from matrx.API import api
 from matrx.agents.agent_brain import AgentBrain
 
 
+# Returns the state version of an object or agent body, see EnvObject._state_version
+_state_version_of = operator.attrgetter("_state_version")
+
 
 class GridWorld:
 
     def __init__(self, shape, tick_duration, simulation_goal, rnd_seed=1,
-                 visualization_bg_clr="#C2C2C2", visualization_bg_img=None, verbose=False, world_ID=False):
+                 visualization_bg_clr="#C2C2C2", visualization_bg_img=None, verbose=False, world_ID=False,
+                 check_grid_consistency=False, max_decision_workers=None, use_object_store=False, profile_ticks=False,
+                 tick_overrun_policy=TickClock.DROP, record_actions=False, message_retention_ticks=None,
+                 message_history_dir=None):
         self.__tick_duration = tick_duration  # How long each tick should take (process sleeps until thatr time is passed)
         self.__simulation_goal = simulation_goal  # The simulation goal, the simulation end when this/these are reached
         self.__shape = shape  # The width and height of the GridWorld
@@ -31,16 +50,22 @@ class GridWorld:
         self.__visualization_bg_img = visualization_bg_img  # The background image of the visualisation
         self.__verbose = verbose  # Set whether we should print anything or not
         self.world_ID = world_ID # ID of this simulation world
+        self.__check_grid_consistency = check_grid_consistency  # Whether to verify the grid against a full rebuild
+        self.__max_decision_workers = max_decision_workers  # Nr. of threads in which agents decide, None is sequential
+        self.__decision_pool = None  # The thread pool in which agents decide, when max_decision_workers is set
 
         self.__teams = {} # dictionary with team names (keys), and agents in those teams (values)
+        self.__agent_teams = {}  # agent id -> the team it is registered in, the reverse of self.__teams
+        self.__team_members = {}  # team name -> read-only list of its members shared by all states, built when needed
         self.__registered_agents = OrderedDict()  # The dictionary of all existing agents in the GridWorld
         self.__environment_objects = OrderedDict()  # The dictionary of all existing objects in the GridWorld
-
-        # Get all actions within all currently imported files
-        self.__all_actions = get_all_classes(Action, omit_super_class=True)
+        self.__updated_objects = OrderedDict()  # The objects that override update, in the same order as above
+        self.__spatial_index = SpatialIndex()  # Cell-bucketed index of all objects and agents, for range queries
+        self.__object_store = ObjectStore() if use_object_store else None  # Optional columnar store of object data
 
         # Initialise an empty grid, a simple 2D array with ID's
         self.__grid = np.array([[None for _ in range(shape[0])] for _ in range(shape[1])])
+        self.__grid_locations = {}  # The location at which each object id is stored in the grid
 
         self.__loggers = []  # a list of GridWorldLogger use to log the data
         self.__is_done = False  # Whether the simulation is done (goal(s) reached)
@@ -49,8 +74,32 @@ class GridWorld:
         self.__curr_tick_duration = 0.  # Duration of the current tick
         self.__current_nr_ticks = 0  # The number of tick this GridWorld has ran already
         self.__is_initialized = False  # Whether this GridWorld is already initialized
-        self.__message_buffer = {}  # dictionary of messages that need to be send to agents, with receiver ids as keys
-        self.message_manager = MessageManager() # keeps track of all messages and makes them available to the API
+        self.__headless = False  # Whether this GridWorld runs headless; without API, timing, sleeping or printing
+        self.__message_buffer = []  # the MessageDeliveries that need to be send to agents this tick
+        self.__world_info = None  # The generic properties of this world (tick, grid shape, etc.) of the current tick
+        self.__properties_snapshot = {}  # object id -> (properties version, read-only properties) shared by all states
+        self.__wake_queue = []  # heap of (tick, registration nr, agent id) with the next tick each agent is checked
+        self.__agent_wake_ticks = {}  # agent id -> the tick at which the agent is in the wake queue
+        self.__agent_registration_nrs = {}  # agent id -> the order in which the agent was registered
+        self.__last_agent_states = {}  # agent id -> its last filtered state, published again while it is busy
+        # keeps track of all messages and makes them available to the API, optionally keeping only recent ones in memory
+        self.message_manager = MessageManager(retention_ticks=message_retention_ticks, history_dir=message_history_dir)
+        self.__tick_profiler = TickProfiler() if profile_ticks else None  # Records the time spent in each tick phase
+        self.__tick_clock = TickClock(tick_duration, overrun_policy=tick_overrun_policy)  # Paces the ticks
+        self.__object_states = {}  # id of object -> (object, state version, state) in the last snapshot made or restored
+        self.__object_states_key = None  # The objects and their state versions of which __object_states was made
+        self.__registry_versions = itertools.count(1)  # Hands out a new version whenever objects are added or removed
+        self.__registry_version = next(self.__registry_versions)
+        self.__registries_snapshot = None  # The registries in the last snapshot made or restored
+        self.__is_fork = False  # Whether this GridWorld is a fork of another, see fork
+        self.__fork_sources = {}  # id of object -> (object, state version, state) of the world this is a fork of
+        self.__forked_objects = {}  # id of object in the world this is a fork of -> its copy in this fork
+        self.__forked_dicts = []  # the dictionaries in a fork that contain objects of the world it forked
+        self.__fork_lock = threading.Lock()  # Forks can be made by agents that decide concurrently
+        self.__action_log = ActionLog() if record_actions else None  # Records what the agents did, see replay
+        self.__replaying = False  # Whether this GridWorld is replaying an ActionLog, in which no brain is called
+        self.__event_bus = EventBus()  # Delivers the events of this world to its subscribers, see event_bus
+        self.__subscribe_goals()
 
     def initialize(self, api_info):
         # Only initialize when we did not already do so
@@ -61,6 +110,11 @@ class GridWorld:
             for agent_body in self.__registered_agents.values():
                 agent_body.brain_initialize_func()
 
+            # Start the pool in which the agents decide on their actions concurrently, if requested
+            if self.__max_decision_workers is not None:
+                self.__decision_pool = ThreadPoolExecutor(max_workers=self.__max_decision_workers,
+                                                          thread_name_prefix=f"{self.world_ID}_decisions")
+
             # set the API variables
             self.api_info = api_info
             self.__run_matrx_api = self.api_info['run_matrx_api']
@@ -74,19 +128,10 @@ class GridWorld:
                 # point the API towards our message manager, for making messages available via the API
                 api.gw_message_manager = self.message_manager
                 api.teams = self.__teams
+                api.tick_profiler = self.__tick_profiler
 
                 # init API with world info
-                api.MATRX_info =  {
-                    "nr_ticks": self.__current_nr_ticks,
-                    "curr_tick_timestamp": int(round(time.time() * 1000)),
-                    "grid_shape": self.__shape,
-                    "tick_duration": self.tick_duration,
-                    "world_ID": self.world_ID,
-                    "vis_settings": {
-                        "vis_bg_clr": self.__visualization_bg_clr,
-                        "vis_bg_img": self.__visualization_bg_img
-                    }
-                }
+                api.MATRX_info = copy.copy(self.__get_world_info())
                 # start paused
                 api.matrx_paused = True
 
@@ -130,6 +175,9 @@ class GridWorld:
 
 
     def run(self, api_info):
+        if self.__is_fork:
+            raise Exception(f"A fork of a GridWorld has no agent brains to run, use GridWorld.step instead.")
+
         # initialize the gridworld
         self.initialize(api_info)
 
@@ -140,7 +188,7 @@ class GridWorld:
 
             if self.__run_matrx_api and api.matrx_paused:
                 print("MATRX paused through API")
-                gevent.sleep(1)
+                self.__wait_while_paused()
             else:
                 is_done, tick_duration = self.__step()
 
@@ -148,6 +196,576 @@ class GridWorld:
                 print("Scenario stopped through API")
                 break
 
+    def run_headless(self, nr_ticks=None, skip_idle_ticks=False):
+        """ Runs this GridWorld as fast as possible, without the API, visualisation, sleeping or printing.
+
+        Meant for batch experiments and throughput measurements. The agents and objects behave exactly as they would
+        with `run`, and any loggers still log.
+
+        Parameters
+        ----------
+        nr_ticks : int, optional (default=None)
+            The maximum number of ticks to run. When None, this GridWorld runs until its simulation goal is reached.
+        skip_idle_ticks : bool, optional (default=False)
+            Whether to jump over the ticks at which nothing happens, instead of performing every tick. After each tick
+            the world continues at the first tick at which an agent has to act or decide, an object is updated (see
+            EnvObject.update_interval and EnvObject.sleep), a simulation goal may change or a logger logs. The resulting
+            world and logs are the same as those without skipping. Goals that do not override
+            SimulationGoal.next_tick_to_check prevent skipping, as they may change any tick.
+
+        Returns
+        -------
+        dict
+            A summary of the run, with the number of ticks performed ("nr_ticks"), the wall time in seconds that took
+            ("wall_time"), the resulting ticks per second ("ticks_per_second") and whether the simulation goal was
+            reached ("is_done").
+
+        Raises
+        ------
+        ValueError
+            When nr_ticks is not a positive integer.
+        Exception
+            When this GridWorld is a fork, see `fork`.
+
+        """
+        if nr_ticks is not None and (not isinstance(nr_ticks, int) or nr_ticks <= 0):
+            raise ValueError(f"The given nr_ticks {nr_ticks} should be None or an integer larger or equal to 1.")
+        if self.__is_fork:
+            raise Exception(f"A fork of a GridWorld has no agent brains to run, use GridWorld.step instead.")
+
+        # Initialize without the API, this has no effect if this GridWorld was already initialized
+        self.initialize({"run_matrx_api": False, "api_thread": False})
+
+        self.__headless = True
+        start_nr_ticks = self.__current_nr_ticks
+        start_time = time.perf_counter()
+        try:
+            end_tick = None if nr_ticks is None else start_nr_ticks + nr_ticks
+            while not self.__is_done and (end_tick is None or self.__current_nr_ticks < end_tick):
+                self.__step()
+                if skip_idle_ticks and not self.__is_done:
+                    self.__current_nr_ticks = self.__next_event_tick(end_tick)
+        finally:
+            self.__headless = False
+        wall_time = time.perf_counter() - start_time
+
+        ticks_run = self.__current_nr_ticks - start_nr_ticks
+        return {"nr_ticks": ticks_run,
+                "wall_time": wall_time,
+                "ticks_per_second": ticks_run / wall_time if wall_time > 0 else float("inf"),
+                "is_done": bool(self.__is_done)}
+
+
+    def __next_event_tick(self, end_tick=None):
+        """ Returns the first tick from the current tick onwards at which something may happen in this GridWorld; an
+        agent has to be checked (see __agents_to_check), an object is updated, a simulation goal may change or a logger
+        logs. All ticks before it would do nothing, so they can be skipped.
+        :param end_tick: The tick at which the run ends, we never skip beyond it. None if the run has no end.
+        :return: The tick number, which is the current tick when nothing can be skipped.
+        """
+        current_tick = self.__current_nr_ticks
+        if self.__run_matrx_api or len(self.__message_buffer) > 0:
+            return current_tick
+
+        # The next tick at which an agent is in the wake queue (this may be an outdated entry, which is a lower bound)
+        event_ticks = []
+        if len(self.__wake_queue) > 0:
+            event_ticks.append(self.__wake_queue[0][0])
+
+        # The next tick at which an object is updated
+        for env_obj in self.__updated_objects.values():
+            event_ticks.append(env_obj._next_update_tick(current_tick))
+
+        goals = self.__simulation_goal if isinstance(self.__simulation_goal, list) else [self.__simulation_goal]
+        for goal in goals:
+            if goal is not None:
+                event_ticks.append(goal.next_tick_to_check(self))
+
+        for logger in self.__loggers:
+            event_ticks.append(logger._next_tick_to_log(current_tick))
+
+        if end_tick is not None:
+            event_ticks.append(end_tick)
+
+        event_ticks = [tick for tick in event_ticks if tick is not None]
+        if len(event_ticks) == 0:  # nothing will ever happen again, as we cannot skip forever we simply continue
+            return current_tick
+        return max(current_tick, min(event_ticks))
+
+    def snapshot(self):
+        """ Returns a snapshot of the current state of this GridWorld, to return to that state later with `restore`.
+
+        Meant for resetting or rolling back a world many times, e.g. for reinforcement learning or search, which is much
+        faster than building the world again. The snapshot covers the tick number, whether the simulation goal was
+        reached, the random state, all objects and agent bodies (including carried objects and the action each agent is
+        busy with), when each agent is checked next, the message buffer, the message history and the teams.
+
+        Only what may change is copied; the lists, dictionaries and sets in the attributes of each object. Anything
+        else, such as the names, visualization settings and sense capabilities, is shared with the objects themselves.
+        Objects that did not change since the previous snapshot share their copy with that snapshot, and are skipped
+        when restoring a snapshot in which they are the same (see EnvObject._state_version). So after the first
+        snapshot, the cost of snapshots and restores mostly depends on the number of objects that changed. When you
+        alter a list or dictionary inside a custom property in place, call EnvObject._properties_changed for the change
+        to be noticed.
+
+        Not part of a snapshot are the brains of the agents (e.g. their memory, received messages and random state),
+        the simulation goals, the loggers and the API. Make snapshots between ticks, not from within one (e.g. from the
+        update method of an object). A snapshot of a fork (see `fork`) first copies all objects into the fork.
+
+        Returns
+        -------
+        WorldSnapshot
+            The snapshot, which can be restored any number of times in this GridWorld.
+
+        """
+        # A snapshot of a fork refers to its own objects only, so all objects of the world it forked are copied first
+        if self.__is_fork:
+            self.__copy_all_sources()
+
+        # Reuse the copies of the objects that did not change since the previous snapshot
+        object_states = self.__snapshot_objects()
+
+        # Reuse the registries of the previous snapshot when no objects or agents were added or removed since
+        if self.__registries_snapshot is None or self.__registries_snapshot["version"] != self.__registry_version:
+            self.__registries_snapshot = {
+                "version": self.__registry_version,
+                "environment_objects": list(self.__environment_objects.items()),
+                "registered_agents": list(self.__registered_agents.items()),
+                "updated_objects": list(self.__updated_objects.items()),
+                "registered_ids": self.__environment_objects.keys() | self.__registered_agents.keys(),
+                "spatial_order": self.__spatial_index.snapshot_order()}
+
+        state = {"nr_ticks": self.__current_nr_ticks,
+                 "is_done": self.__is_done,
+                 "rnd_state": self.__rnd_gen.get_state(),
+                 "objects": object_states,
+                 "registries": self.__registries_snapshot,
+                 "object_store": self.__object_store.snapshot() if self.__object_store is not None else None,
+                 "teams": {team: list(members) for team, members in self.__teams.items()},
+                 "wake_queue": list(self.__wake_queue),
+                 "agent_wake_ticks": dict(self.__agent_wake_ticks),
+                 "agent_registration_nrs": dict(self.__agent_registration_nrs),
+                 "last_agent_states": dict(self.__last_agent_states),
+                 "message_buffer": list(self.__message_buffer),
+                 "messages": self.message_manager.snapshot_history()}
+
+        return WorldSnapshot(self, self.__current_nr_ticks, state)
+
+    def restore(self, snapshot):
+        """ Returns this GridWorld to the state it was in when the given snapshot was made, see `snapshot`.
+
+        Objects and agents that were added since are no longer part of this world, those that were removed since are
+        part of it again. The next tick performed is the tick at which the snapshot was made.
+
+        Parameters
+        ----------
+        snapshot : WorldSnapshot
+            A snapshot made by `snapshot` of this GridWorld.
+
+        Raises
+        ------
+        ValueError
+            When the snapshot is not one of this GridWorld.
+
+        """
+        if not isinstance(snapshot, WorldSnapshot) or not snapshot._is_of(self):
+            raise ValueError(f"The given snapshot {snapshot} is not a snapshot of this GridWorld.")
+        state = snapshot._state
+        registries = state["registries"]
+        same_registries = registries["version"] == self.__registry_version
+
+        # Detach the objects that were added since the snapshot, they no longer belong to this world
+        if not same_registries:
+            registered_ids = self.__environment_objects.keys() | self.__registered_agents.keys()
+            for obj_id in registered_ids - registries["registered_ids"]:
+                obj = self.get_env_object(obj_id)
+                obj._location_callback = None
+                obj._property_callback = None
+                if self.__object_store is not None and obj.__dict__.get("_store") is self.__object_store:
+                    self.__object_store.remove(obj)
+                self.__remove_from_cell(obj_id)
+                self.__properties_snapshot.pop(obj_id, None)
+
+        # Restore the objects that changed since the snapshot, the store holds part of their data so it is restored
+        # along with them
+        if self.__object_store is not None:
+            self.__object_store.restore(state["object_store"])
+        changed_objs = []
+        for obj, state_version, obj_state in state["objects"].values():
+            if obj._state_version != state_version:
+                obj._restore_state(obj_state)
+                changed_objs.append(obj)
+        self.__object_states = state["objects"]
+        self.__object_states_key = None
+
+        # Restore the registries (in place, as the API and message manager refer to them) and the order of the spatial
+        # index, and add the objects that were removed since to the grid again
+        if not same_registries:
+            self.__environment_objects.clear()
+            self.__environment_objects.update(registries["environment_objects"])
+            self.__registered_agents.clear()
+            self.__registered_agents.update(registries["registered_agents"])
+            self.__updated_objects.clear()
+            self.__updated_objects.update(registries["updated_objects"])
+            self.__spatial_index.restore_order(registries["spatial_order"])
+            for obj_id in registries["registered_ids"] - self.__grid_locations.keys():
+                self.add_to_grid(self.get_env_object(obj_id))
+            self.__registry_version = registries["version"]
+        self.__registries_snapshot = registries
+
+        # Move the objects that changed in the grid and spatial index. When objects were added or removed since, the
+        # order of those that changed may have changed as well, so they are put back in their location.
+        for obj in changed_objs:
+            if obj.obj_id in self.__grid_locations:
+                if not same_registries:
+                    self.__remove_from_cell(obj.obj_id)
+                    self.add_to_grid(obj)
+                self.__on_location_change(obj)
+
+        self.__teams.clear()
+        self.__teams.update((team, list(members)) for team, members in state["teams"].items())
+        self.__agent_teams = {agent_id: team for team, members in self.__teams.items() for agent_id in members}
+        self.__team_members = {}
+        self.__wake_queue = list(state["wake_queue"])
+        self.__agent_wake_ticks = dict(state["agent_wake_ticks"])
+        self.__agent_registration_nrs = dict(state["agent_registration_nrs"])
+        self.__last_agent_states = dict(state["last_agent_states"])
+        self.__message_buffer = list(state["message_buffer"])
+        self.message_manager.restore_history(state["messages"])
+
+        self.__current_nr_ticks = state["nr_ticks"]
+        self.__is_done = state["is_done"]
+        if self.__action_log is not None:
+            self.__action_log.truncate(self.__current_nr_ticks)
+        self.__rnd_gen.set_state(state["rnd_state"])
+        self.__world_info = None
+
+        # Do not try to catch up on the time between the snapshot and now
+        self.__tick_clock.reset()
+
+    def fork(self):
+        """ Returns a fork of this GridWorld; a copy of its current state that can be stepped with hypothetical actions
+        (see `step`) without affecting this world, e.g. for lookahead planning or Monte Carlo tree search.
+
+        Objects and agent bodies are copied on write; a fork shares the state of all objects with this world (see
+        `snapshot`), and only copies an object once it is obtained from the fork, e.g. by an action or a range query.
+        The grid, spatial index and object store are copied shallowly, as they only hold ids and values. So after the
+        first fork, making one mostly costs a pass over the ids of all objects, and stepping one mostly costs copying
+        the objects it involves. A fork can be forked again in the same way, any number of forks can coexist.
+
+        A fork has no agent brains, loggers, API or messages. Its simulation goal is a deep copy of that of this world.
+        Forks can be made from within the brain of an agent (see AgentBrain.fork_world). When agents decide
+        concurrently (see max_decision_workers), the fork may include the decisions made by other agents this tick.
+
+        Returns
+        -------
+        GridWorld
+            The fork, at the same tick as this GridWorld.
+
+        """
+        with self.__fork_lock:
+            object_states = self.__snapshot_objects()
+
+            fork = GridWorld.__new__(GridWorld)
+            fork.__dict__.update(self.__dict__)
+            fork.__is_fork = True
+            fork.__fork_sources = object_states
+            fork.__forked_objects = {}
+            fork.__fork_lock = threading.Lock()
+            fork.__object_states = {}
+            fork.__object_states_key = None
+            fork.__registry_versions = itertools.count(1)
+            fork.__registry_version = next(fork.__registry_versions)
+            fork.__registries_snapshot = None
+
+            # The objects are only copied into the fork when obtained from it
+            fork.__forked_dicts = []
+
+            def fork_objects(objects):
+                forked_dict = ForkedObjects(dict.items(objects), fork.__copy_source, fork.__is_source)
+                fork.__forked_dicts.append(forked_dict)
+                return forked_dict
+
+            fork.__environment_objects = fork_objects(self.__environment_objects)
+            fork.__registered_agents = fork_objects(self.__registered_agents)
+            fork.__updated_objects = fork_objects(self.__updated_objects)
+            fork.__spatial_index = self.__spatial_index.copy(fork_objects)
+            fork.__object_store = self.__object_store.copy() if self.__object_store is not None else None
+            fork.__grid = self.__grid.copy()  # the lists of ids in the grid are never altered in place
+            fork.__grid_locations = dict(self.__grid_locations)
+            fork.__properties_snapshot = dict(self.__properties_snapshot)
+            fork.__teams = {team: list(members) for team, members in self.__teams.items()}
+            fork.__agent_teams = dict(self.__agent_teams)
+            fork.__team_members = dict(self.__team_members)
+            fork.__wake_queue = list(self.__wake_queue)
+            fork.__agent_wake_ticks = dict(self.__agent_wake_ticks)
+            fork.__agent_registration_nrs = dict(self.__agent_registration_nrs)
+            fork.__last_agent_states = dict(self.__last_agent_states)
+            fork.__rnd_gen = np.random.RandomState()
+            fork.__rnd_gen.set_state(self.__rnd_gen.get_state())
+            fork.__simulation_goal = copy.deepcopy(self.__simulation_goal)
+            fork.__event_bus = EventBus()
+            fork.__subscribe_goals()
+
+            # Nothing outside the fork knows about it
+            fork.__loggers = []
+            fork.__action_log = None
+            fork.__message_buffer = []
+            fork.message_manager = MessageManager()
+            fork.__world_info = None
+            fork.__verbose = False
+            fork.__run_matrx_api = False
+            fork.api_info = {"run_matrx_api": False, "api_thread": False}
+            fork.__max_decision_workers = None
+            fork.__decision_pool = None
+            fork.__tick_profiler = None
+            fork.__tick_clock = TickClock(self.__tick_duration)
+        return fork
+
+    def step(self, actions=None):
+        """ Performs the current tick of a fork of a GridWorld (see `fork`), in which the agents perform the given
+        actions instead of deciding on them.
+
+        An agent that is not busy starts the action given for it, or idles when none is given. An agent that is busy
+        continues its current action. As in a normal tick, an action is performed at the last tick of its duration,
+        after which the objects are updated.
+
+        Parameters
+        ----------
+        actions : dict, optional (default=None)
+            The ids of agents as keys, and the action they start as values; a tuple of the name of an Action class and
+            a dictionary with its arguments, as returned by AgentBrain.decide_on_action.
+
+        Returns
+        -------
+        dict
+            The ActionResult of each action that was performed this tick, with the ids of the agents as keys. Empty
+            when the simulation goal of the fork was already reached.
+
+        Raises
+        ------
+        Exception
+            When this GridWorld is not a fork, as its agents have a brain to decide on their actions.
+        ValueError
+            When an action is given for an agent that is not in this world.
+
+        """
+        if not self.__is_fork:
+            raise Exception(f"Only a fork of a GridWorld can be stepped with given actions, see GridWorld.fork.")
+        if actions is None:
+            actions = {}
+        unknown_agents = actions.keys() - self.__registered_agents.keys()
+        if len(unknown_agents) > 0:
+            raise ValueError(f"Actions were given for the agents {unknown_agents}, which are not in this GridWorld.")
+
+        self.__world_info = None
+        self.__is_done, _ = self.__check_simulation_goal()
+        if self.__is_done:
+            return {}
+
+        # Start the given actions, in order of registration, and collect those that are performed this tick
+        action_buffer = OrderedDict()
+        for agent_id, agent_obj in self.__registered_agents.items():
+            if not agent_obj._check_agent_busy(curr_tick=self.__current_nr_ticks):
+                action_class_name, action_kwargs = actions.get(agent_id, (None, None))
+                if action_kwargs is None:
+                    action_kwargs = {}
+                self.__set_agent_busy(action_name=action_class_name, action_kwargs=action_kwargs, agent_id=agent_id)
+
+            if agent_obj._at_last_action_duration_tick(curr_tick=self.__current_nr_ticks):
+                action_buffer[agent_id] = agent_obj._get_duration_action()
+
+        action_results = self.__perform_actions(action_buffer)
+        self.__update_objects()
+
+        self.__current_nr_ticks += 1
+        return action_results
+
+    def replay(self, action_log, nr_ticks=None, skip_idle_ticks=False):
+        """ Replays the decisions recorded in an ActionLog (see `action_log`), without calling any agent brain.
+
+        Meant for reproducing a run for debugging or re-analysis, also of (human) agents whose decisions cannot be
+        repeated. Each tick, the agents start the same actions with the same arguments as in the recorded run and make
+        the same changes to their properties, and their messages are processed by the message manager again. As
+        everything else in a GridWorld is deterministic, this reproduces the trajectory of the recorded world at the
+        speed of `run_headless`.
+
+        Replay a log in a GridWorld in the state the recorded world was in at the start tick of the log, e.g. one
+        created in the same way in a new process (so the objects get the same ids), or a fork of the recorded world
+        made at that tick. A log can also be replayed
+        in parts, to inspect the world in between. The brains are never initialized or called, the loggers do not log
+        and the API does not run, so a GridWorld that replayed a log should not be run afterwards.
+
+        Parameters
+        ----------
+        action_log : ActionLog
+            The log to replay, e.g. the `action_log` of a GridWorld created with record_actions, or one that was saved
+            to and loaded from a file.
+        nr_ticks : int, optional (default=None)
+            The maximum number of ticks to replay. When None, the log is replayed up to its end or until the simulation
+            goal is reached.
+        skip_idle_ticks : bool, optional (default=False)
+            Whether to jump over the ticks at which nothing happens, see `run_headless`.
+
+        Returns
+        -------
+        dict
+            A summary of the replay, as returned by `run_headless`.
+
+        Raises
+        ------
+        ValueError
+            When nr_ticks is not a positive integer, when the current tick of this GridWorld is not within the log, or
+            when the log has decisions at that tick of agents that are not in this GridWorld.
+
+        """
+        if nr_ticks is not None and (not isinstance(nr_ticks, int) or nr_ticks <= 0):
+            raise ValueError(f"The given nr_ticks {nr_ticks} should be None or an integer larger or equal to 1.")
+        if not action_log.start_tick <= self.__current_nr_ticks <= action_log.end_tick:
+            raise ValueError(f"The GridWorld is at tick {self.__current_nr_ticks}, while the given action log covers the "
+                             f"ticks {action_log.start_tick} up to {action_log.end_tick}.")
+        unknown_agents = action_log.decisions_at(self.__current_nr_ticks).keys() - self.__registered_agents.keys()
+        if len(unknown_agents) > 0:
+            raise ValueError(f"The given action log has decisions of the agents {unknown_agents}, which are not in "
+                             f"this GridWorld.")
+
+        # Initialize without the brains and the API
+        if not self.__is_initialized:
+            self.__update_grid()
+            self.api_info = {"run_matrx_api": False, "api_thread": False}
+            self.__run_matrx_api = False
+            self.__is_initialized = True
+
+        self.__replaying = True
+        start_nr_ticks = self.__current_nr_ticks
+        start_time = time.perf_counter()
+        try:
+            end_tick = action_log.end_tick if nr_ticks is None else min(action_log.end_tick, start_nr_ticks + nr_ticks)
+            while not self.__is_done and self.__current_nr_ticks < end_tick:
+                self.__replay_step(action_log)
+                if skip_idle_ticks and not self.__is_done:
+                    self.__current_nr_ticks = self.__next_event_tick(end_tick)
+        finally:
+            self.__replaying = False
+        wall_time = time.perf_counter() - start_time
+
+        ticks_run = self.__current_nr_ticks - start_nr_ticks
+        return {"nr_ticks": ticks_run,
+                "wall_time": wall_time,
+                "ticks_per_second": ticks_run / wall_time if wall_time > 0 else float("inf"),
+                "is_done": bool(self.__is_done)}
+
+    def __replay_step(self, action_log):
+        """ Performs the current tick as __step does, with the decisions and messages of the agents taken from an
+        ActionLog instead of from their brains. """
+        self.__world_info = None
+        self.__is_done, _ = self.__check_simulation_goal()
+        if self.__is_done:
+            return
+
+        tick = self.__current_nr_ticks
+        decisions = action_log.decisions_at(tick)
+        messages = action_log.messages_at(tick)
+        action_buffer = OrderedDict()
+        for agent_id, agent_obj in self.__agents_to_check():
+            if not agent_obj._check_agent_busy(curr_tick=tick):
+                # An agent of which no decision was recorded idles, as it would in a fork
+                action_class_name, action_kwargs, changed_properties = decisions.get(agent_id, (None, {}, {}))
+                for prop, value in changed_properties.items():
+                    agent_obj.change_property(prop, copy.deepcopy(value))
+
+                # The log may be replayed again, so the agent gets its own copy of the arguments
+                self.__set_agent_busy(action_name=action_class_name, action_kwargs=copy.deepcopy(action_kwargs),
+                                      agent_id=agent_id)
+
+                if agent_id in messages:
+                    self.message_manager.preprocess_messages(tick, messages[agent_id],
+                                                             self.__registered_agents.keys(), self.__teams)
+                    self.__emit_messages_sent(messages[agent_id])
+
+            if agent_obj._at_last_action_duration_tick(curr_tick=tick):
+                action_buffer[agent_id] = agent_obj._get_duration_action()
+            self.__schedule_agent(agent_id, agent_obj._next_tick_to_check(tick))
+
+        self.__perform_actions(action_buffer)
+        self.__update_objects()
+
+        self.__current_nr_ticks += 1
+
+    def __is_source(self, obj):
+        """ Whether an object is one of the world this is a fork of, which was not yet copied into this fork. """
+        source = self.__fork_sources.get(id(obj))
+        return source is not None and source[0] is obj
+
+    def __copy_source(self, source):
+        """ Returns the copy in this fork of an object of the world it forked, which is made when first needed. """
+        obj = self.__forked_objects.get(id(source))
+        if obj is None:
+            state = self.__fork_sources[id(source)][2]
+            obj = type(source)._from_state(state, location_callback=self.__on_location_change,
+                                           property_callback=self.__on_property_change, store=self.__object_store,
+                                           copy_of=self.__copy_source)
+            self.__forked_objects[id(source)] = obj
+
+            # Replace the object by its copy everywhere, so no dictionary refers to both
+            for forked_dict in self.__forked_dicts:
+                if dict.get(forked_dict, obj.obj_id) is source:
+                    dict.__setitem__(forked_dict, obj.obj_id, obj)
+        return obj
+
+    def __copy_all_sources(self):
+        """ Copies all objects and agents of the world this is a fork of into this fork, the objects they carry are
+        copied along with them. """
+        for objects in (self.__environment_objects, self.__registered_agents, self.__updated_objects):
+            objects.copy_all()
+
+    def __snapshot_objects(self):
+        """ Returns the (object, state version, state) of all objects and agent bodies in this world, with the id of the
+        object as key. The states of the objects that did not change since the previous call are reused, in a fork so
+        are those of the objects that were not yet copied from the world it forked. """
+        # When the same objects have the same state versions as in the previous call, nothing changed since
+        all_objects = self.__all_objects()
+        state_versions = list(map(_state_version_of, all_objects))
+        if self.__object_states_key is not None and self.__object_states_key[0] == all_objects and \
+                self.__object_states_key[1] == state_versions:
+            return self.__object_states
+
+        previous_states = self.__object_states
+        fork_sources = self.__fork_sources
+        object_states = {}
+        for obj, state_version in zip(all_objects, state_versions):
+            obj_key = id(obj)
+            object_state = previous_states.get(obj_key)
+            if object_state is None or object_state[0] is not obj or object_state[1] != state_version:
+                # An object of the world this is a fork of keeps the state it had when forked
+                object_state = fork_sources.get(obj_key)
+                if object_state is None or object_state[0] is not obj:
+                    object_state = (obj, state_version, obj._snapshot_state())
+            object_states[obj_key] = object_state
+        self.__object_states = object_states
+        self.__object_states_key = (all_objects, state_versions)
+        return object_states
+
+    def __all_objects(self):
+        """ Returns all objects and agent bodies in this world, including the objects that are being carried (as those
+        are no longer registered). In a fork, this includes the objects of the world it forked that were not yet copied.
+        """
+        # Obtain the values without copying them into a fork
+        all_objects = list(dict.values(self.__environment_objects)) + \
+            list(dict.values(self.__registered_agents))
+        carriers = list(dict.values(self.__registered_agents))
+        while len(carriers) > 0:
+            carrier = carriers.pop()
+            # An agent of the world this is a fork of may have changed since, the state of its fork is what counts
+            if self.__is_source(carrier):
+                carried_objs = self.__fork_sources[id(carrier)][2]["is_carrying"]
+            else:
+                carried_objs = carrier.is_carrying
+            for carried_obj in carried_objs:
+                all_objects.append(carried_obj)
+                if isinstance(carried_obj, AgentBody):
+                    carriers.append(carried_obj)
+        return all_objects
 
     def get_env_object(self, requested_id, obj_type=None):
         obj = None
@@ -173,29 +791,8 @@ class GridWorld:
         Get all objects of a obj type (normal objects or agent) within a
         certain range around the agent's location
         """
-
-        env_objs = OrderedDict()
-        # loop through all environment objects
-        for obj_id, env_obj in self.__environment_objects.items():
-            # get the distance from the agent location to the object
-            coordinates = env_obj.location
-            distance = get_distance(coordinates, agent_loc)
-
-            # check if the env object is of the specified type, and within range
-            if (object_type is None or object_type == "*" or isinstance(env_obj, object_type)) and \
-                    distance <= sense_range:
-                env_objs[obj_id] = env_obj
-
-        # agents are also environment objects, but stored separably. Also check them.
-        for agent_id, agent_obj in self.__registered_agents.items():
-            coordinates = agent_obj.location
-            distance = get_distance(coordinates, agent_loc)
-
-            # check if the env object is of the specified type, adn within range
-            if (object_type is None or object_type == "*" or isinstance(agent_obj, object_type)) and \
-                    distance <= sense_range:
-                env_objs[agent_id] = agent_obj
-        return env_objs
+        # The spatial index only visits the cells covered by the range, and returns the objects followed by the agents
+        return self.__spatial_index.query(agent_loc, sense_range, object_type)
 
     def remove_from_grid(self, object_id, remove_from_carrier=True):
         """
@@ -206,11 +803,16 @@ class GridWorld:
         """
         # Remove object first from grid
         grid_obj = self.get_env_object(object_id)  # get the object
-        loc = grid_obj.location  # its location
+        self.__remove_from_cell(grid_obj.obj_id)
 
-        self.__grid[loc[1], loc[0]].remove(grid_obj.obj_id)  # remove the object id from the list at that location
-        if len(self.__grid[loc[1], loc[0]]) == 0:  # if the list is empty, just add None there
-            self.__grid[loc[1], loc[0]] = None
+        # Stop tracking its location changes, it is no longer part of the grid (e.g. when it is being carried)
+        self.__registry_version = next(self.__registry_versions)
+        self.__spatial_index.remove(object_id)
+        self.__properties_snapshot.pop(object_id, None)
+        grid_obj._location_callback = None
+        grid_obj._property_callback = None
+        if self.__object_store is not None and object_id in self.__object_store:
+            self.__object_store.remove(grid_obj)
 
         # Remove object from the list of registered agents or environmental objects
         # Check if it is an agent
@@ -222,6 +824,9 @@ class GridWorld:
             # Remove agent
             success = self.__registered_agents.pop(object_id,
                                                  default=False)  # if it exists, we get it otherwise False
+            self.__agent_wake_ticks.pop(object_id, None)
+            self.__last_agent_states.pop(object_id, None)
+            self.__remove_from_team(object_id)
 
         # Else, check if it is an object
         elif object_id in self.__environment_objects.keys():
@@ -235,11 +840,14 @@ class GridWorld:
             # Remove object
             success = self.__environment_objects.pop(object_id,
                                                    default=False)  # if it exists, we get it otherwise False
+            self.__updated_objects.pop(object_id, None)
         else:
             success = False  # Object type not specified
 
         if success is not False:  # if succes is not false, we successfully removed the object from the grid
             success = True
+            if self.__event_bus.has_subscribers(ObjectRemoved):
+                self.__event_bus.emit(ObjectRemoved(self.__current_nr_ticks, object_id))
 
         if self.__verbose:
             if success:
@@ -250,18 +858,76 @@ class GridWorld:
         return success
 
     def add_to_grid(self, grid_obj):
-        if isinstance(grid_obj, EnvObject):
-            loc = grid_obj.location
-            if self.__grid[loc[1], loc[0]] is not None:
-                self.__grid[loc[1], loc[0]].append(grid_obj.obj_id)
-            else:
-                self.__grid[loc[1], loc[0]] = [grid_obj.obj_id]
-        else:
-            loc = grid_obj.location
-            if self.__grid[loc[1], loc[0]] is not None:
-                self.__grid[loc[1], loc[0]].append(grid_obj.obj_id)
-            else:
-                self.__grid[loc[1], loc[0]] = [grid_obj.obj_id]
+        """
+        Add an object or agent to the list of object ids at its current location in the grid. The ids in a location are
+        ordered as they would be after a full rebuild of the grid; objects first, then agents, in order of registration.
+        :param grid_obj: The object or agent to add.
+        """
+        loc = grid_obj.location
+        self.__grid_locations[grid_obj.obj_id] = loc
+
+        # The list of ids at a location is replaced instead of altered, as forks of this world share the lists
+        obj_ids = self.__grid[loc[1], loc[0]]
+        if obj_ids is None:
+            self.__grid[loc[1], loc[0]] = [grid_obj.obj_id]
+            return
+
+        # Find the position of the object id among the others at this location
+        idx = len(obj_ids)
+        sort_key = self.__spatial_index.sort_key(grid_obj.obj_id)
+        if sort_key is not None:
+            for other_idx, other_id in enumerate(obj_ids):
+                other_key = self.__spatial_index.sort_key(other_id)
+                if other_key is not None and sort_key < other_key:
+                    idx = other_idx
+                    break
+        self.__grid[loc[1], loc[0]] = obj_ids[:idx] + [grid_obj.obj_id] + obj_ids[idx:]
+
+    def __remove_from_cell(self, obj_id):
+        """ Removes an object id from the grid location it is stored at, if it is in the grid at all. """
+        loc = self.__grid_locations.pop(obj_id, None)
+        if loc is None:
+            return
+
+        # Replace the list at that location with one without the object id, as forks of this world share the lists
+        obj_ids = list(self.__grid[loc[1], loc[0]])
+        obj_ids.remove(obj_id)
+        self.__grid[loc[1], loc[0]] = obj_ids if len(obj_ids) > 0 else None  # if the list is empty, just add None there
+
+    def __add_to_world(self, grid_obj, is_agent):
+        """ Adds a newly registered object or agent to the spatial index and grid, and tracks its location changes. """
+        self.__registry_version = next(self.__registry_versions)
+        if self.__object_store is not None:
+            self.__object_store.add(grid_obj)
+        self.__spatial_index.add(grid_obj, is_agent=is_agent)
+        self.add_to_grid(grid_obj)
+        grid_obj._location_callback = self.__on_location_change
+        grid_obj._property_callback = self.__on_property_change
+        if self.__event_bus.has_subscribers(ObjectAdded):
+            self.__event_bus.emit(ObjectAdded(self.__current_nr_ticks, grid_obj.obj_id))
+
+    def __on_location_change(self, grid_obj):
+        """ Called by an object or agent in this world whenever its location changes, only touches the affected cells.
+        """
+        self.__spatial_index.update(grid_obj)
+
+        old_loc = self.__grid_locations.get(grid_obj.obj_id)
+        if old_loc is not None and tuple(old_loc) != grid_obj.location:
+            self.__remove_from_cell(grid_obj.obj_id)
+            self.add_to_grid(grid_obj)
+            if self.__event_bus.has_subscribers(ObjectMoved):
+                self.__event_bus.emit(ObjectMoved(self.__current_nr_ticks, grid_obj.obj_id, tuple(old_loc),
+                                                  grid_obj.location))
+
+    def __on_property_change(self, grid_obj, property_name, value):
+        """ Called by an object or agent in this world whenever one of its properties is changed through
+        change_property. """
+        if property_name == "team" and grid_obj.obj_id in self.__agent_teams:
+            self.__remove_from_team(grid_obj.obj_id)
+            self.__add_to_team(grid_obj.obj_id, value)
+
+        if self.__event_bus.has_subscribers(PropertyChanged):
+            self.__event_bus.emit(PropertyChanged(self.__current_nr_ticks, grid_obj.obj_id, property_name, value))
 
     def _register_agent(self, agent, agent_avatar: AgentBody):
         """ Register human agents and agents to the gridworld environment """
@@ -272,8 +938,12 @@ class GridWorld:
         # check if the agent can be succesfully placed at that location
         self.__validate_obj_placement(agent_avatar)
 
-        # Add agent to registered agents
+        # Add agent to registered agents, and check it this tick
         self.__registered_agents[agent_avatar.obj_id] = agent_avatar
+        self.__add_to_world(agent_avatar, is_agent=True)
+        self.__agent_registration_nrs[agent_avatar.obj_id] = len(self.__agent_registration_nrs)
+        self.__schedule_agent(agent_avatar.obj_id, self.__current_nr_ticks)
+        self.__add_to_team(agent_avatar.obj_id, agent_avatar.team)
 
         if self.__verbose:
             print(f"@{os.path.basename(__file__)}: Created agent with id {agent_avatar.obj_id}.")
@@ -289,7 +959,8 @@ class GridWorld:
                                       agent_properties=avatar_props,
                                       customizable_properties=agent_avatar.customizable_properties,
                                       callback_is_action_possible=self.__check_action_is_possible,
-                                      rnd_seed=agent_seed)
+                                      rnd_seed=agent_seed,
+                                      callback_fork_world=self.fork)
         else:  # if the agent is a human agent, we also assign its user input action map
             agent._factory_initialise(agent_name=agent_avatar.obj_name,
                                       agent_id=agent_avatar.obj_id,
@@ -311,6 +982,11 @@ class GridWorld:
 
         # Assign id to environment sparse dictionary grid
         self.__environment_objects[env_object.obj_id] = env_object
+        self.__add_to_world(env_object, is_agent=False)
+
+        # Only objects that do something when updated are updated each tick
+        if env_object._has_update():
+            self.__updated_objects[env_object.obj_id] = env_object
 
         if self.__verbose:
             print(f"@{__file__}: Created an environment object with id {env_object.obj_id}.")
@@ -322,22 +998,47 @@ class GridWorld:
         An agent is always in a team, if not set by the user, a team is created with name 'agent_id' with only that
         agent in it.
         """
-        # loop through all agents
+        # The teams are kept up to date whenever agents are added, removed or change team, here they are rebuilt from
+        # scratch (in place, as the API and message manager refer to them)
+        self.__teams.clear()
+        self.__agent_teams.clear()
+        self.__team_members.clear()
         for agent_id, agent_body in self.registered_agents.items():
-            # find their team name
-            team = agent_body.properties['team']
-
-            # register the team (if not already done) and the agent in it
-            if team not in self.__teams:
-                self.__teams[team] = []
-            self.__teams[team].append(agent_id)
-
+            self.__add_to_team(agent_id, agent_body.team)
+
+    def __add_to_team(self, agent_id, team):
+        """ Adds an agent to the members of a team, which are kept in order of registration. """
+        members = self.__teams.setdefault(team, [])
+        members.append(agent_id)
+        if len(members) > 1 and self.__agent_registration_nrs[members[-2]] > self.__agent_registration_nrs[agent_id]:
+            members.sort(key=self.__agent_registration_nrs.get)
+        self.__agent_teams[agent_id] = team
+        self.__team_members.pop(team, None)
+
+    def __remove_from_team(self, agent_id):
+        """ Removes an agent from the members of its team, a team without members no longer exists. """
+        team = self.__agent_teams.pop(agent_id, None)
+        if team is None:
+            return
+        members = self.__teams[team]
+        members.remove(agent_id)
+        if len(members) == 0:
+            del self.__teams[team]
+        self.__team_members.pop(team, None)
+
+    def __subscribe_goals(self):
+        """ Lets the simulation goals subscribe to the events of this world. """
+        goals = self.__simulation_goal if isinstance(self.__simulation_goal, list) else [self.__simulation_goal]
+        for goal in goals:
+            if goal is not None:
+                goal.subscribe_to_events(self.__event_bus)
 
     def _register_logger(self, logger: GridWorldLogger):
         if self.__loggers is None:
             self.__loggers = [logger]
         else:
             self.__loggers.append(logger)
+        logger.subscribe_to_events(self.__event_bus)
 
     def __validate_obj_placement(self, env_object):
         """
@@ -366,23 +1067,41 @@ class GridWorld:
 
     def __step(self):
 
-        # Set tick start of current tick
-        start_time_current_tick = datetime.datetime.now()
+        # Set tick start of current tick, when running headless we do not time ticks
+        if not self.__headless:
+            self.__tick_clock.start_tick()
+
+        # When profiling, the time spent in each phase is recorded at the end of that phase
+        profiler = self.__tick_profiler
+        if profiler is not None:
+            profiler.start_tick()
+
+        # The generic world properties are rebuilt once for this tick, when first needed
+        self.__world_info = None
 
         # Check if we are done based on our global goal assessment function
         self.__is_done, goal_status = self.__check_simulation_goal()
+        if profiler is not None:
+            profiler.lap("goals")
 
-        # Log the data if we have any loggers
-        for logger in self.__loggers:
+        # Log the data if we have any loggers, the log data of the agents is collected once and shared by all loggers
+        if len(self.__loggers) > 0:
             agent_data_dict = {}
             for agent_id, agent_body in self.__registered_agents.items():
                 agent_data_dict[agent_id] = agent_body.get_log_data()
 
-            logger._grid_world_log(grid_world=self, agent_data=agent_data_dict,
-                                   last_tick=self.__is_done, goal_status=goal_status)
+            for logger in self.__loggers:
+                logger._grid_world_log(grid_world=self, agent_data=agent_data_dict,
+                                       last_tick=self.__is_done, goal_status=goal_status)
+
+            if profiler is not None:
+                profiler.lap("loggers")
 
         # If this grid_world is done, we return immediately
         if self.__is_done:
+            if self.__decision_pool is not None:
+                self.__decision_pool.shutdown()
+                self.__decision_pool = None
             return self.__is_done, 0.
 
         # initialize a temporary dictionary in which all states of this tick
@@ -396,102 +1115,54 @@ class GridWorld:
                 api.MATRX_info = {}
                 api.next_tick_info = {}
 
-        # Go over all agents, detect what each can detect, figure out what actions are possible and send these to
-        # that agent. Then receive the action back and store the action in a buffer.
+        # Go over all agents that need to be checked this tick, detect what each can detect, figure out what actions
+        # are possible and send these to that agent. Then receive the action back and store the action in a buffer.
         # Also, update the local copy of the agent properties, and save the agent's state for the GUI.
         # Then go to the next agent.
         # This blocks until a response from the agent is received (hence a tick can take longer than self.tick_
         # duration!!)
         action_buffer = OrderedDict()
-        for agent_id, agent_obj in self.__registered_agents.items():
-
-            state = self.__get_agent_state(agent_obj)
-
-            # check if this agent is busy performing an action , if so then also check if it as its last tick of waiting
-            # because then we want to do that action. If not busy, call its get_action function.
-            if agent_obj._check_agent_busy(curr_tick=self.__current_nr_ticks):
+        if self.__max_decision_workers is None:
+            for agent_id, agent_obj in self.__agents_to_check():
 
-                # only do the filter observation method to be able to update the agent's state to the API
-                filtered_agent_state = agent_obj.filter_observations(state)
+                # Busy agents only perceive when their state is requested through the API
+                state = self.__get_agent_state(agent_obj) if self.__needs_state(agent_id, agent_obj) else None
+                if profiler is not None:
+                    profiler.lap("perception")
 
-                # save the current agent's state for the API
-                if self.__run_matrx_api:
-                    api.add_state(agent_id=agent_id, state=filtered_agent_state,
-                                  agent_inheritence_chain=agent_obj.class_inheritance,
-                                  world_settings=self.__get_complete_state()['World'])
+                # check if this agent is busy performing an action , if so then also check if it as its last tick of
+                # waiting because then we want to do that action. If not busy, call its get_action function.
+                if agent_obj._check_agent_busy(curr_tick=self.__current_nr_ticks):
 
-            else:  # agent is not busy
-
-                # Any received data from the API for this HumanAgent is send along to the get_action function
-                if agent_obj.is_human_agent:
-                    usrinp = None
-                    if self.__run_matrx_api and agent_id in api.userinput:
-                        usrinp = api.pop_userinput(agent_id)
+                    # only do the filter observation method to be able to update the agent's state to the API
+                    filtered_agent_state = agent_obj.filter_observations(state) if state is not None else None
+                    if profiler is not None:
+                        profiler.lap("brains")
 
+                else:  # agent is not busy
+                    usrinp = self.__pop_userinput(agent_id, agent_obj)
                     filtered_agent_state, agent_properties, action_class_name, action_kwargs = \
-                        agent_obj.get_action_func(state=state, agent_properties=agent_obj.properties, agent_id=agent_id,
-                                                  userinput=usrinp)
-                else:  # not a HumanAgent
-
-                    # perform the agent's get_action method (goes through filter_observations and decide_on_action)
-                    filtered_agent_state, agent_properties, action_class_name, action_kwargs = agent_obj.get_action_func(
-                        state=state, agent_properties=agent_obj.properties, agent_id=agent_id)
-
-                # the Agent (in the OODA loop) might have updated its properties, process these changes in the Avatar
-                # Agent
-                agent_obj._set_agent_changed_properties(agent_properties)
-
-                # Set the agent to busy, we do this only here and not when the agent was already busy to prevent the
-                # agent to perform an action with a duration indefinitely (and since all actions have a duration, that
-                # would be killing...)
-                self.__set_agent_busy(action_name=action_class_name, action_kwargs=action_kwargs, agent_id=agent_id)
-
-                # Get all agents we have, as we need these to process all messages that are send to all agents
-                all_agent_ids = self.__registered_agents.keys()
-
-                # Obtain all communication messages if the agent has something to say to others (only comes here when
-                # the agent is NOT busy)
-                agent_messages = agent_obj.get_messages_func(all_agent_ids)
-
-                # add any messages received from the API sent by this agent
-                if self.__run_matrx_api:
-                    if agent_id in api.received_messages:
-                        agent_messages += copy.copy(api.received_messages[agent_id])
-
-                        # clear the messages for the next tick
-                        del api.received_messages[agent_id]
-
-                # preprocess all messages of the current tick of this agent
-                self.message_manager.preprocess_messages(self.__current_nr_ticks, agent_messages,
-                                                         all_agent_ids, self.__teams)
-
-            # save the current agent's state for the API
-            if self.__run_matrx_api:
-                api.add_state(agent_id=agent_id, state=filtered_agent_state,
-                              agent_inheritence_chain=agent_obj.class_inheritance,
-                              world_settings=self.__get_complete_state()['World'])
+                        self.__decide_on_action(agent_id, agent_obj, state, agent_obj.properties, usrinp)
+                    if profiler is not None:
+                        profiler.lap("brains")
+                    self.__process_decision(agent_id, agent_obj, agent_properties, action_class_name, action_kwargs)
 
-            # if this agent is at its last tick of waiting on its action duration, we want to actually perform the
-            # action
-            if agent_obj._at_last_action_duration_tick(curr_tick=self.__current_nr_ticks):
-                # Get the action and arguments
-                action_class_name, action_kwargs = agent_obj._get_duration_action()
-                # store the action in the buffer
-                action_buffer[agent_id] = (action_class_name, action_kwargs)
+                self.__finish_agent_tick(agent_id, agent_obj, filtered_agent_state, action_buffer)
+        else:
+            self.__step_agents_in_parallel(action_buffer)
 
         # put all messages of the current tick in the message buffer
         if self.__current_nr_ticks in self.message_manager.preprocessed_messages:
-            for mssg in self.message_manager.preprocessed_messages[self.__current_nr_ticks]:
-                if mssg.to_id not in self.__message_buffer.keys():  # first message for this receiver
-                    self.__message_buffer[mssg.to_id] = [mssg]
-                else:
-                    self.__message_buffer[mssg.to_id].append(mssg)
+            self.__message_buffer.extend(self.message_manager.preprocessed_messages[self.__current_nr_ticks])
 
+        if profiler is not None:
+            profiler.lap("messages")
 
-        # save the god view state
+        # save the god view state, which is built only once per tick
         if self.__run_matrx_api:
-            api.add_state(agent_id="god", state=self.__get_complete_state(), agent_inheritence_chain="god",
-                          world_settings=self.__get_complete_state()['World'])
+            god_state = self.__get_complete_state()
+            api.add_state(agent_id="god", state=god_state, agent_inheritence_chain="god",
+                          world_settings=god_state['World'])
 
             # make the information of this tick available via the API, after all
             # agents have been updated
@@ -500,57 +1171,263 @@ class GridWorld:
             self.__tick_duration = api.tick_duration
             api.grid_size = self.shape
 
+            if profiler is not None:
+                profiler.lap("api")
+
         # Perform the actions in the order of the action_buffer (which is filled in order of registered agents
-        for agent_id, action in action_buffer.items():
-            # Get the action class name
-            action_class_name = action[0]
-            # Get optional kwargs
-            action_kwargs = action[1]
+        self.__perform_actions(action_buffer)
 
-            if action_kwargs is None:  # If kwargs is none, make an empty dict out of it
-                action_kwargs = {}
+        if profiler is not None:
+            profiler.lap("actions")
 
-            # Actually perform the action (if possible), also sets the result in the agent's brain
-            self.__perform_action(agent_id, action_class_name, action_kwargs)
+        # Send all messages between agents. Every agent gets the same deliveries by reference, and only reads those
+        # addressed to it once it reads its received messages.
+        if len(self.__message_buffer) > 0:
+            messages = tuple(self.__message_buffer)
+            for agent_body in self.__registered_agents.values():
+                # Call the callback method that sets the messages
+                agent_body.set_messages_func(messages)
 
-            # Update the grid
-            self.__update_grid()
+        self.__message_buffer = []
 
-        # Send all messages between agents
-        for receiver_id, messages in self.__message_buffer.items():
-            # check if the receiver exists
-            if receiver_id in self.__registered_agents.keys():
-                # Call the callback method that sets the messages
-                self.__registered_agents[receiver_id].set_messages_func(messages)
+        if profiler is not None:
+            profiler.lap("messages")
 
-        self.__message_buffer = {}
+        # Perform the update method of all objects that override it, unless they are asleep or updated less often
+        self.__update_objects()
 
-        # Perform the update method of all objects
-        for env_obj in self.__environment_objects.values():
-            env_obj.update(self)
+        if profiler is not None:
+            profiler.lap("objects")
 
         # Increment the number of tick we performed
         self.__current_nr_ticks += 1
+        if self.__action_log is not None:
+            self.__action_log.record_end_of_tick(self.__current_nr_ticks)
+
+        # When running headless we do not time, sleep or print and immediately continue with the next tick
+        if self.__headless:
+            if profiler is not None:
+                profiler.end_tick(self.__current_nr_ticks - 1)
+            return self.__is_done, 0.
 
-        # Check how much time the tick lasted already
-        tick_end_time = datetime.datetime.now()
-        tick_duration = tick_end_time - start_time_current_tick
-        self.sleep_duration = self.__tick_duration - tick_duration.total_seconds()
+        # Check how much time is left until the deadline of this tick
+        self.sleep_duration = self.__tick_clock.time_until_deadline()
 
-        # Sleep for the remaining time of self.__tick_duration
+        # Sleep until the deadline of this tick
         self.__sleep()
 
+        if profiler is not None:
+            profiler.lap("sleep")
+            profiler.end_tick(self.__current_nr_ticks - 1)
+
         # Compute the total time of our tick (including potential sleep)
-        tick_end_time = datetime.datetime.now()
-        tick_duration = tick_end_time - start_time_current_tick
-        self.__curr_tick_duration = tick_duration.total_seconds()
+        self.__curr_tick_duration = self.__tick_clock.tick_duration_so_far()
 
         if self.__verbose:
             print(
-                f"@{os.path.basename(__file__)}: Tick {self.__current_nr_ticks} took {tick_duration.total_seconds()} seconds.")
+                f"@{os.path.basename(__file__)}: Tick {self.__current_nr_ticks} took {self.__curr_tick_duration} seconds.")
 
         return self.__is_done, self.__curr_tick_duration
 
+    def __step_agents_in_parallel(self, action_buffer):
+        """ Lets all agents that are not busy decide on their action concurrently.
+
+        First the state of every agent is perceived, in order of registration and before any agent decided. Then all
+        agents that are not busy decide on their action in the decision pool. As nothing in the world changes while
+        they do so, each agent decides on the same snapshot of the world regardless of the number of workers. Finally
+        the decisions are processed in order of registration, the same order as when agents decide one after the
+        other.
+        """
+        agents_to_check = self.__agents_to_check()
+        decisions = OrderedDict()  # agent id -> future of its decision
+        filtered_agent_states = {}  # agent id -> filtered state of a busy agent
+        profiler = self.__tick_profiler
+        for agent_id, agent_obj in agents_to_check:
+            state = self.__get_agent_state(agent_obj) if self.__needs_state(agent_id, agent_obj) else None
+            if profiler is not None:
+                profiler.lap("perception")
+
+            if agent_obj._check_agent_busy(curr_tick=self.__current_nr_ticks):
+                filtered_agent_states[agent_id] = agent_obj.filter_observations(state) if state is not None else None
+                if profiler is not None:
+                    profiler.lap("brains")
+            else:
+                usrinp = self.__pop_userinput(agent_id, agent_obj)
+                decisions[agent_id] = self.__decision_pool.submit(self.__decide_on_action, agent_id, agent_obj, state,
+                                                                  agent_obj.properties, usrinp)
+
+        for agent_id, agent_obj in agents_to_check:
+            if agent_id in decisions:
+                # Wait for the decision of this agent, this also raises any exception the agent's brain raised
+                filtered_agent_state, agent_properties, action_class_name, action_kwargs = decisions[agent_id].result()
+                if profiler is not None:
+                    profiler.lap("brains")
+                self.__process_decision(agent_id, agent_obj, agent_properties, action_class_name, action_kwargs)
+            else:
+                filtered_agent_state = filtered_agent_states[agent_id]
+
+            self.__finish_agent_tick(agent_id, agent_obj, filtered_agent_state, action_buffer)
+
+    def __agents_to_check(self):
+        """ Pops all agents that need to be checked this tick from the wake queue. Agents that are busy with an action
+        only need to be checked on the tick after their decision, on the last tick of the action and on the tick after
+        that (when they decide again), see AgentBody._next_tick_to_check. When the API runs all agents are checked, as
+        the API needs a state of every agent each tick.
+        :return: A list of (agent id, agent body) tuples, in order of registration.
+        """
+        due_agents = []
+        while len(self.__wake_queue) > 0 and self.__wake_queue[0][0] <= self.__current_nr_ticks:
+            tick, _, agent_id = heapq.heappop(self.__wake_queue)
+            # Skip entries of removed agents, or entries that were replaced by one at another tick
+            if self.__agent_wake_ticks.get(agent_id) == tick and agent_id in self.__registered_agents:
+                del self.__agent_wake_ticks[agent_id]
+                due_agents.append((agent_id, self.__registered_agents[agent_id]))
+
+        if self.__run_matrx_api:
+            return list(self.__registered_agents.items())
+
+        due_agents.sort(key=lambda agent: self.__agent_registration_nrs[agent[0]])
+        return due_agents
+
+    def __schedule_agent(self, agent_id, tick):
+        """ Puts an agent in the wake queue at the given tick, unless it is already in there at that tick. """
+        if self.__agent_wake_ticks.get(agent_id) != tick:
+            self.__agent_wake_ticks[agent_id] = tick
+            heapq.heappush(self.__wake_queue, (tick, self.__agent_registration_nrs[agent_id], agent_id))
+
+    def __needs_state(self, agent_id, agent_obj):
+        """ Whether an agent needs to perceive its state this tick; when it decides on an action, or when it is busy
+        but an API consumer requested its state. """
+        if not agent_obj._is_busy(self.__current_nr_ticks):
+            return True
+        return self.__run_matrx_api and api.is_state_requested(agent_id)
+
+    def __pop_userinput(self, agent_id, agent_obj):
+        """ Returns any received data from the API for a HumanAgent, which is send along to its get_action function.
+        """
+        if agent_obj.is_human_agent and self.__run_matrx_api and agent_id in api.userinput:
+            usrinp = api.pop_userinput(agent_id)
+            if self.__action_log is not None:
+                self.__action_log.record_userinput(self.__current_nr_ticks, agent_id, usrinp)
+            return usrinp
+        return None
+
+    @staticmethod
+    def __decide_on_action(agent_id, agent_obj, state, agent_properties, usrinp):
+        """ Calls the agent's get_action method (goes through filter_observations and decide_on_action). Only touches
+        the agent's own brain, so it can be called for multiple agents concurrently. """
+        if agent_obj.is_human_agent:
+            return agent_obj.get_action_func(state=state, agent_properties=agent_properties, agent_id=agent_id,
+                                             userinput=usrinp)
+        else:  # not a HumanAgent
+            return agent_obj.get_action_func(state=state, agent_properties=agent_properties, agent_id=agent_id)
+
+    def __process_decision(self, agent_id, agent_obj, agent_properties, action_class_name, action_kwargs):
+        # the Agent (in the OODA loop) might have updated its properties, process these changes in the Avatar
+        # Agent
+        changed_properties = agent_obj._set_agent_changed_properties(agent_properties)
+        if self.__action_log is not None:
+            self.__action_log.record_decision(self.__current_nr_ticks, agent_id, action_class_name, action_kwargs,
+                                              changed_properties)
+
+        # Set the agent to busy, we do this only here and not when the agent was already busy to prevent the
+        # agent to perform an action with a duration indefinitely (and since all actions have a duration, that
+        # would be killing...)
+        self.__set_agent_busy(action_name=action_class_name, action_kwargs=action_kwargs, agent_id=agent_id)
+
+        if self.__tick_profiler is not None:
+            self.__tick_profiler.lap("brains")
+
+        # Get all agents we have, as we need these to process all messages that are send to all agents
+        all_agent_ids = self.__registered_agents.keys()
+
+        # Obtain all communication messages if the agent has something to say to others (only comes here when
+        # the agent is NOT busy)
+        agent_messages = agent_obj.get_messages_func(all_agent_ids)
+
+        # add any messages received from the API sent by this agent
+        if self.__run_matrx_api:
+            if agent_id in api.received_messages:
+                agent_messages += copy.copy(api.received_messages[agent_id])
+
+                # clear the messages for the next tick
+                del api.received_messages[agent_id]
+
+        # preprocess all messages of the current tick of this agent
+        self.message_manager.preprocess_messages(self.__current_nr_ticks, agent_messages,
+                                                 all_agent_ids, self.__teams)
+        self.__emit_messages_sent(agent_messages)
+        if self.__action_log is not None:
+            self.__action_log.record_messages(self.__current_nr_ticks, agent_id, agent_messages)
+
+        if self.__tick_profiler is not None:
+            self.__tick_profiler.lap("messages")
+
+    def __emit_messages_sent(self, messages):
+        if self.__event_bus.has_subscribers(MessageSent):
+            for mssg in messages:
+                self.__event_bus.emit(MessageSent(self.__current_nr_ticks, mssg))
+
+    def __finish_agent_tick(self, agent_id, agent_obj, filtered_agent_state, action_buffer):
+        # save the current agent's state for the API, a busy agent that did not perceive publishes its last state again
+        if self.__run_matrx_api:
+            if filtered_agent_state is None:
+                filtered_agent_state = self.__last_agent_states[agent_id]
+                if "World" in filtered_agent_state:
+                    filtered_agent_state = {**filtered_agent_state, "World": self.__get_agent_world_info(agent_obj)}
+            self.__last_agent_states[agent_id] = filtered_agent_state
+
+            api.add_state(agent_id=agent_id, state=filtered_agent_state,
+                          agent_inheritence_chain=agent_obj.class_inheritance,
+                          world_settings=self.__get_world_info())
+
+            if self.__tick_profiler is not None:
+                self.__tick_profiler.lap("api")
+
+        # if this agent is at its last tick of waiting on its action duration, we want to actually perform the
+        # action
+        if agent_obj._at_last_action_duration_tick(curr_tick=self.__current_nr_ticks):
+            # Get the action and arguments
+            action_class_name, action_kwargs = agent_obj._get_duration_action()
+            # store the action in the buffer
+            action_buffer[agent_id] = (action_class_name, action_kwargs)
+
+        # check this agent again once something about it changes
+        self.__schedule_agent(agent_id, agent_obj._next_tick_to_check(self.__current_nr_ticks))
+
+    def __perform_actions(self, action_buffer):
+        """ Performs the buffered actions in order, and returns the ActionResult of each with agent ids as keys. """
+        action_results = OrderedDict()
+        for agent_id, action in action_buffer.items():
+            # Get the action class name
+            action_class_name = action[0]
+            # Get optional kwargs
+            action_kwargs = action[1]
+
+            if action_kwargs is None:  # If kwargs is none, make an empty dict out of it
+                action_kwargs = {}
+
+            # Actually perform the action (if possible), also sets the result in the agent's brain. The grid is kept
+            # up to date by the objects and agents themselves, whenever their location changes.
+            action_results[agent_id] = self.__perform_action(agent_id, action_class_name, action_kwargs)
+
+            # In debug mode, verify that the grid still equals a full rebuild
+            if self.__check_grid_consistency:
+                self.__check_grid(f"performing {action_class_name} by {agent_id}")
+        return action_results
+
+    def __update_objects(self):
+        """ Calls the update method of all objects that override it, unless they are asleep or updated less often. """
+        for obj_id, env_obj in list(self.__updated_objects.items()):
+            # Skip objects that were removed by the update of an earlier object
+            if obj_id in self.__updated_objects and \
+                    env_obj._next_update_tick(self.__current_nr_ticks) == self.__current_nr_ticks:
+                env_obj.update(self)
+                env_obj._set_updated(self.__current_nr_ticks)
+
+        if self.__check_grid_consistency:
+            self.__check_grid("updating all objects")
+
     def __check_simulation_goal(self):
 
         goal_status = {}
@@ -568,86 +1445,155 @@ class GridWorld:
 
     def __sleep(self):
         """
-        Sleeps the current python process for the amount of time that is left after self.curr_tick_duration up to
-        in self.__tick_duration
+        Sleeps the current python process until the deadline of the current tick, as set by the tick clock. When the
+        API pauses or stops MATRX in the meantime we wake up right away, when it changes the tick duration the deadline
+        moves along.
         :return:
         """
-        if self.sleep_duration > 0:
-            gevent.sleep(self.sleep_duration)
-        else:
-            self.__warn(
-                f"The average tick took longer than the set tick duration of {self.__tick_duration}. "
-                f"Program is to heavy to run real time")
+        if self.sleep_duration < 0 < self.__tick_duration and self.__verbose:
+            print(self.__warn(
+                f"The tick took {-self.sleep_duration} seconds longer than the set tick duration of "
+                f"{self.__tick_duration}. Program is to heavy to run real time"))
+
+        wake_event = api.matrx_control_event if self.__run_matrx_api else None
+        while True:
+            if wake_event is not None:
+                # Clear the event before checking the API, so no change made after the check gets lost
+                wake_event.clear()
+                if api.matrx_paused or api.matrx_done:
+                    return
+                self.__tick_duration = api.tick_duration
+                self.__tick_clock.tick_duration = self.__tick_duration
+
+            if self.__tick_clock.sleep_until_deadline(wake_event):
+                return
+
+    def __wait_while_paused(self):
+        """
+        Waits until the API starts or stops MATRX again, after which the tick clock starts a new schedule so the paused
+        time is not caught up on.
+        :return:
+        """
+        wake_event = api.matrx_control_event
+        while True:
+            # Clear the event before checking the API, so no change made after the check gets lost
+            wake_event.clear()
+            if not api.matrx_paused or api.matrx_done:
+                break
+            wake_event.wait()
+
+        self.__tick_clock.reset()
 
     def __update_grid(self):
-        self.__grid = np.array([[None for _ in range(self.__shape[0])] for _ in range(self.__shape[1])])
-        for obj_id, obj in self.__environment_objects.items():
-            self.add_to_grid(obj)
-        for agent_id, agent in self.__registered_agents.items():
-            self.add_to_grid(agent)
+        """ Rebuilds the entire grid from all objects and agents. """
+        self.__grid, self.__grid_locations = self.__build_grid()
+
+    def __build_grid(self):
+        grid = np.full((self.__shape[1], self.__shape[0]), None, dtype=object)
+        grid_locations = {}
+        for obj in list(self.__environment_objects.values()) + list(self.__registered_agents.values()):
+            loc = obj.location
+            grid_locations[obj.obj_id] = loc
+            if grid[loc[1], loc[0]] is not None:
+                grid[loc[1], loc[0]].append(obj.obj_id)
+            else:
+                grid[loc[1], loc[0]] = [obj.obj_id]
+        return grid, grid_locations
+
+    def __check_grid(self, after):
+        """ Verifies the incrementally maintained grid against a full rebuild, raises an exception on any difference.
+        :param after: A description of what was done last, used in the exception message.
+        """
+        full_grid, _ = self.__build_grid()
+        for y, x in np.ndindex(full_grid.shape):
+            if self.__grid[y, x] != full_grid[y, x]:
+                raise Exception(f"[@{self.__current_nr_ticks}] The grid is inconsistent after {after}; location "
+                                f"{(x, y)} contains {self.__grid[y, x]} but should contain {full_grid[y, x]}.")
 
     # get all objects and agents on the grid
     def __get_complete_state(self):
         """
-        Compile all objects and agents on the grid in one state dictionary
+        Compile all objects and agents on the grid in one read-only state dictionary
         :return: state with all objects and agents on the grid
         """
 
         # create a state with all objects and agents
         state = {}
         for obj_id, obj in self.__environment_objects.items():
-            state[obj.obj_id] = obj.properties
+            state[obj.obj_id] = self.__get_properties_snapshot(obj)
         for agent_id, agent in self.__registered_agents.items():
-            state[agent.obj_id] = agent.properties
+            state[agent.obj_id] = self.__get_properties_snapshot(agent)
 
         # Append generic properties (e.g. number of ticks, size of grid, etc.}
-        state["World"] = {
-            "nr_ticks": self.__current_nr_ticks,
-            "curr_tick_timestamp": int(round(time.time() * 1000)),
-            "grid_shape": self.__shape,
-            "tick_duration": self.tick_duration,
-            "world_ID": self.world_ID,
-            "vis_settings": {
-                "vis_bg_clr": self.__visualization_bg_clr,
-                "vis_bg_img": self.__visualization_bg_img
-            }
-        }
-
-        return state
+        state["World"] = self.__get_world_info()
+
+        return ReadOnlyDict(state)
+
+    def __get_properties_snapshot(self, obj):
+        """
+        The read-only properties of an object, shared by the states of all agents and the god view. They are only
+        rebuilt when the properties of the object changed since they were last obtained, so within a tick an agent
+        perceives the changes made by the agents before it, as before.
+        :param obj: The object or agent body.
+        :return: The properties of the object as a ReadOnlyDict.
+        """
+        version = obj.properties_version
+        snapshot = self.__properties_snapshot.get(obj.obj_id)
+        if snapshot is None or snapshot[0] != version:
+            snapshot = (version, freeze(obj.properties))
+            self.__properties_snapshot[obj.obj_id] = snapshot
+        return snapshot[1]
+
+    def __get_world_info(self):
+        """
+        The generic properties of this world (e.g. number of ticks, size of grid, etc.). These are the same for all
+        agents, the API and the god view, so they are built at most once per tick.
+        :return: A read-only dictionary with the generic properties of the current tick.
+        """
+        if self.__world_info is None or self.__world_info["nr_ticks"] != self.__current_nr_ticks:
+            self.__world_info = freeze({
+                "nr_ticks": self.__current_nr_ticks,
+                "curr_tick_timestamp": int(round(time.time() * 1000)),
+                "grid_shape": self.__shape,
+                "tick_duration": self.tick_duration,
+                "world_ID": self.world_ID,
+                "vis_settings": {
+                    "vis_bg_clr": self.__visualization_bg_clr,
+                    "vis_bg_img": self.__visualization_bg_img
+                }
+            })
+        return self.__world_info
 
     def __get_agent_state(self, agent_obj: AgentBody):
         agent_loc = agent_obj.location
         sense_capabilities = agent_obj.sense_capability.get_capabilities()
-        objs_in_range = OrderedDict()
 
-        # Check which objects can be sensed with the agents' capabilities, from
-        # its current position.
-        for obj_type, sense_range in sense_capabilities.items():
-            env_objs = self.get_objects_in_range(agent_loc, obj_type, sense_range)
-            objs_in_range.update(env_objs)
+        # Check which objects can be sensed with the agents' capabilities, from its current position. All object types
+        # are checked in a single search of the spatial index.
+        objs_in_range = self.__spatial_index.query_capabilities(agent_loc, sense_capabilities)
 
         state = {}
-        # Save all properties of the sensed objects in a state dictionary
+        # Save the (shared, read-only) properties of the sensed objects in a state dictionary
         for env_obj in objs_in_range:
-            state[env_obj] = objs_in_range[env_obj].properties
+            state[env_obj] = self.__get_properties_snapshot(objs_in_range[env_obj])
 
         # Append generic properties (e.g. number of ticks, fellow team members, etc.}
-        team_members = [agent_id for agent_id, other_agent in self.__registered_agents.items()
-                        if agent_obj.team == other_agent.team]
-        state["World"] = {
-            "nr_ticks": self.__current_nr_ticks,
-            "curr_tick_timestamp": int(round(time.time() * 1000)),
-            "grid_shape": self.__shape,
-            "tick_duration": self.tick_duration,
-            "team_members": team_members,
-            "world_ID": self.world_ID,
-            "vis_settings": {
-                "vis_bg_clr": self.__visualization_bg_clr,
-                "vis_bg_img": self.__visualization_bg_img
-            }
-        }
-
-        return state
+        state["World"] = self.__get_agent_world_info(agent_obj)
+
+        return ReadOnlyDict(state)
+
+    def __get_agent_world_info(self, agent_obj: AgentBody):
+        """
+        The generic properties of this world as perceived by an agent, which includes its fellow team members.
+        :param agent_obj: The body of the agent.
+        :return: A read-only dictionary with the generic properties of the current tick.
+        """
+        # All members of a team share the same read-only list, which is only rebuilt when the team changed
+        team_members = self.__team_members.get(agent_obj.team)
+        if team_members is None:
+            team_members = freeze(list(self.__teams.get(agent_obj.team, [])))
+            self.__team_members[agent_obj.team] = team_members
+        return ReadOnlyDict({**self.__get_world_info(), "team_members": team_members})
 
     def __check_action_is_possible(self, agent_id, action_name, action_kwargs):
         # If the action_name is None, the agent idles
@@ -664,16 +1610,15 @@ class GridWorld:
             result = ActionResult(ActionResult.NO_ACTION_GIVEN, succeeded=True)
 
         # action known, but agent not capable of performing it
-        elif action_name in self.__all_actions.keys() and \
+        elif action_name in action_registry and \
                 action_name not in self.__registered_agents[agent_id].action_set:
             result = ActionResult(ActionResult.AGENT_NOT_CAPABLE, succeeded=False)
 
         # Check if action is known
-        elif action_name in self.__all_actions.keys():
-            # Get action class
-            action_class = self.__all_actions[action_name]
-            # Make instance of action
-            action = action_class()
+        elif action_name in action_registry:
+            # Check if the action accepts the given arguments, and get its (reused) instance
+            action_registry.validate_kwargs(action_name, action_kwargs)
+            action = action_registry.get_instance(action_name)
             # Check if action is possible, if so we can perform the action otherwise we send an ActionResult that it was
             # not possible.
             result = action.is_possible(self, agent_id, **action_kwargs)
@@ -697,20 +1642,19 @@ class GridWorld:
             if action_name is None:
                 return result
 
-            # Get action class
-            action_class = self.__all_actions[action_name]
-            # Make instance of action
-            action = action_class()
+            # Get the (reused) instance of the action
+            action = action_registry.get_instance(action_name)
             # Apply world mutation
             result = action.mutate(self, agent_id, **action_kwargs)
 
-            # Get agent's send_result function
-            set_action_result = self.__registered_agents[agent_id].set_action_result_func
-            # Send result of mutation to agent
-            set_action_result(result)
+            # Get agent's send_result function, the agents in a fork or replay have no brain to send it to
+            if not self.__is_fork and not self.__replaying:
+                set_action_result = self.__registered_agents[agent_id].set_action_result_func
+                # Send result of mutation to agent
+                set_action_result(result)
 
-            # Update the grid
-            self.__update_agent_location(agent_id)
+        if not result.succeeded and self.__event_bus.has_subscribers(ActionFailed):
+            self.__event_bus.emit(ActionFailed(self.__current_nr_ticks, agent_id, action_name, action_kwargs, result))
 
         # Whether the action succeeded or not, we return the result
         return result
@@ -724,14 +1668,9 @@ class GridWorld:
 
         else:  # action is not None
 
-            # Get action class
-            action_class = self.__all_actions[action_name]
-            # Make instance of action
-            action = action_class()
-
             # Obtain the duration of the action, defaults to the one of the action class if not in action_kwargs, and
             # otherwise that of Action
-            duration_in_ticks = action.duration_in_ticks
+            duration_in_ticks = action_registry.get_duration(action_name)
             if "action_duration" in action_kwargs.keys():
                 duration_in_ticks = action_kwargs["action_duration"]
 
@@ -749,25 +1688,6 @@ class GridWorld:
         # to its properties so others know what agent did)
         self.__registered_agents[agent_id]._set_current_action(action_name=action_name, action_args=action_kwargs)
 
-    def __update_agent_location(self, agent_id):
-        # Get current location of the agent
-        loc = self.__registered_agents[agent_id].location
-        # Check if that spot in our list that represents the grid, is None or a list of other objects
-        if self.__grid[loc[1], loc[0]] is not None:  # If not None, we append the agent id to it
-            self.__grid[loc[1], loc[0]].append(agent_id)
-        else:  # if none, we make a new list with the agent id in it.
-            self.__grid[loc[1], loc[0]] = [agent_id]
-
-        # Update the Agent Avatar's location as well
-        self.__registered_agents[agent_id].location = loc
-
-    def __update_obj_location(self, obj_id):
-        loc = self.__environment_objects[obj_id].location
-        if self.__grid[loc[1], loc[0]] is not None:
-            self.__grid[loc[1], loc[0]].append(obj_id)
-        else:
-            self.__grid[loc[1], loc[0]] = [obj_id]
-
     def __warn(self, warn_str):
         return f"[@{self.__current_nr_ticks}] {warn_str}"
 
@@ -775,6 +1695,36 @@ class GridWorld:
     def messages_send_previous_tick(self):
         return self.__messages_send_previous_tick
 
+    @property
+    def tick_clock(self):
+        """ The TickClock that paces the ticks, with statistics on how late ticks ended (see its lag_statistics). """
+        return self.__tick_clock
+
+    @property
+    def event_bus(self):
+        """ The EventBus through which this world emits what happens in it, such as objects that move, are added or
+        removed, changed properties, opened or closed doors, grabbed or dropped objects, sent messages and failed actions
+        (see matrx.utils.world_events). Simulation goals and loggers subscribe to it through their
+        subscribe_to_events method, to keep track of changes instead of scanning the whole world each tick. Restoring a
+        snapshot emits no events. """
+        return self.__event_bus
+
+    @property
+    def action_log(self):
+        """ The ActionLog recording the decisions, messages and user input of the agents (see replay), or None if
+        actions are not recorded. """
+        return self.__action_log
+
+    @property
+    def tick_profiler(self):
+        """ The TickProfiler recording the time spent in each phase of a tick, or None if ticks are not profiled. """
+        return self.__tick_profiler
+
+    @property
+    def object_store(self):
+        """ The ObjectStore holding the data of all objects and agents in columns, or None if it is not used. """
+        return self.__object_store
+
     @property
     def registered_agents(self):
         return self.__registered_agents
@@ -0,0 +1,27 @@
+from matrx.logger.logger import GridWorldLogger
+from matrx.grid_world import GridWorld
+
+
+class LogTickProfile(GridWorldLogger):
+
+    def __init__(self, log_strategy=100, percentiles=(50, 90, 99), save_path="", file_name_prefix="",
+                 file_extension=".csv", delimeter=";"):
+        """ Logs the rolling percentiles of the time spent in each phase of a tick, every `log_strategy` ticks.
+
+        Requires the GridWorld to profile its ticks (profile_ticks=True in the WorldBuilder), otherwise nothing is
+        logged. Each row contains a "<phase>_p<percentile>" column (in seconds) per phase and percentile.
+        """
+        super().__init__(log_strategy=log_strategy, save_path=save_path, file_name=file_name_prefix,
+                         file_extension=file_extension, delimiter=delimeter)
+        self.__percentiles = percentiles
+
+    def log(self, grid_world: GridWorld, agent_data: dict):
+        if grid_world.tick_profiler is None:
+            return None
+
+        log_statement = {}
+        for phase, percentiles in grid_world.tick_profiler.percentiles(self.__percentiles).items():
+            for percentile, duration in percentiles.items():
+                log_statement[f"{phase}_{percentile}"] = duration
+
+        return log_statement
@@ -26,6 +26,13 @@ class GridWorldLogger:
     def log(self, grid_world, agent_data):
         return {}
 
+    def subscribe_to_events(self, event_bus):
+        """ Called once by the GridWorld with its EventBus (see GridWorld.event_bus) when this logger is added to it.
+        Override it to subscribe to the events of the world (see matrx.utils.world_events), e.g. to collect what
+        happened since the previous log instead of scanning the whole GridWorld in log. By default nothing is
+        subscribed to. """
+        pass
+
     def _grid_world_log(self, grid_world, agent_data, last_tick=False, goal_status=None):
         if not self._needs_to_log(grid_world, last_tick, goal_status):
             return
@@ -74,6 +81,23 @@ class GridWorldLogger:
 
         return to_log
 
+    def _next_tick_to_log(self, current_tick):
+        """ Returns the first tick from current_tick onwards at which this logger may log, supposing nothing in the
+        GridWorld changes in the meantime. None when it only logs on a change (a goal being reached or the last tick).
+        Loggers that decide themselves when to log (by overriding _needs_to_log) may log at any tick. """
+        if type(self)._needs_to_log is not GridWorldLogger._needs_to_log:
+            return current_tick
+
+        if isinstance(self.__log_strategy, int):
+            return max(current_tick, self.__last_logged_tick + self.__log_strategy)
+        elif self.__log_strategy == self.LOG_ON_FIRST_TICK:
+            return current_tick if current_tick == 0 else None
+        elif self.__log_strategy in (self.LOG_ON_GOAL_REACHED, self.LOG_ON_LAST_TICK):
+            return None
+
+        # An unknown strategy, let _needs_to_log raise its exception
+        return current_tick
+
     def _set_world_nr(self, world_nr):
         # Set the world number
         self.__world_nr = world_nr
@@ -1,12 +1,18 @@
 from matrx.agents.capabilities.capability import SenseCapability
-from matrx.actions.action import Action, ActionResult
-from matrx.utils.utils import get_all_classes
+from matrx.actions.action import Action, ActionResult, action_registry
 from matrx.objects.env_object import EnvObject
 import numpy as np
 
 
 class AgentBody(EnvObject):
 
+    # The attributes from which the additional properties of an agent's body are made
+    _property_attributes = EnvObject._property_attributes | {
+        "team", "action_set", "is_human_agent", "sense_capability", "is_carrying", "_AgentBody__location",
+        "_AgentBody__is_blocked", "_AgentBody__current_action", "_AgentBody__current_action_args",
+        "_AgentBody__last_action_duration_data"}
+    _tracked_containers = EnvObject._tracked_containers | {"is_carrying"}
+
     def __init__(self, location, possible_actions, sense_capability, class_callable,
                  callback_agent_get_action, callback_agent_set_action_result, callback_agent_observe,
                  callback_agent_get_messages, callback_agent_set_messages, callback_agent_initialize,
@@ -114,7 +120,7 @@ class AgentBody(EnvObject):
 
         # Parse the action_set property if set to the wildcard "*" denoting all actions
         if self.action_set == "*":
-            self.action_set = list(get_all_classes(Action, omit_super_class=True).keys())
+            self.action_set = action_registry.names()
 
         # Defines an agent is blocked by an action which takes multiple time steps. Is updated based on the speed with
         # which an agent can perform actions.
@@ -162,10 +168,25 @@ class AgentBody(EnvObject):
         """
         check if the agent is done with executing the action
         """
-        self.__is_blocked = curr_tick <= (self.current_action_tick_started + self.current_action_duration_in_ticks)
+        self.__is_blocked = self._is_busy(curr_tick)
 
         return self.__is_blocked
 
+    def _is_busy(self, curr_tick):
+        """ Returns True if the agent is still busy with its action at the given tick, without updating is_blocked. """
+        return curr_tick <= (self.current_action_tick_started + self.current_action_duration_in_ticks)
+
+    def _next_tick_to_check(self, curr_tick):
+        """
+        Returns the next tick at which the GridWorld has to check this agent, after it did so at curr_tick. Those are
+        the tick after its decision (when it becomes blocked), the last tick of its action's duration (when the action
+        is performed) and the tick after that (when it decides again). In between nothing about the agent changes.
+        """
+        last_tick = self.current_action_tick_started + self.current_action_duration_in_ticks
+        if curr_tick == self.current_action_tick_started or curr_tick >= last_tick:
+            return curr_tick + 1
+        return last_tick
+
     def _at_last_action_duration_tick(self, curr_tick):
         """ Returns True if this agent is at its last tick of the action's duration."""
         is_last_tick = curr_tick == (self.current_action_tick_started + self.current_action_duration_in_ticks)
@@ -187,13 +208,26 @@ class AgentBody(EnvObject):
         self.__current_action = action_name
         self.__current_action_args = action_args
 
+    @classmethod
+    def _from_state(cls, state, location_callback, property_callback, store, copy_of):
+        """
+        Creates a new agent's body from a state obtained from _snapshot_state, see EnvObject._from_state. The objects
+        it carries are replaced by their copies.
+        """
+        agent_body = super()._from_state(state, location_callback, property_callback, store, copy_of)
+        # Replace them in place, as the carried objects did not change
+        list.__setitem__(agent_body.is_carrying, slice(None), [copy_of(obj) for obj in agent_body.is_carrying])
+        return agent_body
+
     def _set_agent_changed_properties(self, props: dict):
         """
         The Agent has possibly changed some of its properties during its OODA loop. Here the agent properties are also
         updated in the Agent's body, if it is allowed to change them as defined in 'customizable_properties' list.
+        :return: The properties that were changed, with their new values.
         """
         # get all agent properties of this Agent's body in one dictionary
         body_properties = self.properties
+        changed_properties = {}
 
         # check for each property if it has been changed by the agent, and if we need
         # to update our local copy (here in Agent's body) of the agent properties to match that
@@ -212,6 +246,9 @@ class AgentBody(EnvObject):
             # The agent changed the property and the agent had permission to do so
             # update special properties
             self.change_property(prop, props[prop])
+            changed_properties[prop] = props[prop]
+
+        return changed_properties
 
     def change_property(self, property_name, property_value):
         """
@@ -270,6 +307,10 @@ class AgentBody(EnvObject):
             # We deliberately ignore the current_action property, and several others such as agent_id as these can never
             # be altered as they are governed by the GridWorld
 
+        # Notify the GridWorld (if any) that this property changed
+        if self._property_callback is not None:
+            self._property_callback(self, property_name, property_value)
+
         return self.properties
 
     @property
@@ -278,6 +319,8 @@ class AgentBody(EnvObject):
         We override the location pythonic property here so we can override its setter.
         :return: The location tuple of the form; (x, y).
         """
+        if self._store is not None:
+            return self._store.get_location(self._store_row)
         return tuple(self.__location)
 
     @location.setter
@@ -290,16 +333,25 @@ class AgentBody(EnvObject):
         """
         assert isinstance(loc, list) or isinstance(loc, tuple)
         assert len(loc) == 2
-        # Set the location to our private location xy list
-        self.__location = loc
+        # Set the location to our private location xy list, or in the ObjectStore we are in
+        if self._store is not None:
+            self._store.set_location(self._store_row, loc)
+            self._properties_changed()
+        else:
+            self.__location = loc
+
+        # Notify the GridWorld (if any) that this agent moved
+        if self._location_callback is not None:
+            self._location_callback(self)
 
         # Carrying action is done here
         # First we check if we even have a 'carrying' property, as the future might hold an Agent's body who
-        # specifically removes this property. In that case we return.
-        if 'carrying' not in self.properties.keys():
+        # specifically removes this property. In that case we return. Only a custom property can be named 'carrying',
+        # so we check those directly instead of building all our properties.
+        if 'carrying' not in self.custom_properties.keys():
             return
         # Next we retrieve whatever it is the Agent's body is carrying (if we have a 'carrying' property at all)
-        carried_objs = self.properties['carrying']
+        carried_objs = self.custom_properties['carrying']
         # If we carry nothing, we are done
         if len(carried_objs) == 0:
             return
@@ -309,13 +361,18 @@ class AgentBody(EnvObject):
             obj.location = loc  # this requires all objects in self.properties['carrying'] to be of type EnvObject
 
     @property
-    def properties(self):
+    def properties_version(self):
         """
-        Returns the custom properties of this object, but also any mandatory properties such as location, name,
-        is_traversable and all visualization properties (those are in their own dictionary under 'visualization').
-
-        In the case we return the properties of a class that inherits from EnvObject, we check if that class has
+        A number that is increased whenever any of the properties of this agent's body changes, including those of
+        the objects it carries.
+        :return: The version of the current properties.
+        """
+        return max([super().properties_version] + [obj.properties_version for obj in self.is_carrying])
 
+    def _build_properties(self):
+        """
+        Builds the properties of this agent's body from its attributes, called whenever the properties changed. The
+        properties of the carried objects are added when copying, as those objects cache their own properties.
         :return: All mandatory and custom properties in a dictionary.
         """
 
@@ -329,12 +386,12 @@ class AgentBody(EnvObject):
         properties['location'] = self.location
         properties['is_movable'] = self.is_movable
         properties['action_set'] = self.action_set
-        properties['carried_by'] = self.carried_by
+        properties['carried_by'] = list(self.carried_by)
         properties['is_human_agent'] = self.is_human_agent
         properties['is_traversable'] = self.is_traversable
         properties['class_inheritance'] = self.class_inheritance
         properties['is_blocked_by_action'] = self.is_blocked
-        properties['is_carrying'] = [obj.properties for obj in self.is_carrying]
+        properties['is_carrying'] = []
         properties['sense_capability'] = self.sense_capability.get_capabilities()
         properties['visualization'] = {
             "size": self.visualize_size,
@@ -356,12 +413,16 @@ class AgentBody(EnvObject):
 
         return properties
 
-    @properties.setter
-    def properties(self, property_dictionary: dict):
+    def _copy_properties(self, properties):
         """
-        Here to protect the 'properties' variable. It does not do anything and should not do anything!
+        Copies the cached properties of this agent's body, and adds the current properties of the carried objects.
+        :param properties: The cached properties.
+        :return: The copy of the properties.
         """
-        pass
+        properties = super()._copy_properties(properties)
+        properties['sense_capability'] = properties['sense_capability'].copy()
+        properties['is_carrying'] = [obj.properties for obj in self.is_carrying]
+        return properties
 
     @property
     def current_action(self):
@@ -1,9 +1,135 @@
+import itertools
+
 from matrx.utils.utils import get_default_value
 from matrx.utils.utils import next_obj_id, get_inheritence_path
+from matrx.utils.object_store import StoredAttribute
+
+# Hands out a new, ever increasing, version number whenever the properties of any object change
+_properties_versions = itertools.count(1)
+
+# Hands out a new, ever increasing, version number whenever any attribute of any object changes
+_state_versions = itertools.count(1)
+
+
+def _notifying(method):
+    """ Wraps a method of a list or dict such that the object owning it is notified of the change it made. """
+    def notify_owner(self, *args, **kwargs):
+        result = method(self, *args, **kwargs)
+        # The owner is not yet known while the container is being unpickled
+        owner = getattr(self, "_owner", None)
+        if owner is not None:
+            owner._properties_changed()
+        return result
+    return notify_owner
+
+
+class _TrackedList(list):
+    """ A list that is part of the properties of an object, which notifies that object whenever it changes. """
+
+    def __init__(self, iterable, owner):
+        super().__init__(iterable)
+        self._owner = owner
+
+    append = _notifying(list.append)
+    extend = _notifying(list.extend)
+    insert = _notifying(list.insert)
+    remove = _notifying(list.remove)
+    pop = _notifying(list.pop)
+    clear = _notifying(list.clear)
+    sort = _notifying(list.sort)
+    reverse = _notifying(list.reverse)
+    __setitem__ = _notifying(list.__setitem__)
+    __delitem__ = _notifying(list.__delitem__)
+    __iadd__ = _notifying(list.__iadd__)
+    __imul__ = _notifying(list.__imul__)
+
+
+class _TrackedDict(dict):
+    """ A dictionary that is part of the properties of an object, which notifies that object whenever it changes. """
+
+    def __init__(self, mapping, owner):
+        super().__init__(mapping)
+        self._owner = owner
+
+    update = _notifying(dict.update)
+    setdefault = _notifying(dict.setdefault)
+    pop = _notifying(dict.pop)
+    popitem = _notifying(dict.popitem)
+    clear = _notifying(dict.clear)
+    __setitem__ = _notifying(dict.__setitem__)
+    __delitem__ = _notifying(dict.__delitem__)
+    __ior__ = _notifying(dict.__ior__)
+
+
+# The types of attribute values that are copied in a snapshot of an object, any other value is shared with the object
+_COPIED_TYPES = frozenset({list, dict, set, _TrackedList, _TrackedDict})
+
+
+def _copy_containers(value, owner):
+    """ Copies the (nested) lists, dicts and sets in an attribute value of an object, any other value is shared. Tracked
+    containers remain tracked, and notify the given owner. """
+    value_type = type(value)
+    if value_type is list or value_type is _TrackedList:
+        copied = [_copy_containers(item, owner) if type(item) in _COPIED_TYPES else item for item in value]
+        return copied if value_type is list else _TrackedList(copied, owner)
+    elif value_type is dict or value_type is _TrackedDict:
+        copied = {key: _copy_containers(item, owner) if type(item) in _COPIED_TYPES else item
+                  for key, item in value.items()}
+        return copied if value_type is dict else _TrackedDict(copied, owner)
+    elif value_type is set:
+        return set(value)
+    return value
 
 
 class EnvObject:
 
+    # Called with this object whenever its location changes, set by the GridWorld when this object is added to it so the
+    # GridWorld can keep its grid and spatial index up to date.
+    _location_callback = None
+
+    # Called with this object, the name of a property and its new value whenever a property is changed through
+    # change_property, set by the GridWorld when this object is added to it so the GridWorld can emit an event.
+    _property_callback = None
+
+    # The attributes from which the properties of this object are made, setting any of them invalidates the cached
+    # properties. Subclasses that add properties based on other attributes should extend this set.
+    _property_attributes = frozenset({"obj_name", "obj_id", "_EnvObject__location", "is_movable", "carried_by",
+                                      "is_traversable", "class_inheritance", "visualize_size", "visualize_shape",
+                                      "visualize_colour", "visualize_depth", "visualize_opacity", "custom_properties"})
+
+    # Those property attributes that are a list or dictionary, these are tracked for changes made to their contents
+    _tracked_containers = frozenset({"carried_by", "custom_properties"})
+
+    # The attributes that are shared instead of copied in a snapshot of this object, as they are never altered in place
+    _shared_snapshot_attributes = frozenset({"_EnvObject__cached_properties"})
+
+    # The version of the state (all attributes) of this object, see _state_version
+    __state_version = 0
+
+    # The cached properties of this object (None when they need to be rebuilt), and the version of its properties
+    __cached_properties = None
+    __properties_version = 0
+
+    # The ObjectStore (and row therein) that holds the location and the attributes below, while this object is in one
+    _store = None
+    _store_row = None
+    is_traversable = StoredAttribute()
+    is_movable = StoredAttribute()
+    visualize_size = StoredAttribute()
+    visualize_shape = StoredAttribute()
+    visualize_colour = StoredAttribute()
+    visualize_depth = StoredAttribute()
+    visualize_opacity = StoredAttribute()
+
+    # The number of ticks between two calls of update by the GridWorld, 1 means every tick. Subclasses can override it,
+    # or it can be set per object. Only objects that override update are updated at all, see _has_update.
+    update_interval = 1
+
+    # The tick at which update was last called, and whether (and until which tick) this object sleeps
+    __last_update_tick = None
+    __is_asleep = False
+    __asleep_until = None
+
     def __init__(self, location, name, class_callable, customizable_properties=None,
                  is_traversable=None, is_movable=None,
                  visualize_size=None, visualize_shape=None, visualize_colour=None, visualize_depth=None,
@@ -129,6 +255,30 @@ class EnvObject:
         # AgentAvatar)
         self.location = location
 
+    def __setattr__(self, name, value):
+        if name in self._property_attributes:
+            if name in self._tracked_containers:
+                if isinstance(value, list) and not isinstance(value, _TrackedList):
+                    value = _TrackedList(value, self)
+                elif isinstance(value, dict) and not isinstance(value, _TrackedDict):
+                    value = _TrackedDict(value, self)
+
+            # Only invalidate our properties if the attribute actually got a new value
+            if self.__dict__.get(name, _TrackedList) is not value:
+                super().__setattr__(name, value)
+                self._properties_changed()
+                return
+
+        super().__setattr__(name, value)
+        self.__dict__["_EnvObject__state_version"] = next(_state_versions)
+
+    def _properties_changed(self):
+        """ Invalidates the cached properties of this object, and gives them a new version. Called automatically whenever
+        an attribute that is part of the properties is set or changed. Call it yourself when you changed the contents
+        of a custom property (e.g. appended to a list) and want others to see the new version. """
+        self.__cached_properties = None
+        self.__properties_version = next(_properties_versions)
+
     def update(self, grid_world):
         """
         Used to update some properties of this object if needed. For example a 'status' property that changes over time.
@@ -137,7 +287,9 @@ class EnvObject:
 
         If you want this functionality, you should create a new object that inherits from this class EnvObject.
 
-        This method is called automatically in the game-loop inside a running GridWorld instance.
+        This method is called automatically in the game-loop inside a running GridWorld instance; every tick, or every
+        update_interval ticks when that is set. Objects that do not override it are never called, and an object can
+        stop being called for a while with sleep.
 
         Parameters
         ----------
@@ -147,6 +299,114 @@ class EnvObject:
         """
         pass
 
+    def _has_update(self):
+        """
+        Whether this object does anything when updated, that is; whether its class overrides the update method.
+        :return: True if the update method is overridden, False otherwise.
+        """
+        return type(self).update is not EnvObject.update
+
+    def sleep(self, until_tick=None):
+        """
+        Stops the GridWorld from calling update on this object, until the given tick or until wake_up is called. For
+        example to have an object that is done changing not cost anything anymore, or one that only needs to do
+        something at a certain tick.
+        :param until_tick: The first tick at which the object is updated again. Optional, when None (default) the
+        object sleeps until wake_up is called.
+        """
+        self.__is_asleep = True
+        self.__asleep_until = until_tick
+
+    def wake_up(self):
+        """
+        Has the GridWorld call update on this object again, from the current tick onwards if it was not yet updated in
+        this tick, and otherwise after its update_interval.
+        """
+        self.__is_asleep = False
+        self.__asleep_until = None
+
+    def _next_update_tick(self, current_tick):
+        """
+        The first tick from current_tick onwards at which this object should be updated, based on the tick it was last
+        updated, its update_interval and whether it sleeps.
+        :param current_tick: The current tick of the GridWorld.
+        :return: The tick number, or None when the object sleeps until woken up.
+        """
+        next_tick = current_tick
+        if self.__last_update_tick is not None:
+            next_tick = max(next_tick, self.__last_update_tick + self.update_interval)
+        if self.__is_asleep:
+            if self.__asleep_until is None:
+                return None
+            next_tick = max(next_tick, self.__asleep_until)
+        return next_tick
+
+    def _set_updated(self, tick):
+        """
+        Called by the GridWorld after it called update on this object.
+        :param tick: The tick at which this object was updated.
+        """
+        self.__last_update_tick = tick
+
+    @property
+    def _state_version(self):
+        """
+        A number that is increased whenever any attribute of this object is set, or a property changes (see
+        _properties_changed). Two snapshots of this object with the same state version are equal, used by
+        GridWorld.snapshot and GridWorld.restore to only copy the objects that changed.
+        :return: The version of the current state.
+        """
+        return self.__state_version
+
+    def _snapshot_state(self):
+        """
+        Returns a copy of the state (all attributes, including its _state_version) of this object, used by
+        GridWorld.snapshot. Lists, dictionaries and sets are copied, any other value (e.g. strings, numbers, carried
+        objects, callbacks and sense capabilities) is shared with this object.
+        :return: The state as a dictionary.
+        """
+        state = self.__dict__.copy()
+        for name, value in state.items():
+            if type(value) in _COPIED_TYPES and name not in self._shared_snapshot_attributes:
+                state[name] = _copy_containers(value, self)
+        return state
+
+    def _restore_state(self, state):
+        """
+        Sets the state of this object back to a state obtained from _snapshot_state, used by GridWorld.restore. The
+        state is copied again, so it can be restored more than once. This also restores the _state_version.
+        :param state: The state as a dictionary.
+        """
+        restored = state.copy()
+        for name, value in restored.items():
+            if type(value) in _COPIED_TYPES and name not in self._shared_snapshot_attributes:
+                restored[name] = _copy_containers(value, self)
+        self.__dict__.clear()
+        self.__dict__.update(restored)
+
+    @classmethod
+    def _from_state(cls, state, location_callback, property_callback, store, copy_of):
+        """
+        Creates a new object from a state obtained from _snapshot_state, as the copy of an object in a fork of a
+        GridWorld (see GridWorld.fork). The copy has the same state version as the state, but is bound to the fork
+        instead of the world the state was taken from.
+        :param state: The state as a dictionary.
+        :param location_callback: The location callback of the fork, used when the object is part of its grid.
+        :param property_callback: The property callback of the fork, used when the object is part of its grid.
+        :param store: The ObjectStore of the fork, used when the object was in a store.
+        :param copy_of: Called with any object the state refers to (e.g. carried objects), returns its copy.
+        :return: The new object.
+        """
+        obj = cls.__new__(cls)
+        obj._restore_state(state)
+        if obj.__dict__.get("_location_callback") is not None:
+            obj.__dict__["_location_callback"] = location_callback
+        if obj.__dict__.get("_property_callback") is not None:
+            obj.__dict__["_property_callback"] = property_callback
+        if obj.__dict__.get("_store") is not None:
+            obj.__dict__["_store"] = store
+        return obj
+
     def change_property(self, property_name, property_value):
         """
         Changes the value of an existing (!) property.
@@ -156,7 +416,7 @@ class EnvObject:
         """
 
         # We check if it is a custom property and if so change it simply in the dictionary
-        if property_name in self.customizable_properties.keys():
+        if property_name in self.custom_properties.keys():
             self.custom_properties[property_name] = property_value
         else:  # else we need to check if property_name is a mandatory class attribute that is also a property
             if property_name == "is_traversable":
@@ -190,6 +450,10 @@ class EnvObject:
                 assert isinstance(property_value, bool)
                 self.is_movable = property_value
 
+        # Notify the GridWorld (if any) that this property changed
+        if self._property_callback is not None:
+            self._property_callback(self, property_name, property_value)
+
         return self.properties
 
     def add_property(self, property_name, property_value):
@@ -210,6 +474,8 @@ class EnvObject:
         setter that is overridden in AgentAvatar to also transfer all carried objects with it.
         :return: The current location as a tuple; (x, y)
         """
+        if self._store is not None:
+            return self._store.get_location(self._store_row)
         return tuple(self.__location)
 
     @location.setter
@@ -221,7 +487,15 @@ class EnvObject:
         """
         assert isinstance(loc, list) or isinstance(loc, tuple)
         assert len(loc) == 2
-        self.__location = loc
+        if self._store is not None:
+            self._store.set_location(self._store_row, loc)
+            self._properties_changed()
+        else:
+            self.__location = loc
+
+        # Notify the GridWorld (if any) that this object moved
+        if self._location_callback is not None:
+            self._location_callback(self)
 
     @property
     def properties(self):
@@ -229,8 +503,34 @@ class EnvObject:
         Returns the custom properties of this object, but also any mandatory properties such as location, name,
         is_traversable and all visualization properties (those are in their own dictionary under 'visualization').
 
-        In the case we return the properties of a class that inherits from EnvObject, we check if that class has
+        The properties are cached and only rebuilt when one of them changed, a copy of this cache is returned so it
+        can be altered freely.
+
+        :return: All mandatory and custom properties in a dictionary.
+        """
+        if self.__cached_properties is None:
+            self.__cached_properties = self._build_properties()
+        return self._copy_properties(self.__cached_properties)
+
+    @properties.setter
+    def properties(self, property_dictionary: dict):
+        """
+        Here to protect the 'properties' variable. It does not do anything and should not do anything!
+        """
+        pass
+
+    @property
+    def properties_version(self):
+        """
+        A number that is increased whenever any of the properties of this object changes, allowing you to cheaply check
+        if the properties changed since you last obtained them.
+        :return: The version of the current properties.
+        """
+        return self.__properties_version
 
+    def _build_properties(self):
+        """
+        Builds the properties of this object from its attributes, called whenever the properties changed.
         :return: All mandatory and custom properties in a dictionary.
         """
 
@@ -242,7 +542,7 @@ class EnvObject:
         properties['obj_id'] = self.obj_id  # we return id as well, but this should never ever be modified!
         properties['location'] = self.location
         properties['is_movable'] = self.is_movable
-        properties['carried_by'] = self.carried_by
+        properties['carried_by'] = list(self.carried_by)
         properties['is_traversable'] = self.is_traversable
         properties['class_inheritance'] = self.class_inheritance
         properties['visualization'] = {
@@ -255,9 +555,13 @@ class EnvObject:
 
         return properties
 
-    @properties.setter
-    def properties(self, property_dictionary: dict):
+    def _copy_properties(self, properties):
         """
-        Here to protect the 'properties' variable. It does not do anything and should not do anything!
+        Copies the cached properties of this object, such that the cache cannot be altered through the copy.
+        :param properties: The cached properties.
+        :return: The copy of the properties.
         """
-        pass
+        properties = properties.copy()
+        properties['carried_by'] = properties['carried_by'].copy()
+        properties['visualization'] = properties['visualization'].copy()
+        return properties
@@ -32,6 +32,27 @@ class SimulationGoal:
         """
         pass
 
+    def next_tick_to_check(self, grid_world):
+        """
+        Returns the next tick at which this goal may be reached (or no longer be reached), supposing nothing else in the
+        grid world changes. Used by GridWorld.run_headless(skip_idle_ticks=True) to jump over the ticks at which nothing
+        happens. By default this is the current tick, meaning that the goal has to be checked every tick. Override it
+        when the goal depends on the number of ticks, or only on changes in the world (in which case return None).
+        :param grid_world: An up to date representation of the grid world.
+        :return: The tick number, or None when the goal only changes when something in the grid world changes.
+        """
+        return grid_world.current_nr_ticks
+
+    def subscribe_to_events(self, event_bus):
+        """
+        Called once by the grid world with its EventBus (see GridWorld.event_bus), and again for the copy of this goal in
+        any fork of that world. Override it to subscribe to the events of the world (see matrx.utils.world_events),
+        e.g. to keep track of the changes that matter to this goal instead of scanning the whole grid world in
+        goal_reached. By default nothing is subscribed to.
+        :param event_bus: The EventBus of the grid world.
+        """
+        pass
+
 
 class LimitedTimeGoal(SimulationGoal):
     """
@@ -57,3 +78,8 @@ class LimitedTimeGoal(SimulationGoal):
         if self.max_nr_ticks == np.inf or self.max_nr_ticks <= 0:
             return 0.
         return min(1.0, grid_world.current_nr_ticks / self.max_nr_ticks)
+
+    def next_tick_to_check(self, grid_world):
+        if self.max_nr_ticks == np.inf or self.max_nr_ticks <= 0:
+            return None
+        return max(grid_world.current_nr_ticks, self.max_nr_ticks)
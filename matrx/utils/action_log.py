@@ -0,0 +1,128 @@
+import copy
+import pickle
+
+
+class ActionLog:
+
+    def __init__(self, start_tick=0):
+        """ A compact record of everything that went from the agent brains (and the API) into a GridWorld, with which
+        the world can be replayed without calling any brain, see GridWorld.replay.
+
+        Per tick it holds the decision of each agent that decided; the name and arguments of the action it started and
+        the properties it changed. Next to that it holds the messages each agent sent (including those sent on its
+        behalf through the API) and the user input each human agent received. Only ticks at which something was
+        recorded take up space.
+
+        Parameters
+        ----------
+        start_tick : int, optional (default=0)
+            The tick at which recording started; the tick a GridWorld should be at to replay this log.
+
+        """
+        self.__start_tick = start_tick
+        self.__end_tick = start_tick  # the tick after the last tick that was recorded
+        self.__decisions = {}  # tick -> agent id -> (action name, action kwargs, changed properties)
+        self.__messages = {}  # tick -> agent id -> list of sent messages
+        self.__userinput = {}  # tick -> agent id -> received user input
+
+    def record_decision(self, tick, agent_id, action_name, action_kwargs, changed_properties):
+        """ Records the decision of an agent, the arguments and properties are copied.
+
+        Parameters
+        ----------
+        tick : int
+            The tick at which the agent decided.
+        agent_id : str
+            The id of the agent.
+        action_name : str
+            The name of the Action class the agent started, None when it idles.
+        action_kwargs : dict
+            The arguments of the action.
+        changed_properties : dict
+            The properties of its body the agent changed, with their new values.
+        """
+        self.__decisions.setdefault(tick, {})[agent_id] = (action_name, copy.deepcopy(action_kwargs),
+                                                           copy.deepcopy(changed_properties))
+
+    def record_messages(self, tick, agent_id, messages):
+        """ Records the messages an agent sent, the messages themselves are shared. """
+        if len(messages) > 0:
+            self.__messages.setdefault(tick, {}).setdefault(agent_id, []).extend(messages)
+
+    def record_userinput(self, tick, agent_id, userinput):
+        """ Records the user input a human agent received from the API. """
+        if userinput is not None:
+            self.__userinput.setdefault(tick, {})[agent_id] = copy.deepcopy(userinput)
+
+    def record_end_of_tick(self, tick):
+        """ Marks that all ticks before the given tick are recorded. """
+        self.__end_tick = max(self.__end_tick, tick)
+
+    def truncate(self, tick):
+        """ Forgets everything recorded from the given tick onwards, e.g. after the GridWorld is restored to a
+        snapshot of that tick. """
+        for records in (self.__decisions, self.__messages, self.__userinput):
+            for recorded_tick in [recorded_tick for recorded_tick in records.keys() if recorded_tick >= tick]:
+                del records[recorded_tick]
+        self.__end_tick = max(self.__start_tick, min(self.__end_tick, tick))
+
+    def decisions_at(self, tick):
+        """ Returns the decisions made at a tick, with agent ids as keys and (action name, action kwargs, changed
+        properties) tuples as values. """
+        return self.__decisions.get(tick, {})
+
+    def messages_at(self, tick):
+        """ Returns the messages sent at a tick, with the ids of the sending agents as keys. """
+        return self.__messages.get(tick, {})
+
+    def userinput_at(self, tick):
+        """ Returns the user input received at a tick, with the ids of the human agents as keys. """
+        return self.__userinput.get(tick, {})
+
+    def save(self, file_path):
+        """ Writes this log to a file, from which it can be read with `ActionLog.load`.
+
+        Parameters
+        ----------
+        file_path : str
+            The path of the file to (over)write.
+        """
+        with open(file_path, "wb") as log_file:
+            pickle.dump(self, log_file, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def load(file_path):
+        """ Reads a log written by `save`.
+
+        Parameters
+        ----------
+        file_path : str
+            The path of the file to read.
+
+        Returns
+        -------
+        ActionLog
+            The log.
+
+        Raises
+        ------
+        ValueError
+            When the file does not contain an ActionLog.
+        """
+        with open(file_path, "rb") as log_file:
+            action_log = pickle.load(log_file)
+        if not isinstance(action_log, ActionLog):
+            raise ValueError(f"The file {file_path} does not contain an {ActionLog.__name__}.")
+        return action_log
+
+    @property
+    def start_tick(self):
+        return self.__start_tick
+
+    @property
+    def end_tick(self):
+        return self.__end_tick
+
+    @property
+    def nr_ticks(self):
+        return self.__end_tick - self.__start_tick
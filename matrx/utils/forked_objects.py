@@ -0,0 +1,71 @@
+from collections import OrderedDict
+
+# Marks that no default was given to ForkedObjects.pop
+_NO_DEFAULT = object()
+
+
+class ForkedObjects(dict):
+
+    def __init__(self, objects, copy_object, is_source):
+        """ A dictionary of the objects (or agents) in a fork of a GridWorld, see GridWorld.fork.
+
+        Initially the values are the objects of the GridWorld that was forked, shared with it. A value is replaced by
+        its copy in the fork once it is obtained from this dictionary, so only the objects that are used in the fork
+        are ever copied. The keys, their order (the same as in the world that was forked) and the size are available
+        without copying anything. It is a plain dictionary rather than an OrderedDict, as that is much faster to
+        create.
+
+        Parameters
+        ----------
+        objects : iterable
+            The (object id, object) pairs of the world that was forked, in order.
+        copy_object : callable
+            Called with an object of the world that was forked, returns its copy in the fork.
+        is_source : callable
+            Called with a value, returns whether it is an object of the world that was forked (and not yet a copy).
+
+        """
+        super().__init__(objects)
+        self.__copy_object = copy_object
+        self.__is_source = is_source
+
+    def __iter__(self):
+        # Overridden so that creating another dictionary from this one obtains the values through __getitem__
+        return super().__iter__()
+
+    def __getitem__(self, obj_id):
+        obj = super().__getitem__(obj_id)
+        if self.__is_source(obj):
+            obj = self.__copy_object(obj)
+            super().__setitem__(obj_id, obj)
+        return obj
+
+    def get(self, obj_id, default=None):
+        return self[obj_id] if obj_id in self else default
+
+    def pop(self, obj_id, default=_NO_DEFAULT):
+        if obj_id not in self:
+            if default is _NO_DEFAULT:
+                raise KeyError(obj_id)
+            return default
+        obj = self[obj_id]
+        super().pop(obj_id)
+        return obj
+
+    def values(self):
+        self.copy_all()
+        return super().values()
+
+    def items(self):
+        self.copy_all()
+        return super().items()
+
+    def copy(self):
+        return OrderedDict(self.items())
+
+    def copy_all(self):
+        """ Replaces all objects that are not yet copied by their copy in the fork. """
+        for obj_id, obj in list(super().items()):
+            if self.__is_source(obj):
+                super().__setitem__(obj_id, self.__copy_object(obj))
+
@@ -1,6 +1,46 @@
 import json
 from matrx.utils.utils import gen_random_string
 
+
+class MessageCodec:
+
+    def __init__(self):
+        """ Serializes Messages to compact JSON, see Message.toJSON.
+
+        All public attributes of a message are serialized; those of a subclass of Message as well. Content that JSON
+        does not support is serialized by the encoder registered for its type (or the nearest base class), and
+        otherwise as the dictionary of its attributes. Set `Message.codec` (or the codec of a subclass of Message) to
+        another instance, or an instance of a subclass, to change how messages are serialized.
+
+        """
+        self.__encoders = {}  # content type -> callable that returns a JSON serializable version of the content
+
+    def register(self, content_type, encoder):
+        """ Registers how content of a type is serialized.
+
+        Parameters
+        ----------
+        content_type : type
+            The class of the content, the encoder is also used for its subclasses.
+        encoder : callable
+            Called with the content, returns a version of it JSON supports; e.g. a string, list or dictionary. Which
+            may in turn contain content of a registered type.
+        """
+        self.__encoders[content_type] = encoder
+
+    def encode(self, message):
+        """ Returns the compact JSON text of a message. """
+        attributes = {name: value for name, value in vars(message).items() if not name.startswith("_")}
+        return json.dumps(attributes, default=self.encode_content, sort_keys=True, separators=(",", ":"))
+
+    def encode_content(self, content):
+        """ Returns a JSON serializable version of content that JSON does not support itself. """
+        for content_type in type(content).__mro__:
+            if content_type in self.__encoders:
+                return self.__encoders[content_type](content)
+        return vars(content)
+
+
 class Message:
     """
     A simple object representing a communication message. An agent can create such a Message object by stating the
@@ -16,13 +56,61 @@ class Message:
     None                      = global message. This message is send to everyone
     """
 
+    # Serializes messages to JSON for the API, see MessageCodec.register for content of custom types
+    codec = MessageCodec()
+
     def __init__(self, content, from_id, to_id=None):
         self.content = content  # content can be anything; a string, a dictionary, or even a custom object
         self.from_id = from_id  # the agent id who creates this message
         self.to_id = to_id  # the agent id who is the sender, when None it means all agents, including the sender
         self.message_id = gen_random_string(30) # randomly generated ID of the message
+        self.__json = None  # the JSON text of this message, made once it is first needed
 
     def toJSON(self):
-        """ Make this class JSON serializable, such that it can be sent as JSON via the API """
-        return json.dumps(self, default=lambda o: o.__dict__,
-                          sort_keys=True, indent=4)
\ No newline at end of file
+        """ Make this class JSON serializable, such that it can be sent as JSON via the API
+
+        The compact JSON text is made by the codec of this class the first time, and cached on this message. As the
+        same message is fetched by many clients, it should therefore not be altered once it is sent.
+        """
+        if self.__json is None:
+            self.__json = type(self).codec.encode(self)
+        return self.__json
+
+class MessageDelivery:
+
+    def __init__(self, message, recipients, excluded_id=None):
+        """ A message as it is delivered by the GridWorld; one shared message with the set of agents that receive it.
+
+        Global and team messages are delivered by reference this way, instead of as a copy of the message for every
+        receiving agent. An agent only reads the deliveries it is a recipient of, see AgentBrain.received_messages.
+
+        Parameters
+        ----------
+        message : Message
+            The delivered message, shared by all recipients.
+        recipients : frozenset
+            The ids of the agents that receive the message.
+        excluded_id : str, optional (default=None)
+            The id of an agent that does not receive the message even though it is among the recipients, e.g. the
+            sender of a global message. This allows all global messages of a tick to share the same recipients.
+
+        """
+        self.__message = message
+        self.__recipients = recipients
+        self.__excluded_id = excluded_id
+
+    def is_for(self, agent_id):
+        """ Whether the given agent receives this message. """
+        return agent_id in self.__recipients and agent_id != self.__excluded_id
+
+    @property
+    def message(self):
+        return self.__message
+
+    @property
+    def recipients(self):
+        return self.__recipients
+
+    @property
+    def excluded_id(self):
+        return self.__excluded_id
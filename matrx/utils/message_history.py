@@ -0,0 +1,79 @@
+import pickle
+import tempfile
+import threading
+
+
+class MessageHistory:
+
+    def __init__(self, directory=None):
+        """ An append-only store on disk of the messages of past ticks, used by the MessageManager to keep only the
+        messages of the last ticks in memory.
+
+        The messages of a tick are written once, as a single record. Only the position of each record in the file is
+        kept in memory, so reading the messages of a tick back costs a single seek and read. Records are never
+        overwritten; restoring an index from `snapshot_index` simply forgets the records written since, so snapshots
+        can be restored in any order.
+
+        The file is a temporary file, which is removed once this store is closed or no longer used.
+
+        Parameters
+        ----------
+        directory : str, optional (default=None)
+            The directory in which the file is created, by default the temporary directory of the system.
+
+        """
+        self.__directory = directory
+        self.__file = None  # created when the first tick is written
+        self.__index = {}  # tick -> position of its record in the file
+        self.__lock = threading.Lock()  # The messages are read by the API thread, while the GridWorld writes them
+
+    def write(self, tick, messages):
+        """ Writes the messages of a tick to disk, after which they can be read back with `read`.
+
+        Parameters
+        ----------
+        tick : int
+            The tick at which the messages were sent.
+        messages : tuple
+            The messages of that tick, any object that can be pickled.
+        """
+        with self.__lock:
+            if self.__file is None:
+                self.__file = tempfile.TemporaryFile(prefix="matrx_messages_", dir=self.__directory)
+            self.__file.seek(0, 2)
+            position = self.__file.tell()
+            pickle.dump(messages, self.__file, protocol=pickle.HIGHEST_PROTOCOL)
+            self.__index[tick] = position
+
+    def read(self, tick):
+        """ Returns the messages of a tick as they were written, or None if no messages were written for it. """
+        with self.__lock:
+            position = self.__index.get(tick)
+            if position is None:
+                return None
+            self.__file.seek(position)
+            return pickle.load(self.__file)
+
+    def snapshot_index(self):
+        """ Returns a copy of which ticks are stored and where, to restore with `restore_index`. """
+        with self.__lock:
+            return dict(self.__index)
+
+    def restore_index(self, index):
+        """ Sets which ticks are stored back to an index obtained from `snapshot_index`. """
+        with self.__lock:
+            self.__index = dict(index)
+
+    def close(self):
+        """ Closes and removes the file, forgetting all messages stored in it. """
+        with self.__lock:
+            if self.__file is not None:
+                self.__file.close()
+                self.__file = None
+            self.__index = {}
+
+    def __contains__(self, tick):
+        return tick in self.__index
+
+    def __len__(self):
+        return len(self.__index)
@@ -0,0 +1,68 @@
+import bisect
+from array import array
+
+
+class MessageIndex:
+
+    def __init__(self):
+        """ An index of a stream of messages in the MessageManager, e.g. the messages of one team or those sent or
+        received by one agent.
+
+        Each message is stored as its number (see MessageManager.last_message_nr), the tick at which it was sent and
+        its position in the list of messages of its type of that tick. Those are kept in arrays of integers, so the
+        index stays small compared to the messages themselves, which may be moved to disk. Both the numbers and the
+        ticks only increase, so the messages after a number or within a range of ticks are found by a binary search;
+        in time proportional to the number of messages found.
+
+        Messages are only appended to the arrays, with their number last. A reader that only considers messages up to a
+        number it read before, therefore never sees a message half added by another thread.
+
+        """
+        self.__ticks = array("q")
+        self.__positions = array("q")
+        self.__message_nrs = array("q")
+
+    def append(self, message_nr, tick, position):
+        """ Adds a message to the index.
+
+        Parameters
+        ----------
+        message_nr : int
+            The number of the message, larger than that of all messages in the index.
+        tick : int
+            The tick at which it was sent, not before that of the other messages in the index.
+        position : int
+            Its position in the list of messages of its type of that tick.
+        """
+        self.__ticks.append(tick)
+        self.__positions.append(position)
+        self.__message_nrs.append(message_nr)
+
+    def after(self, message_nr, last_message_nr):
+        """ Returns the (message nr, tick, position) tuples of the messages with a number larger than message_nr, up to
+        and including last_message_nr. """
+        start = bisect.bisect_right(self.__message_nrs, message_nr)
+        stop = bisect.bisect_right(self.__message_nrs, last_message_nr, lo=start)
+        return self.__entries(start, stop)
+
+    def within(self, tick_from, tick_to):
+        """ Returns the (message nr, tick, position) tuples of the messages sent from tick_from up to and including
+        tick_to. """
+        stop = len(self.__message_nrs)
+        start = bisect.bisect_left(self.__ticks, tick_from, hi=stop)
+        stop = bisect.bisect_right(self.__ticks, tick_to, lo=start, hi=stop)
+        return self.__entries(start, stop)
+
+    def copy(self):
+        """ Returns a copy of this index, used by MessageManager.snapshot_history. """
+        index = MessageIndex()
+        index.__ticks = array("q", self.__ticks)
+        index.__positions = array("q", self.__positions)
+        index.__message_nrs = array("q", self.__message_nrs)
+        return index
+
+    def __entries(self, start, stop):
+        return zip(self.__message_nrs[start:stop], self.__ticks[start:stop], self.__positions[start:stop])
+
+    def __len__(self):
+        return len(self.__message_nrs)
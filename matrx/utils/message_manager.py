@@ -1,4 +1,7 @@
 from matrx.agents.agent_brain import  Message
+from matrx.utils.message import MessageDelivery
+from matrx.utils.message_history import MessageHistory
+from matrx.utils.message_index import MessageIndex
 
 class MessageManager():
     """ A manager inside the GirdWorld that tracks the received and send messages between agents and their teams.
@@ -8,13 +11,45 @@ class MessageManager():
         - an easy way to log communication (as the messages are easily obtained from a GridWorld instance, through some methods).
     """
 
-    def __init__(self):
+    def __init__(self, retention_ticks=None, history_dir=None):
+        """ Creates the message manager of a GridWorld.
+
+        Parameters
+        ----------
+        retention_ticks : int, optional (default=None)
+            The number of most recent ticks of which the messages are kept in memory. The messages of older ticks are
+            moved to a file on disk (see MessageHistory), from which `fetch_messages` still reads them. By default all
+            messages are kept in memory.
+        history_dir : str, optional (default=None)
+            The directory in which that file is created, by default the temporary directory of the system.
+
+        Raises
+        ------
+        ValueError
+            When retention_ticks is not None nor an integer of at least 1.
+        """
+        if retention_ticks is not None and (not isinstance(retention_ticks, int) or retention_ticks < 1):
+            raise ValueError(f"The given retention_ticks {retention_ticks} should be None or an integer larger or "
+                             f"equal to 1.")
+        self.__retention_ticks = retention_ticks
+        self.__history = MessageHistory(directory=history_dir) if retention_ticks is not None else None
+
         # there are three types of messages
         self.global_messages = {} # messages send to everyone
         self.team_messages = {} # messages send to a team
         self.private_messages = {} # messages send to individual agents
 
-        self.preprocessed_messages = {} # all types of messages above unpacked to the corresponding individual messages
+        self.preprocessed_messages = {} # all types of messages above as MessageDeliveries to their receivers
+
+        # Indexes of the messages above, in which each message is numbered in the order they were stored
+        self.__last_message_nr = 0  # the number of the last message that was stored, 0 if there are none
+        self.__global_index = MessageIndex()  # all global messages
+        self.__private_index = MessageIndex()  # all private messages
+        self.__team_indexes = {}  # team name -> MessageIndex of the messages sent to that team
+        self.__agent_indexes = {}  # agent id -> MessageIndex of the private messages sent or received by that agent
+
+        # The ids of all agents as recipients of the global messages of a tick, shared by all of them
+        self.__all_recipients = (None, frozenset())
 
         self.agents = None
         self.teams = None
@@ -42,6 +77,10 @@ class MessageManager():
         self.teams = teams
         self.agents = all_agent_ids
 
+        # move the messages of ticks that are no longer retained to disk
+        if self.__history is not None:
+            self.__spill_messages(tick - self.__retention_ticks)
+
         # process every message
         for mssg in messages:
 
@@ -85,8 +124,6 @@ class MessageManager():
         tick
             Current tick of the gridworld
         """
-        all_ids_except_me = [agent_id for agent_id in all_agent_ids if agent_id != mssg.from_id]
-
         # if the receiver is None, it is a global message which has to be sent to everyone
         if mssg.to_id is None: # global message
             # create a list in memory for global messages for this tick
@@ -96,14 +133,12 @@ class MessageManager():
             # save in global
             global_message = Message(content=mssg.content, from_id=mssg.from_id, to_id="global")
             self.global_messages[tick].append(global_message)
+            self.__index_message((self.__global_index,), tick, len(self.global_messages[tick]) - 1)
 
-            # split in sub mssgs
-            for to_id in all_ids_except_me.copy():
-                # create message
-                new_message = Message(content=mssg.content, from_id=mssg.from_id, to_id=to_id)
-
-                # save in prepr
-                self.preprocessed_messages[tick].append(new_message)  # all messages above combined
+            # deliver it to everyone except the sender by reference, instead of as a message per receiver
+            delivery = MessageDelivery(global_message, self.__recipients_of_all(tick, all_agent_ids),
+                                       excluded_id=mssg.from_id)
+            self.preprocessed_messages[tick].append(delivery)  # all messages above combined
 
         # if it is a list, decode every receiver_id in that list again
         elif isinstance(mssg.to_id, list):
@@ -139,15 +174,11 @@ class MessageManager():
 
                 # save in team mssgs as a message for that specific team
                 self.team_messages[tick][mssg.to_id].append(mssg)
+                self.__index_message((self.__team_index(mssg.to_id),), tick,
+                                     len(self.team_messages[tick][mssg.to_id]) - 1)
 
-
-                # split in sub mssgs for every agent in the team
-                for to_id in teams[mssg.to_id]:
-                    # create a message
-                    new_message = Message(content=mssg.content, from_id=mssg.from_id, to_id=to_id)
-
-                    # save in prepr
-                    self.preprocessed_messages[tick].append(new_message)
+                # deliver it to every agent in the team (including the sender) by reference
+                self.preprocessed_messages[tick].append(MessageDelivery(mssg, frozenset(teams[mssg.to_id])))
 
             # check if it is an agent ID (as well)
             # If no team is set by the user, the agent is added to a new team with the same name as the agent's ID.
@@ -159,11 +190,123 @@ class MessageManager():
 
                 # save in private_messages mssgs
                 self.private_messages[tick].append(mssg)
+                indexes = {self.__private_index, self.__agent_index(mssg.to_id), self.__agent_index(mssg.from_id)}
+                self.__index_message(indexes, tick, len(self.private_messages[tick]) - 1)
 
                 # if the message was not already saved in the preprocessed list, save it there as well
                 if not is_team_message:
-                    self.preprocessed_messages[tick].append(mssg)
+                    self.preprocessed_messages[tick].append(MessageDelivery(mssg, frozenset([mssg.to_id])))
+
+    def __index_message(self, indexes, tick, position):
+        """ Numbers the message that was just stored at the given position in its list of that tick, and adds it to
+        the given indexes. The number is only made available once the message is in all of them. """
+        message_nr = self.__last_message_nr + 1
+        for index in indexes:
+            index.append(message_nr, tick, position)
+        self.__last_message_nr = message_nr
+
+    def __team_index(self, team):
+        if team not in self.__team_indexes:
+            self.__team_indexes[team] = MessageIndex()
+        return self.__team_indexes[team]
+
+    def __agent_index(self, agent_id):
+        if agent_id not in self.__agent_indexes:
+            self.__agent_indexes[agent_id] = MessageIndex()
+        return self.__agent_indexes[agent_id]
+
+    def __recipients_of_all(self, tick, all_agent_ids):
+        """ Returns the ids of all agents as a set, which is made once per tick. The agents do not change while their
+        messages of a tick are preprocessed, as agents are only added or removed when the actions are performed. """
+        recipients_tick, recipients = self.__all_recipients
+        if recipients_tick != tick or len(recipients) != len(all_agent_ids):
+            recipients = frozenset(all_agent_ids)
+            self.__all_recipients = (tick, recipients)
+        return recipients
+
+
+    def __spill_messages(self, last_tick):
+        """ Moves the messages of all ticks up to and including last_tick from memory to disk. Their deliveries are
+        dropped, those were delivered long ago. Messages are stored per tick in order of the ticks, so the oldest tick
+        in memory is the first one of each dictionary. """
+        stores = (self.global_messages, self.team_messages, self.private_messages, self.preprocessed_messages)
+        while True:
+            oldest_tick = min((next(iter(store)) for store in stores if len(store) > 0), default=None)
+            if oldest_tick is None or oldest_tick > last_tick:
+                return
+
+            # Write them before they are removed from memory, so they can always be found in one of both
+            messages = (self.global_messages.get(oldest_tick), self.team_messages.get(oldest_tick),
+                        self.private_messages.get(oldest_tick))
+            if messages != (None, None, None):
+                self.__history.write(oldest_tick, messages)
+            for store in stores:
+                store.pop(oldest_tick, None)
+
+    def __messages_of_tick(self, tick):
+        """ Returns the global, team and private messages of a tick (None for a type without any) from memory or
+        from disk. """
+        if self.__history is not None and tick in self.__history:
+            return self.__history.read(tick)
+        return self.global_messages.get(tick), self.team_messages.get(tick), self.private_messages.get(tick)
+
+    def snapshot_history(self):
+        """ Returns a copy of the message history, used by GridWorld.snapshot.
 
+        Returns
+        -------
+        dict
+            The history, in which the lists of messages are shared; the messages of past ticks are never altered.
+        """
+        return {"global_messages": dict(self.global_messages),
+                "team_messages": dict(self.team_messages),
+                "private_messages": dict(self.private_messages),
+                "preprocessed_messages": dict(self.preprocessed_messages),
+                "current_available_tick": self.current_available_tick,
+                "spilled_ticks": self.__history.snapshot_index() if self.__history is not None else None,
+                "last_message_nr": self.__last_message_nr,
+                "global_index": self.__global_index.copy(),
+                "private_index": self.__private_index.copy(),
+                "team_indexes": {team: index.copy() for team, index in self.__team_indexes.items()},
+                "agent_indexes": {agent_id: index.copy() for agent_id, index in self.__agent_indexes.items()}}
+
+    def restore_history(self, snapshot):
+        """ Sets the message history back to a snapshot obtained from `snapshot_history`, used by GridWorld.restore.
+
+        Parameters
+        ----------
+        snapshot : dict
+            The snapshot of the history, it can be restored more than once.
+        """
+        # Forget what was moved to disk since first, so a tick is never in memory and on disk at the same time
+        if self.__history is not None:
+            self.__history.restore_index(snapshot["spilled_ticks"] if snapshot["spilled_ticks"] is not None else {})
+        for name in ("global_messages", "team_messages", "private_messages", "preprocessed_messages"):
+            getattr(self, name).clear()
+            getattr(self, name).update(snapshot[name])
+        self.current_available_tick = snapshot["current_available_tick"]
+
+        # The message numbers after that of the snapshot are handed out again
+        self.__global_index = snapshot["global_index"].copy()
+        self.__private_index = snapshot["private_index"].copy()
+        self.__team_indexes = {team: index.copy() for team, index in snapshot["team_indexes"].items()}
+        self.__agent_indexes = {agent_id: index.copy() for agent_id, index in snapshot["agent_indexes"].items()}
+        self.__last_message_nr = snapshot["last_message_nr"]
+
+    def close(self):
+        """ Removes the messages that were moved to disk, they can no longer be fetched afterwards. """
+        if self.__history is not None:
+            self.__history.close()
+
+    @property
+    def retention_ticks(self):
+        return self.__retention_ticks
+
+    @property
+    def last_message_nr(self):
+        """ The number of the last message that was stored, 0 if there are none. Messages are numbered in the order
+        they were stored, starting at 1, see `fetch_messages_since`. """
+        return self.__last_message_nr
 
     @staticmethod
     def __check_message(mssg, this_agent_id):
@@ -217,7 +360,8 @@ class MessageManager():
         tick_to
             All messages from `tick_from` onwards to (including) `tick_to` will be collected.
         id
-            Only messages received by or sent by this agent will be collected.
+            Only messages received by or sent by this agent will be collected; all global messages, the messages of
+            the teams it is a member of, and the private messages it sent or received. "god" collects all messages.
 
         Returns
         -------
@@ -226,53 +370,78 @@ class MessageManager():
         Team messages: messages['team'][tick][team] = [list of messages]
         Private messages: messages['private'][tick] = [list of messages]
 
+        Messages are looked up in an index per team and per agent, so ticks without messages for the agent cost
+        nothing. Messages of ticks that are no longer retained in memory are read from disk, see `retention_ticks`.
+
         """
+        team_indexes, private_index = self.__indexes_visible_to(id)
+        return self.__collect_messages(self.__global_index.within(tick_from, tick_to),
+                                       [(team, index.within(tick_from, tick_to)) for team, index in team_indexes],
+                                       private_index.within(tick_from, tick_to))
+
+    def fetch_messages_since(self, message_nr, id=None):
+        """ Fetch the messages stored after the message with the given number, optionally filtered by agent id.
+
+        Meant for clients that poll for new messages; each call passes the last message number returned by the previous
+        one, and only receives the messages that were stored since. Takes time proportional to the number of returned
+        messages, regardless of how many messages were sent before.
+
+        Parameters
+        ----------
+        message_nr
+            The number of the last message the client already has, 0 to fetch all messages.
+        id
+            Only messages received by or sent by this agent will be collected, see `fetch_messages`.
+
+        Returns
+        -------
+        Tuple of the messages, in the same format as returned by `fetch_messages`, and the number of the last message
+        that was stored at the time of the call. Pass that number to the next call.
+
+        """
+        # All messages up to this number are completely stored, the ones after are fetched by the next call
+        last_message_nr = self.__last_message_nr
+        team_indexes, private_index = self.__indexes_visible_to(id)
+        messages = self.__collect_messages(self.__global_index.after(message_nr, last_message_nr),
+                                           [(team, index.after(message_nr, last_message_nr))
+                                            for team, index in team_indexes],
+                                           private_index.after(message_nr, last_message_nr))
+        return messages, last_message_nr
+
+    def __indexes_visible_to(self, id):
+        """ Returns a list of (team name, MessageIndex) tuples of the teams whose messages an agent may view, and the
+        MessageIndex of the private messages it may view. The god view, or no agent at all, views all messages. """
+        if id is None or id == "god":
+            return list(self.__team_indexes.items()), self.__private_index
+
+        teams = list(self.teams.items()) if self.teams is not None else []
+        team_indexes = [(team, self.__team_indexes[team]) for team, members in teams
+                        if id in members and team in self.__team_indexes]
+        return team_indexes, self.__agent_indexes.get(id, MessageIndex())
+
+    def __collect_messages(self, global_entries, team_entries, private_entries):
+        """ Returns the messages of the given (message nr, tick, position) entries of the indexes, made JSON
+        serializable, in the format returned by `fetch_messages`. The messages of a tick are read only once, whether
+        they are in memory or on disk. """
         messages = {'global': {}, 'team': {}, 'private': {}}
+        tick_messages = {}  # tick -> the global, team and private messages of that tick
+
+        for _, tick, position in global_entries:
+            mssg = self.__read_tick(tick_messages, tick)[0][position]
+            messages['global'].setdefault(tick, []).append(mssg.toJSON())
 
-        # loop through all requested ticks
-        for t in range(tick_from, tick_to + 1):
-            # initialize the message objects to return
-            # messages['global'][t] = None
-            # messages['team'][t] = None
-            # messages['private'][t] = None
-
-            # fetch any existing glolbal messages for this tick
-            if t in self.global_messages:
-                # make the messages JSON serializable and add
-                messages['global'][t] = [mssg.toJSON() for mssg in self.global_messages[t]]
-
-            # fetch any team messages
-            if t in self.team_messages:
-                if t not in messages['team']:
-                    messages['team'][t] = {}
-
-                # fetch all team messages
-                if id is None:
-                    # make them JSON serializable
-                    messages['team'][t] = [mssg.toJSON() for mssg in self.team_messages[t]]
-
-                # fetch team messages of the team of which the agent is a member
-                else:
-                    for team in self.teams:
-                        if (id in team or id == "god") and team in self.team_messages[t]:
-                            # make the messages JSON serializable and add
-                            messages['team'][t][team] = [mssg.toJSON() for mssg in self.team_messages[t][team]]
-
-
-            # fetch private messages
-            if t in self.private_messages:
-                # fetch all private messages
-                if id is None:
-                    # make the messages JSON serializable and add
-                    messages['private'][t] = [mssg.toJSON() for mssg in self.private_messages[t]]
-
-                # fetch private messages sent to or received by the specified agent
-                else:
-                    messages['private'][t] = []
-                    for message in self.private_messages[t]:
-                        # only private messages addressed to or sent by our agent are requested
-                        if message.from_id == id or message.to_id == id or id == "god":
-                            # make the messages JSON serializable and add
-                            messages['private'][t].append(message.toJSON())
+        for team, entries in team_entries:
+            for _, tick, position in entries:
+                mssg = self.__read_tick(tick_messages, tick)[1][team][position]
+                messages['team'].setdefault(tick, {}).setdefault(team, []).append(mssg.toJSON())
+
+        for _, tick, position in private_entries:
+            mssg = self.__read_tick(tick_messages, tick)[2][position]
+            messages['private'].setdefault(tick, []).append(mssg.toJSON())
 
         return messages
+
+    def __read_tick(self, tick_messages, tick):
+        if tick not in tick_messages:
+            tick_messages[tick] = self.__messages_of_tick(tick)
+        return tick_messages[tick]
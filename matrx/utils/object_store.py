@@ -0,0 +1,286 @@
+import numpy as np
+
+
+class StoredAttribute:
+
+    def __init__(self):
+        """ An attribute of an EnvObject that is kept in an ObjectStore while the object is in one.
+
+        While the object is not in a store, the value is kept on the object itself as any other attribute. While it is,
+        the value only exists in the column of the store with the same name as this attribute.
+
+        """
+        self.__name = None
+
+    def __set_name__(self, owner, name):
+        self.__name = name
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+
+        store = obj.__dict__.get("_store")
+        if store is not None:
+            return store.get(self.__name, obj.__dict__["_store_row"])
+
+        try:
+            return obj.__dict__[self.__name]
+        except KeyError:
+            raise AttributeError(f"'{type(obj).__name__}' object has no attribute '{self.__name}'")
+
+    def __set__(self, obj, value):
+        store = obj.__dict__.get("_store")
+        if store is not None:
+            store.set(self.__name, obj.__dict__["_store_row"], value)
+        else:
+            obj.__dict__[self.__name] = value
+
+
+class ObjectStore:
+
+    # The attributes of an EnvObject that are stored in a column, with the type of that column. The visualization
+    # attributes are stored as objects, as they are not restricted to a single type.
+    ATTRIBUTE_COLUMNS = {"is_traversable": bool,
+                         "is_movable": bool,
+                         "visualize_size": object,
+                         "visualize_shape": object,
+                         "visualize_colour": object,
+                         "visualize_depth": object,
+                         "visualize_opacity": object}
+
+    def __init__(self, capacity=1024):
+        """ A columnar store of the data of all objects and agents in a GridWorld, in NumPy arrays.
+
+        Each object added to the store gets a row, after which its location and the attributes in ATTRIBUTE_COLUMNS
+        are only kept in the columns of that row; the object itself acts as a view on it. This allows for vectorized
+        operations over all objects, such as range queries, traversability maps and serialization.
+
+        Rows of removed objects are reused, so the order of the rows is not the order in which objects were added.
+
+        Parameters
+        ----------
+        capacity : int, optional (default=1024)
+            The number of rows to allocate up front, the store doubles its capacity whenever it is full.
+
+        """
+        self.__capacity = capacity
+        self.__columns = {"obj_id": np.empty(capacity, dtype=object),
+                          "alive": np.zeros(capacity, dtype=bool),
+                          "class_id": np.zeros(capacity, dtype=np.int32),
+                          "x": np.zeros(capacity, dtype=np.int64),
+                          "y": np.zeros(capacity, dtype=np.int64)}
+        for name, dtype in self.ATTRIBUTE_COLUMNS.items():
+            self.__columns[name] = np.empty(capacity, dtype=dtype)
+
+        self.__free_rows = list(range(capacity - 1, -1, -1))  # popped from the end, so rows are filled from the start
+        self.__rows = {}  # object id -> row
+        self.__classes = []  # class id -> class
+        self.__class_ids = {}  # class -> class id
+
+    def add(self, obj):
+        """ Adds an object (or agent) to the store, from then on its data is kept in the store.
+
+        Parameters
+        ----------
+        obj : EnvObject
+            The object to add, it should not already be in a store.
+
+        Returns
+        -------
+        int
+            The row of the object.
+        """
+        if obj.__dict__.get("_store") is not None:
+            raise Exception(f"The object with id {obj.obj_id} is already in an ObjectStore.")
+
+        if len(self.__free_rows) == 0:
+            self.__grow()
+        row = self.__free_rows.pop()
+
+        location = obj.location
+        self.__columns["obj_id"][row] = obj.obj_id
+        self.__columns["alive"][row] = True
+        self.__columns["class_id"][row] = self.__get_class_id(type(obj))
+        self.__columns["x"][row] = location[0]
+        self.__columns["y"][row] = location[1]
+        for name in self.ATTRIBUTE_COLUMNS.keys():
+            self.__columns[name][row] = obj.__dict__.pop(name)
+
+        obj.__dict__["_store"] = self
+        obj.__dict__["_store_row"] = row
+        self.__rows[obj.obj_id] = row
+        return row
+
+    def remove(self, obj):
+        """ Removes an object from the store, its data is moved back to the object itself.
+
+        Parameters
+        ----------
+        obj : EnvObject
+            The object to remove.
+        """
+        row = self.__rows.pop(obj.obj_id)
+        location = obj.location
+
+        for name in self.ATTRIBUTE_COLUMNS.keys():
+            obj.__dict__[name] = self.get(name, row)
+            self.__columns[name][row] = None
+        del obj.__dict__["_store"]
+        del obj.__dict__["_store_row"]
+        obj.location = location
+
+        self.__columns["obj_id"][row] = None
+        self.__columns["alive"][row] = False
+        self.__free_rows.append(row)
+
+    def get(self, name, row):
+        """ Returns the value of a column in a row, as a Python object. """
+        value = self.__columns[name][row]
+        return value.item() if isinstance(value, np.generic) else value
+
+    def set(self, name, row, value):
+        """ Sets the value of a column in a row. """
+        self.__columns[name][row] = value
+
+    def get_location(self, row):
+        """ Returns the location of the object in a row, as an (x, y) tuple. """
+        return int(self.__columns["x"][row]), int(self.__columns["y"][row])
+
+    def set_location(self, row, location):
+        """ Sets the location of the object in a row. """
+        self.__columns["x"][row] = location[0]
+        self.__columns["y"][row] = location[1]
+
+    def objects_in_range(self, location, sense_range, object_type=None):
+        """ Returns the ids of all objects of a type within a range around a location, in a single vectorized pass.
+
+        Parameters
+        ----------
+        location : tuple
+            The (x, y) location around which to search.
+        sense_range : float
+            The maximum (Euclidean) distance between the location and an object.
+        object_type : type, str, optional (default=None)
+            The class of objects to return. None or "*" return all objects.
+
+        Returns
+        -------
+        list
+            The ids of the objects in range, in order of their rows.
+        """
+        mask = self.__columns["alive"] & ((self.__columns["x"] - location[0]) ** 2 +
+                                          (self.__columns["y"] - location[1]) ** 2 <= sense_range ** 2)
+        if object_type is not None and object_type != "*":
+            mask &= np.isin(self.__columns["class_id"], self.__get_class_ids_of(object_type))
+        return self.__columns["obj_id"][mask].tolist()
+
+    def traversability_map(self, shape):
+        """ Returns which grid locations can be traversed, in a single vectorized pass.
+
+        Parameters
+        ----------
+        shape : tuple
+            The (width, height) of the grid.
+
+        Returns
+        -------
+        numpy.ndarray
+            A boolean array indexed as [y, x], False at each location with at least one intraversable object or agent.
+        """
+        traversable = np.ones((shape[1], shape[0]), dtype=bool)
+        blocking = self.__columns["alive"] & ~self.__columns["is_traversable"]
+        traversable[self.__columns["y"][blocking], self.__columns["x"][blocking]] = False
+        return traversable
+
+    def to_columns(self):
+        """ Returns the data of all stored objects per column, for serialization.
+
+        Returns
+        -------
+        dict
+            The column names as keys ("obj_id", "class", "location" and those in ATTRIBUTE_COLUMNS) with a list of the
+            values of all objects, in order of their rows.
+        """
+        alive = self.__columns["alive"]
+        columns = {"obj_id": self.__columns["obj_id"][alive].tolist(),
+                   "class": [self.__classes[class_id].__name__ for class_id in self.__columns["class_id"][alive]],
+                   "location": np.stack([self.__columns["x"][alive], self.__columns["y"][alive]], axis=1).tolist()}
+        for name in self.ATTRIBUTE_COLUMNS.keys():
+            columns[name] = self.__columns[name][alive].tolist()
+        return columns
+
+    def snapshot(self):
+        """ Returns a copy of the contents of this store, used by GridWorld.snapshot.
+
+        Returns
+        -------
+        dict
+            The copied columns, rows and classes. The values in the object columns are shared, not copied.
+        """
+        return {"columns": {name: column.copy() for name, column in self.__columns.items()},
+                "capacity": self.__capacity,
+                "free_rows": list(self.__free_rows),
+                "rows": dict(self.__rows),
+                "classes": list(self.__classes)}
+
+    def restore(self, snapshot):
+        """ Sets the contents of this store back to a snapshot obtained from `snapshot`, used by GridWorld.restore.
+
+        The objects themselves are not altered; their rows should be restored along with the store.
+
+        Parameters
+        ----------
+        snapshot : dict
+            The snapshot of this store, it can be restored more than once.
+        """
+        self.__columns = {name: column.copy() for name, column in snapshot["columns"].items()}
+        self.__capacity = snapshot["capacity"]
+        self.__free_rows = list(snapshot["free_rows"])
+        self.__rows = dict(snapshot["rows"])
+        self.__classes = list(snapshot["classes"])
+        self.__class_ids = {cls: class_id for class_id, cls in enumerate(self.__classes)}
+
+    def copy(self):
+        """ Returns a copy of this store, used by GridWorld.fork. The objects keep their rows in the copy, but refer to
+        this store until they are copied themselves.
+
+        Returns
+        -------
+        ObjectStore
+            The copy, with copied columns. The values in the object columns are shared, not copied.
+        """
+        store = ObjectStore(capacity=0)
+        store.__columns = {name: column.copy() for name, column in self.__columns.items()}
+        store.__capacity = self.__capacity
+        store.__free_rows = list(self.__free_rows)
+        store.__rows = dict(self.__rows)
+        store.__classes = list(self.__classes)
+        store.__class_ids = dict(self.__class_ids)
+        return store
+
+    def __get_class_id(self, cls):
+        class_id = self.__class_ids.get(cls)
+        if class_id is None:
+            class_id = len(self.__classes)
+            self.__classes.append(cls)
+            self.__class_ids[cls] = class_id
+        return class_id
+
+    def __get_class_ids_of(self, object_type):
+        """ Returns the ids of all stored classes that are (a subclass of) the given type. """
+        return [class_id for class_id, cls in enumerate(self.__classes) if issubclass(cls, object_type)]
+
+    def __grow(self):
+        for name, column in self.__columns.items():
+            extension = np.zeros(self.__capacity, dtype=column.dtype)
+            if column.dtype == object:
+                extension[:] = None
+            self.__columns[name] = np.concatenate([column, extension])
+        self.__free_rows = list(range(2 * self.__capacity - 1, self.__capacity - 1, -1))
+        self.__capacity *= 2
+
+    def __contains__(self, obj_id):
+        return obj_id in self.__rows
+
+    def __len__(self):
+        return len(self.__rows)
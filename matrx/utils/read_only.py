@@ -0,0 +1,88 @@
+import copy
+
+
+def _read_only(method_name):
+    def method(self, *args, **kwargs):
+        raise TypeError(f"'{type(self).__name__}' object is read-only and does not support {method_name}; make a copy "
+                        f"of it (e.g. with dict(...), list(...) or copy.copy(...)) to alter it")
+    method.__name__ = method_name
+    return method
+
+
+class ReadOnlyDict(dict):
+    """ A dictionary that cannot be altered, used for the properties of objects in a state shared by several agents.
+
+    As it is a dict subclass, it can be read, iterated over, compared to other dictionaries and serialized to JSON as
+    any other dictionary. A (shallow or deep) copy of it is a regular, mutable dict.
+    """
+
+    __setitem__ = _read_only("item assignment")
+    __delitem__ = _read_only("item deletion")
+    __ior__ = _read_only("|=")
+    clear = _read_only("clear")
+    pop = _read_only("pop")
+    popitem = _read_only("popitem")
+    setdefault = _read_only("setdefault")
+    update = _read_only("update")
+
+    def __copy__(self):
+        return dict(self)
+
+    def __deepcopy__(self, memo):
+        return {copy.deepcopy(key, memo): copy.deepcopy(value, memo) for key, value in self.items()}
+
+    def __reduce__(self):
+        return ReadOnlyDict, (dict(self),)
+
+
+class ReadOnlyList(list):
+    """ A list that cannot be altered, the list counterpart of ReadOnlyDict. A copy of it is a regular, mutable list.
+    """
+
+    __setitem__ = _read_only("item assignment")
+    __delitem__ = _read_only("item deletion")
+    __iadd__ = _read_only("+=")
+    __imul__ = _read_only("*=")
+    append = _read_only("append")
+    clear = _read_only("clear")
+    extend = _read_only("extend")
+    insert = _read_only("insert")
+    pop = _read_only("pop")
+    remove = _read_only("remove")
+    reverse = _read_only("reverse")
+    sort = _read_only("sort")
+
+    def __copy__(self):
+        return list(self)
+
+    def __deepcopy__(self, memo):
+        return [copy.deepcopy(value, memo) for value in self]
+
+    def __reduce__(self):
+        return ReadOnlyList, (list(self),)
+
+
+def freeze(value):
+    """ Returns a read-only version of a value, recursively converting all dictionaries and lists it contains.
+
+    Dictionaries become a ReadOnlyDict, lists a ReadOnlyList and tuples a tuple of frozen values. Values that are
+    already read-only are returned as is, any other value (numbers, strings, classes, etc.) is returned unchanged.
+
+    Parameters
+    ----------
+    value
+        The value to freeze, for example the properties of an object.
+
+    Returns
+    -------
+        The read-only version of the value.
+    """
+    if isinstance(value, (ReadOnlyDict, ReadOnlyList)):
+        return value
+    if isinstance(value, dict):
+        return ReadOnlyDict((key, freeze(val)) for key, val in value.items())
+    if isinstance(value, list):
+        return ReadOnlyList(freeze(val) for val in value)
+    if type(value) is tuple:  # named tuples are left as is
+        return tuple(freeze(val) for val in value)
+    return value
@@ -0,0 +1,311 @@
+import math
+from collections import OrderedDict
+
+
+class SpatialIndex:
+
+    def __init__(self, cell_size=4):
+        """ A cell-bucketed index over the locations of all objects and agents in a GridWorld.
+
+        The GridWorld is divided into square cells of `cell_size` by `cell_size` grid locations. Every object in the
+        index is stored in the bucket of the cell its location falls in. A range query only visits the cells that
+        overlap with the queried range, making its cost proportional to the number of covered cells instead of the
+        number of objects in the world.
+
+        The owner of the index is responsible for keeping it in sync; call `update` whenever an indexed object changed
+        its location, and `remove` when it is carried or removed from the world.
+
+        Objects and agents are stored separately, so that query results are returned in the same order as the
+        GridWorld's `environment_objects` followed by its `registered_agents`.
+
+        Parameters
+        ----------
+        cell_size : int, optional (default=4)
+            The width and height of a single cell in grid locations.
+
+        """
+        self.__cell_size = cell_size
+
+        self.__buckets = {}  # cell coordinate (tuple) -> set of object ids in that cell
+        self.__obj_cells = {}  # object id -> the cell coordinate the object is currently stored in
+
+        # All indexed objects, in insertion order, to allow for linear scans and ordering of query results
+        self.__env_objects = OrderedDict()
+        self.__agents = OrderedDict()
+        self.__order = {}  # object id -> sort key that reflects the insertion order (objects before agents)
+        self.__counter = 0
+
+    def add(self, obj, is_agent=False):
+        """ Adds an object (or agent) to the index.
+
+        Parameters
+        ----------
+        obj : EnvObject
+            The object to add, it is indexed on its current location.
+        is_agent : bool, optional (default=False)
+            Whether the object is an agent's body, agents are always returned after all other objects.
+        """
+        if obj.obj_id in self.__obj_cells:
+            self.remove(obj.obj_id)
+
+        if is_agent:
+            self.__agents[obj.obj_id] = obj
+        else:
+            self.__env_objects[obj.obj_id] = obj
+        self.__order[obj.obj_id] = (is_agent, self.__counter)
+        self.__counter += 1
+
+        cell = self.__cell_of(obj.location)
+        self.__obj_cells[obj.obj_id] = cell
+        self.__buckets.setdefault(cell, set()).add(obj.obj_id)
+
+    def remove(self, obj_id):
+        """ Removes an object from the index.
+
+        Parameters
+        ----------
+        obj_id : str
+            The id of the object to remove.
+
+        Returns
+        -------
+        bool
+            True if the object was indexed and is now removed, False otherwise.
+        """
+        cell = self.__obj_cells.pop(obj_id, None)
+        if cell is None:
+            return False
+
+        self.__discard_from_bucket(obj_id, cell)
+        if self.__env_objects.pop(obj_id, None) is None:
+            self.__agents.pop(obj_id)
+        self.__order.pop(obj_id)
+        return True
+
+    def update(self, obj):
+        """ Moves an object to the bucket of its current location.
+
+        Parameters
+        ----------
+        obj : EnvObject
+            The object whose location changed.
+        """
+        old_cell = self.__obj_cells.get(obj.obj_id)
+        if old_cell is None:
+            return
+
+        new_cell = self.__cell_of(obj.location)
+        if new_cell != old_cell:
+            self.__discard_from_bucket(obj.obj_id, old_cell)
+            self.__obj_cells[obj.obj_id] = new_cell
+            self.__buckets.setdefault(new_cell, set()).add(obj.obj_id)
+
+    def query(self, location, sense_range, object_type=None):
+        """ Returns all objects of a type within a range around a location.
+
+        Parameters
+        ----------
+        location : tuple
+            The (x, y) location around which to search.
+        sense_range : float
+            The maximum (Euclidean) distance between the location and an object.
+        object_type : type, str, optional (default=None)
+            The class of objects to return. None or "*" return all objects.
+
+        Returns
+        -------
+        OrderedDict
+            The objects in range with their ids as keys. Objects come before agents, both in order of insertion.
+        """
+        if object_type == "*":
+            object_type = None
+
+        objs_in_range = OrderedDict()
+        for obj, _ in self.__objects_in_range(location, sense_range):
+            if object_type is None or isinstance(obj, object_type):
+                objs_in_range[obj.obj_id] = obj
+        return objs_in_range
+
+    def query_capabilities(self, location, capabilities):
+        """ Returns all objects within the range of any of several object types around a location, in a single pass.
+
+        The index is searched once with the largest range, after which each object is tested against the range of its
+        type. The result equals that of merging the results of `query` for each type (in order) into one dictionary.
+
+        Parameters
+        ----------
+        location : tuple
+            The (x, y) location around which to search.
+        capabilities : dict
+            The object types (classes, or None or "*" for all objects) as keys, and their range as values. For example
+            as returned by SenseCapability.get_capabilities().
+
+        Returns
+        -------
+        OrderedDict
+            The objects in range of their type with their ids as keys. Objects that match the first type come first,
+            then the new objects matching the second type, etc.
+        """
+        types_and_ranges = [(None if obj_type == "*" else obj_type, sense_range)
+                            for obj_type, sense_range in capabilities.items()]
+        if len(types_and_ranges) == 0:
+            return OrderedDict()
+        max_range = max(sense_range for _, sense_range in types_and_ranges)
+
+        # For each object find the first type it can be perceived as, within the range of that type
+        perceived = []
+        for obj, distance in self.__objects_in_range(location, max_range):
+            for type_idx, (obj_type, sense_range) in enumerate(types_and_ranges):
+                if distance <= sense_range and (obj_type is None or isinstance(obj, obj_type)):
+                    perceived.append((type_idx, obj))
+                    break
+
+        # Order them on that type, the sort is stable so within a type the objects keep their order
+        if len(types_and_ranges) > 1:
+            perceived.sort(key=lambda type_and_obj: type_and_obj[0])
+        return OrderedDict((obj.obj_id, obj) for _, obj in perceived)
+
+    def __objects_in_range(self, location, sense_range):
+        """ Returns a list of (object, distance) tuples of all objects within range, objects first and then agents,
+        both in order of insertion. """
+        x, y = location[0], location[1]
+
+        # Determine which cells overlap with the range, when that are more cells than objects a linear scan is faster
+        nr_cells = math.inf
+        if sense_range != math.inf:
+            min_cx, min_cy = self.__cell_of((x - sense_range, y - sense_range))
+            max_cx, max_cy = self.__cell_of((x + sense_range, y + sense_range))
+            nr_cells = (max_cx - min_cx + 1) * (max_cy - min_cy + 1)
+
+        if nr_cells >= len(self.__obj_cells):
+            in_range = []
+            for objects in (self.__env_objects, self.__agents):
+                for obj in objects.values():
+                    distance = self.__distance(obj, x, y)
+                    if distance <= sense_range:
+                        in_range.append((obj, distance))
+            return in_range
+
+        # Collect the ids in all covered cells, iterating over the occupied buckets when there are fewer of those
+        candidates = []
+        if nr_cells > len(self.__buckets):
+            for (cx, cy), bucket in self.__buckets.items():
+                if min_cx <= cx <= max_cx and min_cy <= cy <= max_cy:
+                    candidates.extend(bucket)
+        else:
+            for cx in range(min_cx, max_cx + 1):
+                for cy in range(min_cy, max_cy + 1):
+                    bucket = self.__buckets.get((cx, cy))
+                    if bucket:
+                        candidates.extend(bucket)
+
+        in_range = []
+        for obj_id in candidates:
+            obj = self.__env_objects.get(obj_id)
+            if obj is None:
+                obj = self.__agents[obj_id]
+            distance = self.__distance(obj, x, y)
+            if distance <= sense_range:
+                in_range.append((obj, distance))
+
+        # Return them in the same order as a linear scan would
+        in_range.sort(key=lambda obj_and_distance: self.__order[obj_and_distance[0].obj_id])
+        return in_range
+
+    def snapshot_order(self):
+        """ Returns a copy of which objects are indexed and in what order, used by GridWorld.snapshot.
+
+        Returns
+        -------
+        dict
+            The indexed objects and their sort keys. The objects themselves are shared, not copied.
+        """
+        return {"env_objects": list(self.__env_objects.items()),
+                "agents": list(self.__agents.items()),
+                "order": dict(self.__order),
+                "counter": self.__counter}
+
+    def restore_order(self, snapshot):
+        """ Sets which objects are indexed and in what order back to a snapshot obtained from `snapshot_order`, used by
+        GridWorld.restore. Objects that are not in the snapshot are removed, those that are only in the snapshot are
+        added at their current location. The objects that are in both stay in their bucket, call `update` for those
+        that moved since.
+
+        Parameters
+        ----------
+        snapshot : dict
+            The snapshot of the order of this index, it can be restored more than once.
+        """
+        for obj_id in self.__obj_cells.keys() - snapshot["order"].keys():
+            self.__discard_from_bucket(obj_id, self.__obj_cells.pop(obj_id))
+
+        self.__env_objects = OrderedDict(snapshot["env_objects"])
+        self.__agents = OrderedDict(snapshot["agents"])
+        self.__order = dict(snapshot["order"])
+        self.__counter = snapshot["counter"]
+
+        for obj_id in self.__order.keys() - self.__obj_cells.keys():
+            obj = self.__env_objects.get(obj_id)
+            if obj is None:
+                obj = self.__agents[obj_id]
+            cell = self.__cell_of(obj.location)
+            self.__obj_cells[obj_id] = cell
+            self.__buckets.setdefault(cell, set()).add(obj_id)
+
+    def copy(self, copy_objects):
+        """ Returns a copy of this index, used by GridWorld.fork. The buckets and order are copied, the objects are
+        not; the copy indexes the objects in the dictionaries returned by `copy_objects`.
+
+        Parameters
+        ----------
+        copy_objects : callable
+            Called with the dictionary of the indexed objects, and with that of the indexed agents. Returns the
+            dictionary with the same keys (in the same order) that the copy should use.
+
+        Returns
+        -------
+        SpatialIndex
+            The copy.
+        """
+        index = SpatialIndex(cell_size=self.__cell_size)
+        index.__buckets = {cell: set(bucket) for cell, bucket in self.__buckets.items()}
+        index.__obj_cells = dict(self.__obj_cells)
+        index.__env_objects = copy_objects(self.__env_objects)
+        index.__agents = copy_objects(self.__agents)
+        index.__order = dict(self.__order)
+        index.__counter = self.__counter
+        return index
+
+    def sort_key(self, obj_id):
+        """ Returns the key that orders objects as the query results do, or None if the object is not indexed.
+
+        Parameters
+        ----------
+        obj_id : str
+            The id of the object.
+        """
+        return self.__order.get(obj_id)
+
+    def __contains__(self, obj_id):
+        return obj_id in self.__obj_cells
+
+    def __len__(self):
+        return len(self.__obj_cells)
+
+    @staticmethod
+    def __distance(obj, x, y):
+        loc = obj.location
+        return math.sqrt((loc[0] - x) ** 2 + (loc[1] - y) ** 2)
+
+    def __cell_of(self, location):
+        return int(location[0] // self.__cell_size), int(location[1] // self.__cell_size)
+
+    def __discard_from_bucket(self, obj_id, cell):
+        bucket = self.__buckets[cell]
+        bucket.discard(obj_id)
+        if not bucket:
+            del self.__buckets[cell]
+
+    @property
+    def cell_size(self):
+        return self.__cell_size
@@ -0,0 +1,153 @@
+import time
+
+
+class TickClock:
+    # What to do when a tick took longer than the tick duration
+    CATCH_UP = "catch_up"  # keep the original schedule; the next ticks do not wait until they are back on schedule
+    DROP = "drop"  # drop the missed ticks from the schedule; the next tick gets a full tick duration again
+    OVERRUN_POLICIES = (CATCH_UP, DROP)
+
+    def __init__(self, tick_duration, overrun_policy=DROP, max_catch_up_ticks=10):
+        """ A deadline-based clock that paces the ticks of a GridWorld, using a monotonic clock.
+
+        Each tick has a deadline at which the next tick should start. The deadlines are a fixed tick duration apart, so
+        the time a tick takes does not accumulate as drift. When a tick ends after its deadline (an overrun), the
+        overrun policy decides on the next deadline. With CATCH_UP the schedule is kept, so the next ticks start
+        right away until the clock is back on schedule (or until it is behind more than max_catch_up_ticks, after which
+        the missed ticks are dropped after all). With DROP the schedule starts anew from the end of the late tick.
+
+        The lag (how late a tick ended) is recorded for every tick, see `lag_statistics`.
+
+        Parameters
+        ----------
+        tick_duration : float
+            The number of seconds between the start of two ticks.
+        overrun_policy : str, optional (default="drop")
+            One of TickClock.CATCH_UP or TickClock.DROP.
+        max_catch_up_ticks : int, optional (default=10)
+            With CATCH_UP, the maximum number of tick durations the clock is allowed to be behind.
+
+        Raises
+        ------
+        ValueError
+            When the overrun policy is not known.
+
+        """
+        if overrun_policy not in self.OVERRUN_POLICIES:
+            raise ValueError(f"The given overrun policy {overrun_policy} is not known, should be one of "
+                             f"{self.OVERRUN_POLICIES}.")
+
+        self.__tick_duration = tick_duration
+        self.__overrun_policy = overrun_policy
+        self.__max_catch_up_ticks = max_catch_up_ticks
+
+        self.__tick_start = None  # the (monotonic) time at which the current tick started
+        self.__deadline = None  # the (monotonic) time at which the next tick should start, None when not scheduled
+
+        # The lag statistics
+        self.__nr_ticks = 0
+        self.__nr_overruns = 0
+        self.__nr_dropped_ticks = 0
+        self.__total_lag = 0.
+        self.__max_lag = 0.
+        self.__last_lag = 0.
+
+    def reset(self):
+        """ Forgets the current schedule, the next tick starts a new one. Used when the GridWorld was paused, so it
+        does not try to catch up on the paused time. """
+        self.__deadline = None
+
+    def start_tick(self):
+        """ Marks the start of a tick, and sets its deadline if there is no schedule yet. """
+        self.__tick_start = time.monotonic()
+        if self.__deadline is None:
+            self.__deadline = self.__tick_start + self.__tick_duration
+
+    def time_until_deadline(self):
+        """ Returns the number of seconds until the deadline of the current tick, negative when it passed already. """
+        return self.__deadline - time.monotonic()
+
+    def sleep_until_deadline(self, wake_event=None):
+        """ Sleeps until the deadline of the current tick and schedules the next one, unless woken up before that.
+
+        Parameters
+        ----------
+        wake_event : threading.Event, optional (default=None)
+            An event that, when set, interrupts the sleep. For example when the GridWorld is paused or its speed is
+            changed. The caller should clear it before calling this method.
+
+        Returns
+        -------
+        bool
+            True if the deadline was reached and the next tick was scheduled, False if woken up by the event before
+            the deadline. In the latter case, call this method again to continue waiting.
+        """
+        remaining = self.time_until_deadline()
+        if remaining > 0:
+            if wake_event is None:
+                time.sleep(remaining)
+            elif wake_event.wait(remaining):
+                return False
+
+        # The tick is late when its deadline already passed before sleeping
+        self.__schedule_next_tick(lag=max(0., -remaining))
+        return True
+
+    def tick_duration_so_far(self):
+        """ Returns the number of seconds since the start of the current tick. """
+        return time.monotonic() - self.__tick_start
+
+    def __schedule_next_tick(self, lag):
+        now = time.monotonic()
+
+        self.__nr_ticks += 1
+        self.__total_lag += lag
+        self.__max_lag = max(self.__max_lag, lag)
+        self.__last_lag = lag
+
+        # On schedule, the next tick starts exactly one tick duration after the deadline of this one
+        next_deadline = self.__deadline + self.__tick_duration
+        if lag > 0:
+            self.__nr_overruns += 1
+            max_lag = self.__max_catch_up_ticks * self.__tick_duration
+            if self.__overrun_policy == self.DROP or lag > max_lag:
+                # Start a new schedule from now on, all deadlines that passed are dropped
+                if self.__tick_duration > 0:
+                    self.__nr_dropped_ticks += int(lag // self.__tick_duration)
+                next_deadline = now + self.__tick_duration
+
+        self.__deadline = next_deadline
+
+    def lag_statistics(self):
+        """ Returns statistics on how late the ticks ended compared to their deadline.
+
+        Returns
+        -------
+        dict
+            The number of ticks ("nr_ticks"), the number of ticks that ended after their deadline ("nr_overruns"),
+            the number of deadlines dropped because of overruns ("nr_dropped_ticks"), and the mean, maximum and
+            last lag in seconds ("mean_lag", "max_lag" and "last_lag"). The lag of a tick is the time by which it
+            ended after its deadline, zero when it ended in time.
+        """
+        return {"nr_ticks": self.__nr_ticks,
+                "nr_overruns": self.__nr_overruns,
+                "nr_dropped_ticks": self.__nr_dropped_ticks,
+                "mean_lag": self.__total_lag / self.__nr_ticks if self.__nr_ticks > 0 else 0.,
+                "max_lag": self.__max_lag,
+                "last_lag": self.__last_lag}
+
+    @property
+    def tick_duration(self):
+        return self.__tick_duration
+
+    @tick_duration.setter
+    def tick_duration(self, tick_duration):
+        """ Changes the tick duration, the deadline of the current tick moves along with it. """
+        if tick_duration != self.__tick_duration:
+            if self.__deadline is not None and self.__tick_start is not None:
+                self.__deadline = self.__tick_start + tick_duration
+            self.__tick_duration = tick_duration
+
+    @property
+    def overrun_policy(self):
+        return self.__overrun_policy
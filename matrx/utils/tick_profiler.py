@@ -0,0 +1,106 @@
+import time
+from collections import deque
+
+import numpy as np
+
+
+class TickProfiler:
+    # The phases of a tick, in the order in which they (first) occur in GridWorld.__step
+    PHASES = ("goals", "loggers", "perception", "brains", "messages", "api", "actions", "objects", "sleep")
+
+    def __init__(self, window=1000):
+        """ Records the wall time spent in each phase of every tick of a GridWorld.
+
+        The GridWorld calls `start_tick` at the start of a tick, `lap` at the end of each (part of a) phase and
+        `end_tick` when the tick is done. A lap attributes the time since the previous lap to the given phase, so phases
+        that are interleaved (e.g. perception and brains, which alternate per agent) are summed over the tick.
+
+        Only the times of the last `window` ticks are kept, from which rolling percentiles are computed.
+
+        Parameters
+        ----------
+        window : int, optional (default=1000)
+            The number of most recent ticks over which the percentiles are computed.
+
+        """
+        self.__window = window
+        self.__times = {phase: deque(maxlen=window) for phase in self.PHASES + ("total",)}
+        self.__ticks = deque(maxlen=window)  # the tick numbers of the recorded ticks
+        self.__current = dict.fromkeys(self.PHASES, 0.)
+        self.__last_lap = None
+        self.__nr_ticks_profiled = 0
+
+    def start_tick(self):
+        """ Starts the timing of a new tick, any times of an unfinished previous tick are discarded. """
+        self.__current = dict.fromkeys(self.PHASES, 0.)
+        self.__last_lap = time.perf_counter()
+
+    def lap(self, phase):
+        """ Attributes the time since the start of the tick or the previous lap to the given phase. """
+        now = time.perf_counter()
+        self.__current[phase] += now - self.__last_lap
+        self.__last_lap = now
+
+    def end_tick(self, tick_nr):
+        """ Stores the times of the phases of the current tick.
+
+        Parameters
+        ----------
+        tick_nr : int
+            The number of the tick that ended.
+        """
+        for phase, duration in self.__current.items():
+            self.__times[phase].append(duration)
+        self.__times["total"].append(sum(self.__current.values()))
+        self.__ticks.append(tick_nr)
+        self.__nr_ticks_profiled += 1
+
+    def percentiles(self, percentiles=(50, 90, 99)):
+        """ Returns the rolling percentiles of the time spent in each phase, over the last ticks within the window.
+
+        Parameters
+        ----------
+        percentiles : iterable of int, optional (default=(50, 90, 99))
+            The percentiles to compute.
+
+        Returns
+        -------
+        dict
+            The phases (and "total") as keys, with a dictionary of "p<percentile>" keys and the times in seconds as
+            values. Empty when no tick was profiled yet.
+        """
+        if len(self.__ticks) == 0:
+            return {}
+
+        summary = {}
+        for phase, times in self.__times.items():
+            values = np.percentile(np.fromiter(times, dtype=float, count=len(times)), percentiles)
+            summary[phase] = {f"p{percentile}": float(value) for percentile, value in zip(percentiles, values)}
+        return summary
+
+    def summary(self, percentiles=(50, 90, 99)):
+        """ Returns the percentiles along with the times of the last profiled tick, JSON serializable.
+
+        Parameters
+        ----------
+        percentiles : iterable of int, optional (default=(50, 90, 99))
+            The percentiles to compute.
+
+        Returns
+        -------
+        dict
+            With the number of ticks profiled in total ("nr_ticks_profiled"), the number of ticks within the window
+            ("window"), the tick number of the last profiled tick ("last_tick"), the times of that tick per phase
+            ("last") and the rolling percentiles ("percentiles", see `percentiles`).
+        """
+        last_tick = self.__ticks[-1] if len(self.__ticks) > 0 else None
+        last = {phase: times[-1] for phase, times in self.__times.items()} if last_tick is not None else {}
+        return {"nr_ticks_profiled": self.__nr_ticks_profiled,
+                "window": len(self.__ticks),
+                "last_tick": last_tick,
+                "last": last,
+                "percentiles": self.percentiles(percentiles)}
+
+    @property
+    def window(self):
+        return self.__window
@@ -0,0 +1,174 @@
+class WorldEvent:
+
+    def __init__(self, tick):
+        """ Something that happened in a GridWorld, emitted through its EventBus (see GridWorld.event_bus).
+
+        Subscribe to WorldEvent to receive all events, or to one of its subclasses to only receive those.
+
+        Parameters
+        ----------
+        tick : int
+            The tick at which it happened.
+
+        """
+        self.tick = tick
+
+    def __repr__(self):
+        attributes = ", ".join(f"{name}={value!r}" for name, value in vars(self).items())
+        return f"{type(self).__name__}({attributes})"
+
+
+class ObjectAdded(WorldEvent):
+
+    def __init__(self, tick, obj_id):
+        """ An object or agent was added to the world, e.g. when it was dropped. """
+        super().__init__(tick)
+        self.obj_id = obj_id
+
+
+class ObjectRemoved(WorldEvent):
+
+    def __init__(self, tick, obj_id):
+        """ An object or agent was removed from the world, e.g. when it was grabbed. """
+        super().__init__(tick)
+        self.obj_id = obj_id
+
+
+class ObjectMoved(WorldEvent):
+
+    def __init__(self, tick, obj_id, old_location, new_location):
+        """ An object or agent in the world moved to another location. Objects that are carried move along with their
+        carrier, without an event of their own. """
+        super().__init__(tick)
+        self.obj_id = obj_id
+        self.old_location = old_location
+        self.new_location = new_location
+
+
+class PropertyChanged(WorldEvent):
+
+    def __init__(self, tick, obj_id, property_name, value):
+        """ A property of an object or agent in the world was changed through EnvObject.change_property. """
+        super().__init__(tick)
+        self.obj_id = obj_id
+        self.property_name = property_name
+        self.value = value
+
+
+class DoorOpened(WorldEvent):
+
+    def __init__(self, tick, agent_id, door_id):
+        """ An agent opened a door. """
+        super().__init__(tick)
+        self.agent_id = agent_id
+        self.door_id = door_id
+
+
+class DoorClosed(WorldEvent):
+
+    def __init__(self, tick, agent_id, door_id):
+        """ An agent closed a door. """
+        super().__init__(tick)
+        self.agent_id = agent_id
+        self.door_id = door_id
+
+
+class ObjectGrabbed(WorldEvent):
+
+    def __init__(self, tick, agent_id, obj_id):
+        """ An agent grabbed an object, which is removed from the world while it is carried. """
+        super().__init__(tick)
+        self.agent_id = agent_id
+        self.obj_id = obj_id
+
+
+class ObjectDropped(WorldEvent):
+
+    def __init__(self, tick, agent_id, obj_id, location):
+        """ An agent dropped an object at a location, which is added to the world again. """
+        super().__init__(tick)
+        self.agent_id = agent_id
+        self.obj_id = obj_id
+        self.location = location
+
+
+class MessageSent(WorldEvent):
+
+    def __init__(self, tick, message):
+        """ An agent sent a message (or one was sent on its behalf through the API), as it was sent; before it is split
+        up per receiver. """
+        super().__init__(tick)
+        self.message = message
+
+
+class ActionFailed(WorldEvent):
+
+    def __init__(self, tick, agent_id, action_name, action_kwargs, result):
+        """ The action of an agent was not possible, or failed when performed. """
+        super().__init__(tick)
+        self.agent_id = agent_id
+        self.action_name = action_name
+        self.action_kwargs = action_kwargs
+        self.result = result
+
+
+class EventBus:
+
+    def __init__(self):
+        """ Delivers the events of a GridWorld to the callbacks that subscribed to them.
+
+        Events are delivered synchronously, in order of subscription, right when they happen; in the middle of a tick.
+        Callbacks should therefore only record what happened and not alter the world. Emitters check
+        `has_subscribers` first, so events nobody subscribed to are never even created.
+
+        """
+        self.__subscriptions = []  # (callback, tuple of event types) in order of subscription
+        self.__callbacks = {}  # event type -> tuple of the callbacks subscribed to it, filled when first needed
+
+    def subscribe(self, callback, event_types=WorldEvent):
+        """ Subscribes a callback to events.
+
+        Parameters
+        ----------
+        callback : callable
+            Called with each event of the given types (or a subclass thereof).
+        event_types : type, iterable of type, optional (default=WorldEvent)
+            The WorldEvent classes to subscribe to, by default all events.
+
+        Raises
+        ------
+        ValueError
+            When an event type is not a subclass of WorldEvent.
+        """
+        if isinstance(event_types, type):
+            event_types = (event_types,)
+        event_types = tuple(event_types)
+        for event_type in event_types:
+            if not isinstance(event_type, type) or not issubclass(event_type, WorldEvent):
+                raise ValueError(f"The given event type {event_type} is not a subclass of {WorldEvent.__name__}.")
+
+        self.__subscriptions.append((callback, event_types))
+        self.__callbacks = {}
+
+    def unsubscribe(self, callback):
+        """ Removes all subscriptions of a callback, nothing happens when it did not subscribe. """
+        self.__subscriptions = [(subscriber, event_types) for subscriber, event_types in self.__subscriptions
+                                if subscriber != callback]
+        self.__callbacks = {}
+
+    def has_subscribers(self, event_type):
+        """ Whether any callback subscribed to events of the given type. """
+        return len(self.__callbacks_for(event_type)) > 0
+
+    def emit(self, event):
+        """ Delivers an event to all callbacks that subscribed to its type. """
+        for callback in self.__callbacks_for(type(event)):
+            callback(event)
+
+    def __callbacks_for(self, event_type):
+        callbacks = self.__callbacks.get(event_type)
+        if callbacks is None:
+            callbacks = tuple(callback for callback, event_types in self.__subscriptions
+                              if issubclass(event_type, event_types))
+            self.__callbacks[event_type] = callbacks
+        return callbacks
@@ -0,0 +1,33 @@
+class WorldSnapshot:
+
+    def __init__(self, grid_world, nr_ticks, state):
+        """ The state of a GridWorld between two ticks, made by GridWorld.snapshot and restored by GridWorld.restore.
+
+        The contents are private to the GridWorld that made it. A snapshot can be restored any number of times, but
+        only in that GridWorld.
+
+        Parameters
+        ----------
+        grid_world : GridWorld
+            The GridWorld of which this is a snapshot.
+        nr_ticks : int
+            The tick at which the snapshot was made; the tick the GridWorld performs next after restoring it.
+        state : dict
+            The state of the GridWorld.
+
+        """
+        self.__grid_world = grid_world
+        self.__nr_ticks = nr_ticks
+        self.__state = state
+
+    def _is_of(self, grid_world):
+        """ Whether this is a snapshot of the given GridWorld. """
+        return self.__grid_world is grid_world
+
+    @property
+    def _state(self):
+        return self.__state
+
+    @property
+    def nr_ticks(self):
+        return self.__nr_ticks
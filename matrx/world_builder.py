@@ -1,8 +1,12 @@
+import copy
 import inspect
 import os
+import pickle
 import sys
 import warnings
 from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from typing import Callable, Union, Iterable
 import requests
 
@@ -14,6 +18,7 @@ from matrx.agents.capabilities.capability import SenseCapability
 from matrx.agents.human_agent_brain import HumanAgentBrain
 from matrx.grid_world import GridWorld
 from matrx.logger.logger import GridWorldLogger
+from matrx.utils.tick_clock import TickClock
 from matrx.objects.agent_body import AgentBody
 from matrx.objects.env_object import EnvObject
 from matrx.utils import utils
@@ -29,7 +34,9 @@ class WorldBuilder:
 
     def __init__(self, shape, tick_duration=0.5, random_seed=1, simulation_goal=1000, run_matrx_api=True,
                  run_matrx_visualizer=False, visualization_bg_clr="#C2C2C2", visualization_bg_img=None,
-                 verbose=False):
+                 verbose=False, check_grid_consistency=False, max_decision_workers=None, use_object_store=False,
+                 profile_ticks=False, tick_overrun_policy="drop", record_actions=False, message_retention_ticks=None,
+                 message_history_dir=None):
         """
         A builder to create one or more worlds.
 
@@ -60,6 +67,36 @@ class WorldBuilder:
             of the path to the image file. Defaults to None (no image).
         verbose : bool, optional
             Whether the subsequent created world should be verbose or not. Defaults to False.
+        check_grid_consistency : bool, optional
+            Whether the created worlds verify their incrementally updated grid against a full rebuild after every
+            action. This is slow and only meant for debugging. Defaults to False.
+        max_decision_workers : int, optional
+            The number of threads in which the agents of the created worlds decide on their actions concurrently. When
+            set, all agents perceive the world as it was at the start of the tick and their decisions are processed in
+            order of registration, so the outcome is the same for any number of workers. Defaults to None, meaning that
+            agents perceive and decide one after the other.
+        use_object_store : bool, optional
+            Whether the created worlds keep the location, traversability, movability and visualization of all objects
+            and agents in a columnar ObjectStore (see GridWorld.object_store), allowing vectorized operations over all
+            of them. Defaults to False.
+        profile_ticks : bool, optional
+            Whether the created worlds record the time spent in each phase of every tick (see GridWorld.tick_profiler),
+            available through the API and the LogTickProfile logger. Defaults to False, which costs nothing.
+        tick_overrun_policy : str, optional
+            What the created worlds do after a tick took longer than the tick duration. With "catch_up" the following
+            ticks do not sleep until the world is back on schedule, with "drop" the missed ticks are dropped and the
+            schedule starts anew (see GridWorld.tick_clock for the resulting lag statistics). Defaults to "drop".
+        record_actions : bool, optional
+            Whether the created worlds record the decisions, messages and user input of their agents in an ActionLog
+            (see GridWorld.action_log), with which a run can be replayed without the agent brains (see
+            GridWorld.replay). Defaults to False.
+        message_retention_ticks : int, optional
+            The number of most recent ticks of which the created worlds keep the messages in memory. The messages of
+            older ticks are moved to a file on disk, from which they can still be fetched through the API (see
+            MessageManager.fetch_messages). Defaults to None, which keeps all messages in memory.
+        message_history_dir : str, optional
+            The directory in which the created worlds store the messages of ticks they no longer keep in memory.
+            Defaults to None, the temporary directory of the system.
 
         Raises
         ------
@@ -124,6 +161,20 @@ class WorldBuilder:
             raise ValueError(f"The given value {run_matrx_api} for run_matrx_api is invalid, should be "
                              f"of type bool.")
 
+        if max_decision_workers is not None and (not isinstance(max_decision_workers, int) or
+                                                 max_decision_workers < 1):
+            raise ValueError(f"The given value {max_decision_workers} for max_decision_workers is invalid, should be "
+                             f"None or an integer larger or equal to 1.")
+
+        if message_retention_ticks is not None and (not isinstance(message_retention_ticks, int) or
+                                                    message_retention_ticks < 1):
+            raise ValueError(f"The given value {message_retention_ticks} for message_retention_ticks is invalid, should "
+                             f"be None or an integer larger or equal to 1.")
+
+        if tick_overrun_policy not in TickClock.OVERRUN_POLICIES:
+            raise ValueError(f"The given tick_overrun_policy {tick_overrun_policy} should be one of "
+                             f"{TickClock.OVERRUN_POLICIES}.")
+
         if not run_matrx_api and run_matrx_visualizer:
             raise ValueError(f"Run_matrx_api is set to False while run_matrx_visualizer is set to True. The MATRX "
                              f"visualizer requires the API to work, so this is not possible.")
@@ -159,6 +210,14 @@ class WorldBuilder:
                                                         visualization_bg_clr=visualization_bg_clr,
                                                         visualization_bg_img=visualization_bg_img,
                                                         verbose=self.verbose,
+                                                        check_grid_consistency=check_grid_consistency,
+                                                        max_decision_workers=max_decision_workers,
+                                                        use_object_store=use_object_store,
+                                                        profile_ticks=profile_ticks,
+                                                        tick_overrun_policy=tick_overrun_policy,
+                                                        record_actions=record_actions,
+                                                        message_retention_ticks=message_retention_ticks,
+                                                        message_history_dir=message_history_dir,
                                                         rnd_seed=random_seed)
         # Keep track of the number of worlds we created
         self.worlds_created = 0
@@ -218,8 +277,150 @@ class WorldBuilder:
         self.__reset_random()
         return world
 
+    def run_headless(self, nr_of_worlds: int = 1, nr_ticks: int = None, skip_idle_ticks: bool = False):
+        """
+        Creates and runs the specified number of worlds headless; as fast as possible and without the API,
+        visualisation, sleeping or printing. Useful for batch experiments and throughput measurements.
+
+        Parameters
+        ----------
+        nr_of_worlds
+            The number of worlds to create and run. Defaults to 1.
+        nr_ticks
+            The maximum number of ticks each world runs. Defaults to None, meaning that each world runs until its
+            simulation goal is reached.
+        skip_idle_ticks
+            Whether each world jumps over the ticks at which nothing happens. Defaults to False. See
+            GridWorld.run_headless.
+
+        Returns
+        -------
+        list
+            The summary of each run as returned by GridWorld.run_headless, in the order in which the worlds were run.
+
+        See Also
+        --------
+        GridWorld.run_headless
+
+        """
+        summaries = []
+        for world in self.worlds(nr_of_worlds=self.worlds_created + nr_of_worlds):
+            summaries.append(world.run_headless(nr_ticks=nr_ticks, skip_idle_ticks=skip_idle_ticks))
+        return summaries
+
+    def run_worlds_in_pool(self, nr_of_worlds: int = 100, nr_workers: int = None, nr_ticks: int = None,
+                           log_dir: str = None, max_retries: int = 1):
+        """
+        Creates and runs the specified number of worlds headless, distributed over a pool of processes.
+
+        Each world is created in a worker process from a fresh copy of this WorldBuilder, seeded with its own seed. These
+        seeds are drawn from the master random seed, so each world is the same regardless of the number of workers or
+        which worker runs it. Loggers write to a separate "world_<nr>" directory per world, as they do when running
+        worlds one after the other.
+
+        Note that this requires everything added to this WorldBuilder (e.g. agent brains and loggers) to be picklable.
+
+        Parameters
+        ----------
+        nr_of_worlds
+            The number of worlds to create and run. Defaults to 100.
+        nr_workers
+            The number of worker processes. Defaults to None, meaning the number of processors on this machine.
+        nr_ticks
+            The maximum number of ticks each world runs. Defaults to None, meaning that each world runs until its
+            simulation goal is reached.
+        log_dir
+            The directory in which the loggers of each world create their "world_<nr>" directory. Defaults to None,
+            meaning the save_path given to each logger.
+        max_retries
+            How often a world is retried when the worker process running it crashed. After a crash, each world is
+            retried in its own process so a crashing world cannot take down the others. A world that raised an
+            exception is not retried. Defaults to 1.
+
+        Returns
+        -------
+        list
+            A table with a row (dictionary) per world, ordered by world number. Each row contains the "world_nr", its
+            "seed", the number of "attempts" and either the summary as returned by GridWorld.run_headless or an "error"
+            describing why the world could not be run.
+
+        Raises
+        ------
+        ValueError
+            The nr_of_worlds should be a positive non-zero integer.
+
+        See Also
+        --------
+        GridWorld.run_headless
+
+        """
+        if not isinstance(nr_of_worlds, int) or nr_of_worlds <= 0:
+            raise ValueError(f"The given nr_of_worlds {nr_of_worlds} should be of type Int and larger or equal to 1.")
+
+        # Each world gets its own seed, drawn from the master seed
+        seed_gen = np.random.RandomState(self.world_settings["rnd_seed"])
+        seeds = {world_nr: int(seed_gen.randint(1, 1000000)) for world_nr in range(1, nr_of_worlds + 1)}
+
+        # The workers create their worlds from a copy of this builder, without the API or visualizer
+        builder = copy.copy(self)
+        builder.run_matrx_api = False
+        builder.run_matrx_visualizer = False
+        builder.api_info = {"run_matrx_api": False, "api_thread": False}
+        builder.matrx_visualizer_thread = False
+        builder_bytes = pickle.dumps(builder)
+
+        nr_workers = nr_workers if nr_workers is not None else os.cpu_count()
+        results = {}
+        attempts = {world_nr: 0 for world_nr in seeds.keys()}
+        crashes = {world_nr: 0 for world_nr in seeds.keys()}
+        to_run = list(seeds.keys())
+        isolated = False  # Whether each world runs in its own process, as we do after a worker crashed
+        while len(to_run) > 0:
+            # All worlds share a single pool, unless they are isolated in which case we run nr_workers pools at a time
+            pool_size = 1 if isolated else nr_workers
+            groups = [[world_nr] for world_nr in to_run] if isolated else [to_run]
+            crashed = []
+            for start in range(0, len(groups), nr_workers // pool_size):
+                pools = []
+                for group in groups[start:start + nr_workers // pool_size]:
+                    pool = ProcessPoolExecutor(max_workers=pool_size, initializer=_init_pool_worker,
+                                               initargs=(builder_bytes,))
+                    futures = {}
+                    for world_nr in group:
+                        attempts[world_nr] += 1
+                        futures[world_nr] = pool.submit(_run_pool_world, world_nr, seeds[world_nr], nr_ticks, log_dir)
+                    pools.append((pool, futures))
+
+                for pool, futures in pools:
+                    for world_nr, future in futures.items():
+                        row = {"world_nr": world_nr, "seed": seeds[world_nr], "attempts": attempts[world_nr]}
+                        try:
+                            results[world_nr] = {**row, **future.result()}
+                        except BrokenProcessPool:
+                            crashed.append(world_nr)
+                        except Exception as e:
+                            results[world_nr] = {**row, "error": f"{e.__class__.__name__}: {e}"}
+                    pool.shutdown()
+
+            # Retry the worlds whose worker crashed, each in its own process. When multiple worlds shared the pool it is
+            # unknown which of them crashed it, so only crashes in their own process count towards their retries.
+            to_run = []
+            for world_nr in crashed:
+                if isolated:
+                    crashes[world_nr] += 1
+                if crashes[world_nr] <= max_retries:
+                    to_run.append(world_nr)
+                else:
+                    results[world_nr] = {"world_nr": world_nr, "seed": seeds[world_nr], "attempts": attempts[world_nr],
+                                         "error": "The worker process running this world crashed."}
+            isolated = True
+
+        return [results[world_nr] for world_nr in sorted(results.keys())]
+
     def __set_world_settings(self, shape, tick_duration, simulation_goal,  rnd_seed,
-                             visualization_bg_clr, visualization_bg_img, verbose):
+                             visualization_bg_clr, visualization_bg_img, verbose, check_grid_consistency,
+                             max_decision_workers, use_object_store, profile_ticks,
+                             tick_overrun_policy, record_actions, message_retention_ticks, message_history_dir):
 
         if rnd_seed is None:
             rnd_seed = self.rng.randint(0, 1000000)
@@ -230,7 +431,15 @@ class WorldBuilder:
                           "rnd_seed": rnd_seed,
                           "visualization_bg_clr": visualization_bg_clr,
                           "visualization_bg_img": visualization_bg_img,
-                          "verbose": verbose}
+                          "verbose": verbose,
+                          "check_grid_consistency": check_grid_consistency,
+                          "max_decision_workers": max_decision_workers,
+                          "use_object_store": use_object_store,
+                          "profile_ticks": profile_ticks,
+                          "tick_overrun_policy": tick_overrun_policy,
+                          "record_actions": record_actions,
+                          "message_retention_ticks": message_retention_ticks,
+                          "message_history_dir": message_history_dir}
 
         return world_settings
 
@@ -1128,6 +1337,33 @@ class WorldBuilder:
 
 
 
+# The pickled WorldBuilder from which each worker process of WorldBuilder.run_worlds_in_pool creates its worlds
+_pool_builder_bytes = None
+
+
+def _init_pool_worker(builder_bytes):
+    global _pool_builder_bytes
+    _pool_builder_bytes = builder_bytes
+
+
+def _run_pool_world(world_nr, seed, nr_ticks, log_dir):
+    """ Creates and runs a single world in a worker process of WorldBuilder.run_worlds_in_pool. """
+    # Every world starts from a fresh builder, so nothing (e.g. agent brains) carries over from a previous world
+    builder = pickle.loads(_pool_builder_bytes)
+    builder.rng = np.random.RandomState(seed)
+    builder.world_settings = {**builder.world_settings, "rnd_seed": seed}
+    builder.worlds_created = world_nr - 1
+    if log_dir is not None:
+        builder.loggers = [(logger_class, {**arguments, "save_path": log_dir} if "save_path" in arguments else arguments)
+                           for logger_class, arguments in builder.loggers]
+
+    # Object ids are numbered by a process wide counter, restart it so the ids do not depend on earlier worlds
+    utils.object_counter = 0
+
+    world = builder.get_world()
+    return world.run_headless(nr_ticks=nr_ticks)
+
+
 class RandomProperty:
 
     def __init__(self, values, distribution=None, allow_duplicates=True):
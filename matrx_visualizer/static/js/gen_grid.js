@@ -396,7 +396,7 @@ function process_messages(new_messages) {
                 Object.keys(new_messages[mssg_type][tick]).forEach(function(team) {
                     // add every message of every tick
                     (new_messages[mssg_type][tick][team]).forEach(function(mssg) {
-                        process_message(mssg_type, JSON.parse(mssg), team);
+                        process_message(mssg_type, mssg, team);
                     });
                 });
 
@@ -411,7 +411,7 @@ function process_messages(new_messages) {
             } else {
                 // add every message of every tick
                 new_messages[mssg_type][tick].forEach(function(mssg) {
-                    process_message(mssg_type, JSON.parse(mssg));
+                    process_message(mssg_type, mssg);
                 });
             }
         });